@@ -1,203 +1,166 @@
 import streamlit as st
 import numpy as np
-import math
-import datetime
 import plotly.graph_objects as go
-
-from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
-import plotly.io as pio
 import os
+import time
+import traceback
+import uuid
+
+from charts import context_pie, risk_surface
+from scoring import (
+    CATEGORIES, INPUTS, PARAMS_VERSION, RISK_LEVELS, RISK_THRESHOLDS, score_scenario, hospitalization_options,
+    economic_levels, political_levels, trust_levels, market_levels,
+    health_weight_levels, econ_weight_levels, pol_weight_levels, trust_weight_levels, market_weight_levels,
+)
+from uncertainty import simulate
+from sensitivity import FACTOR_LABELS, morris, scenario_factors, sobol
+from inverse import ALWAYS_ABOVE, INCREASING, SOLVED, boundaries, scientific
+from surfaces import AXIS_LABELS, WEIGHT_AXES, current_value, downsample, surface
+import lookup_table
+from metrics import EVENTS, STAGE_SECONDS, deep_sizeof, rss_bytes, stage, start_exporters
+from presets import default_sources, open_store
+from privacy import default_detector, describe
+from regions import RegionTable, default_regions_path, level_counts
+from report_jobs import Busy, default_jobs, request_key
+from submissions import FakeSheetsSink, GoogleSheetsSink, SubmissionPipeline, default_spool_path, submission_row
 
 
 st.set_page_config(page_title="HoliRisk", layout="centered")
 
+
+@st.cache_resource
+def contribution_table():
+    # Memory-mapped once per process, built on first use if missing
+    return lookup_table.load()
+
+
+@st.cache_resource
+def preset_store():
+    # Indexed once per process; later syncs only re-read changed preset files
+    return open_store()
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def sync_presets():
+    return preset_store().sync(default_sources())
+
+
+@st.cache_resource
+def submission_pipeline():
+    # One sink/client and one background flusher shared by every session
+    if os.environ.get("HOLIRISK_SHEETS_SINK") == "fake":
+        sink = FakeSheetsSink(os.environ.get("HOLIRISK_FAKE_SHEET_PATH"))
+    else:
+        sink = GoogleSheetsSink(st.secrets["google_service_account"])
+    return SubmissionPipeline(sink, default_spool_path())
+
+
+def report_jobs():
+    # One bounded pool of report builds for the whole server, shared with the other pages
+    return default_jobs()
+
+
+@st.cache_resource
+def metrics_exporters():
+    # /metrics endpoint and/or textfile export (see metrics.py), once per process
+    return start_exporters()
+
+
+def timed(name):
+    # Feeds the process-wide stage histograms and this session's debug panel
+    return stage(name, st.session_state.setdefault("stage_timings", {}))
+
+
+# ---------------- MEMOIZED MODEL ----------------
+# Keyed on the canonical input tuple, so reruns triggered by unrelated widgets
+# (notes, data submission fields, ...) only pay for a cache lookup.
+@st.cache_data(max_entries=4096, show_spinner=False)
+def cached_score(model_inputs):
+    return score_scenario(*model_inputs)
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def pie_figure(labels, values):
+    return context_pie(labels, values)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_simulation(model_inputs, rr_range, cases_gsd, n_samples, seed, use_float32):
+    inputs = dict(zip(INPUTS, model_inputs))
+    return simulate(
+        inputs,
+        {
+            "rr_score": {"dist": "triangular", "left": rr_range[0], "mode": inputs["rr_score"], "right": rr_range[1]},
+            "estimated_cases": {"dist": "lognormal", "median": max(inputs["base"] * 10 ** inputs["exponent"], 1e-12),
+                                "gsd": cases_gsd},
+        },
+        n_samples=n_samples, seed=seed, dtype=np.float32 if use_float32 else np.float64,
+    )
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_surface(fixed_inputs, x, y, resolution, max_cells):
+    # Keyed on the inputs that stay fixed, so moving along either axis is a cache hit
+    xv, yv, z = surface(dict(fixed_inputs), x, y, resolution, resolution)
+    return downsample(xv, yv, z, max_cells, max_cells)
+
+
+@st.cache_resource
+def region_table(path):
+    # Loaded and indexed once per process
+    return RegionTable.load(path)
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def cached_regions(model_inputs, allocation, prefix):
+    return region_table(default_regions_path()).score(dict(zip(INPUTS, model_inputs)), allocation, prefix=prefix)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_sensitivity(model_inputs, method, n_samples):
+    inputs = dict(zip(INPUTS, model_inputs))
+    factors = scenario_factors(inputs)
+    if method == "sobol":
+        return sobol(factors, inputs, n_samples=n_samples)
+    return morris(factors, inputs, n_trajectories=max(n_samples // 10, 10))
+
+
 # ---------------- CONFIG ----------------
+script_start = time.perf_counter()
+metrics_exporters()
+EVENTS.inc(event="rerun")
+st.session_state["stage_timings"] = {}
+
 st.title("🧮 HoliRisk")
 
 # ---------------- PRESETS ----------------
 st.sidebar.header("🎯 Select Preset Scenario")
 
-presets = {
-    
-    "Custom": {
-        "rr_score": 50,
-        "illness_base": 1.0,
-        "illness_exponent": 5,
-        "population": 60000000,
-        "economic": "Insignificant – No cost or loss (e.g., no recall)",
-        "political": "Insignificant – Not publicly visible",
-        "trust": "Insignificant – No public awareness",
-        "market": "Insignificant – No disruption to market access",
-        "weights": {
-            "health": "Monitor but not critical",
-            "economic": "Negligible cost concern",
-            "political": "Politically neutral",
-            "trust": "Trust unaffected",
-            "market": "Market not affected"
-        }
-    },
-
-    "RTE Salad – Standard": {
-        "rr_score": 60,
-        "illness_base": 2.34,
-        "illness_exponent": 3,
-        "population": 60000000,
-        "economic": "Limited – Local supplier loss (e.g., bakery batch recall)",
-        "political": "Low – Local media coverage",
-        "trust": "Moderate – Notable drop in trust or loyalty",
-        "market": "Moderate – Withdrawal from major retailers",
-        "weights": {
-            "health": "Significant to public health",
-            "economic": "Minor business impact",
-            "political": "Local political interest only",
-            "trust": "Could impact perception or loyalty",
-            "market": "Regional disruption possible"
-        }
-    },
-    "RTE Salad – Simulation 1": {
-        "rr_score": 72,
-        "illness_base": 2.34,
-        "illness_exponent": 5,
-        "population": 60000000,
-        "economic": "Moderate – National product withdrawal (e.g., cheese recall)",
-        "political": "Medium – National media attention (e.g., press release)",
-        "trust": "High – Public backlash, boycott, lawsuits",
-        "market": "Severe – Multi-country recall, trade barriers",
-        "weights": {
-            "health": "Top priority for decision-makers",
-            "economic": "Budgetary consideration",
-            "political": "National political/media relevance",
-            "trust": "Trust is key to public reaction",
-            "market": "Trade-wide or international effect"
-        }
-    },
-    "RTE Salad – Simulation 2": {
-        "rr_score": 62,
-        "illness_base": 4.68,
-        "illness_exponent": 3,
-        "population": 60000000,
-        "economic": "Moderate – National product withdrawal (e.g., cheese recall)",
-        "political": "Medium – National media attention (e.g., press release)",
-        "trust": "Moderate – Notable drop in trust or loyalty",
-        "market": "Severe – Multi-country recall, trade barriers",
-        "weights": {
-            "health": "Significant to public health",
-            "economic": "Budgetary consideration",
-            "political": "National political/media relevance",
-            "trust": "Could impact perception or loyalty",
-            "market": "Trade-wide or international effect"
-        }
-    },
-    "RTE Chicken – Standard": {
-        "rr_score": 45,
-        "illness_base": 5.85,
-        "illness_exponent": 2,
-        "population": 60000000,
-        "economic": "Limited – Local supplier loss (e.g., bakery batch recall)",
-        "political": "Low – Local media coverage",
-        "trust": "Low – Minor social media concern",
-        "market": "Mild – Removal from single shop or site",
-        "weights": {
-            "health": "Significant to public health",
-            "economic": "Minor business impact",
-            "political": "Local political interest only",
-            "trust": "Slight brand concern",
-            "market": "Local distribution only"
-        }
-    },
-    "RTE Chicken – Simulation 1": {
-        "rr_score": 58,
-        "illness_base": 8.78,
-        "illness_exponent": 4,
-        "population": 60000000,
-        "economic": "Severe – EU-wide recall or legal sanctions",
-        "political": "Medium – National media attention (e.g., press release)",
-        "trust": "Moderate – Notable drop in trust or loyalty",
-        "market": "Moderate – Withdrawal from major retailers",
-        "weights": {
-            "health": "Top priority for decision-makers",
-            "economic": "Major economic consequence",
-            "political": "National political/media relevance",
-            "trust": "Could impact perception or loyalty",
-            "market": "Regional disruption possible"
-        }
-    },
-    "RTE Chicken – Simulation 2": {
-        "rr_score": 57,
-        "illness_base": 5.87,
-        "illness_exponent": 4,
-        "population": 60000000,
-        "economic": "Severe – EU-wide recall or legal sanctions",
-        "political": "Medium – National media attention (e.g., press release)",
-        "trust": "Moderate – Notable drop in trust or loyalty",
-        "market": "Moderate – Withdrawal from major retailers",
-        "weights": {
-            "health": "Top priority for decision-makers",
-            "economic": "Budgetary consideration",
-            "political": "National political/media relevance",
-            "trust": "Could impact perception or loyalty",
-            "market": "Regional disruption possible"
-        }
-    },
-    "RTE Tiramisu – Standard": {
-        "rr_score": 49,
-        "illness_base": 2.34,
-        "illness_exponent": 3,
-        "population": 60000000,
-        "economic": "Limited – Local supplier loss (e.g., bakery batch recall)",
-        "political": "Medium – National media attention (e.g., press release)",
-        "trust": "Moderate – Notable drop in trust or loyalty",
-        "market": "Mild – Removal from single shop or site",
-        "weights": {
-            "health": "Significant to public health",
-            "economic": "Minor business impact",
-            "political": "National political/media relevance",
-            "trust": "Could impact perception or loyalty",
-            "market": "Local distribution only"
-        }
-    },
-    "RTE Tiramisu – Simulation 1": {
-        "rr_score": 60,
-        "illness_base": 2.43,
-        "illness_exponent": 5,
-        "population": 60000000,
-        "economic": "Moderate – National product withdrawal (e.g., cheese recall)",
-        "political": "High – EU-wide attention, parliamentary debate",
-        "trust": "High – Public backlash, boycott, lawsuits",
-        "market": "Moderate – Withdrawal from major retailers",
-        "weights": {
-            "health": "Top priority for decision-makers",
-            "economic": "Budgetary consideration",
-            "political": "Politically sensitive or explosive",
-            "trust": "Trust is key to public reaction",
-            "market": "Regional disruption possible"
-        }
-    },
-    "RTE Tiramisu – Simulation 2": {
-        "rr_score": 60,
-        "illness_base": 2.43,
-        "illness_exponent": 5,
-        "population": 60000000,
-        "economic": "Moderate – National product withdrawal (e.g., cheese recall)",
-        "political": "High – EU-wide attention, parliamentary debate",
-        "trust": "High – Public backlash, boycott, lawsuits",
-        "market": "Moderate – Withdrawal from major retailers",
-        "weights": {
-            "health": "Top priority for decision-makers",
-            "economic": "Budgetary consideration",
-            "political": "Politically sensitive or explosive",
-            "trust": "Trust is key to public reaction",
-            "market": "Regional disruption possible"
-        }
-    },
-    
-}
-
-selected_preset = st.sidebar.selectbox("Choose scenario", list(presets.keys()))
-preset = presets[selected_preset]
+# Only one page of names is ever queried, however large the catalogue
+PRESET_PAGE = 200
+
+sync_presets()
+store = preset_store()
+preset_prefix = st.sidebar.text_input("🔍 Search presets", placeholder="Start of a name, e.g. RTE Chicken")
+with st.sidebar.expander("Filter by product, hazard or variant"):
+    preset_filters = {
+        column: st.selectbox(column.capitalize(), ["All"] + store.values(column), key=f"preset_{column}")
+        for column in ("product", "hazard", "variant")
+    }
+preset_filters = {column: None if value == "All" else value for column, value in preset_filters.items()}
+
+preset_names = store.names(preset_prefix.strip(), limit=PRESET_PAGE, **preset_filters)
+selected_preset = st.sidebar.selectbox("Choose scenario", ["Custom"] + [n for n in preset_names if n != "Custom"])
+matches = store.count(preset_prefix.strip(), **preset_filters)
+if matches > PRESET_PAGE:
+    st.sidebar.caption(f"Showing the first {PRESET_PAGE} of {matches:,} matching presets – refine the search.")
+if store.errors:
+    with st.sidebar.expander(f"⚠️ {len(store.errors)} preset(s) skipped"):
+        st.write("\n".join(f"- {error}" for error in store.errors[:50]))
+preset = store.get(selected_preset)
+if PARAMS_VERSION != "builtin":
+    # Calibrated constants loaded from HOLIRISK_PARAMS (see calibrate.py)
+    st.sidebar.caption(f"Model parameters: calibrated set {PARAMS_VERSION}")
 
 # ---------------- STEP 1 ----------------
 
@@ -227,21 +190,15 @@ with col1:
 with col2:
     st.markdown('<p style="text-align:center; font-size:18px; margin-top:33px;">× 10^</p>', unsafe_allow_html=True)
 with col3:
-    exponent = st.number_input("Exponent", min_value=0, max_value=12, value=preset["illness_exponent"] if preset else 5)
+    exponent = st.number_input("Exponent", min_value=0, max_value=30, value=preset["illness_exponent"] if preset else 5)
 
 total_population = st.number_input("Total Population at Risk", min_value=1, value=preset["population"] if preset else 60000000)
 
 # 💊 Hospitalization factor choice
-hospitalization_options = {
-    "None or Minimal hospitalization, 1-5% of hospitalized cases ": 1.0,
-    "Moderate hospitalization, 5-20% of hospitalized cases": 1.25,
-    "Severe hospitalization, 20 to 40% of hospitalized cases": 1.5,
-    "Critical public health emergency, >40% of hospitalized cases": 2.0
-}
 hospitalization_choice = st.selectbox(
     "🏥 Estimated Impact on National Sanitary System",
     options=list(hospitalization_options.keys()),
-    index=0,
+    index=list(hospitalization_options.keys()).index(preset["hospitalization"]) if preset and "hospitalization" in preset else 0,
     help="What is the number of hospitalized cases if the target pathogen infects humans? The right choice can be obtained on the zoonoses report published by EFSA."
 )
 hospitalization_factor = hospitalization_options[hospitalization_choice]
@@ -276,31 +233,6 @@ with st.expander("💡 Tips"):
     """)
 
 
-economic_levels = {
-    "Insignificant – No cost or loss (e.g., no recall)": 25,
-    "Limited – Local supplier loss (e.g., bakery batch recall)": 50,
-    "Moderate – National product withdrawal (e.g., cheese recall)": 75,
-    "Severe – EU-wide recall or legal sanctions": 100
-}
-political_levels = {
-    "Insignificant – Not publicly visible": 25,
-    "Low – Local media coverage": 50,
-    "Medium – National media attention (e.g., press release)": 75,
-    "High – EU-wide attention, parliamentary debate": 100
-}
-trust_levels = {
-    "Insignificant – No public awareness": 25,
-    "Low – Minor social media concern": 50,
-    "Moderate – Notable drop in trust or loyalty": 75,
-    "High – Public backlash, boycott, lawsuits": 100
-}
-market_levels = {
-    "Insignificant – No disruption to market access": 25,
-    "Mild – Removal from single shop or site": 50,
-    "Moderate – Withdrawal from major retailers": 75,
-    "Severe – Multi-country recall, trade barriers": 100
-}
-
 economic_choice = st.selectbox("💸 Economic Impact", list(economic_levels.keys()),
     index=list(economic_levels.keys()).index(preset["economic"]) if preset else 0)
 economic = economic_levels[economic_choice]
@@ -335,37 +267,6 @@ with st.expander("💡 Tips"):
     """)
 
 
-health_weight_levels = {
-    "Not relevant – No impact on public health decision": 0,
-    "Monitor but not critical": 25,
-    "Significant to public health": 50,
-    "Top priority for decision-makers": 100
-}
-econ_weight_levels = {
-    "Negligible cost concern": 0,
-    "Minor business impact": 25,
-    "Budgetary consideration": 50,
-    "Major economic consequence": 100
-}
-pol_weight_levels = {
-    "Politically neutral": 0,
-    "Local political interest only": 25,
-    "National political/media relevance": 50,
-    "Politically sensitive or explosive": 100
-}
-trust_weight_levels = {
-    "Trust unaffected": 0,
-    "Slight brand concern": 25,
-    "Could impact perception or loyalty": 50,
-    "Trust is key to public reaction": 100
-}
-market_weight_levels = {
-    "Market not affected": 0,
-    "Local distribution only": 25,
-    "Regional disruption possible": 50,
-    "Trade-wide or international effect": 100
-}
-
 health_weight_choice = st.selectbox("⚕️ Health Weight", list(health_weight_levels.keys()),
     index=list(health_weight_levels.keys()).index(preset["weights"]["health"]) if preset else 0)
 w_health = health_weight_levels[health_weight_choice]
@@ -392,58 +293,83 @@ st.write("")  # oppure usa più di uno
     # ---------------- STEP 4 ----------------
 st.header("Results")
 
-estimated_cases = base * (10 ** exponent)
-illness_factor = (estimated_cases / total_population) * 100
-
-    # Logistic multiplier between 0 and 1
-L = 1.0
-x0 = 0.2
-k = 5
-multiplier = L / (1 + math.exp(-k * (illness_factor - x0)))
-
-    # Risk category for display
-if illness_factor < 0.01:
-    category = "🟢 Minimal Risk"
-elif illness_factor < 0.1:
-    category = "🟡 Low Risk"
-elif illness_factor < 0.5:
-    category = "🟠 Moderate Risk"
-elif illness_factor <= 1.0:
-    category = "🔴 High Risk"
-
-rr_scaled = rr_score * multiplier
-
-alpha = 1.5
-beta = 1.5
-health_contrib = rr_scaled * ((w_health / 100) ** alpha)
-econ_contrib = rr_scaled * ((w_econ / 100) ** alpha) * ((economic / 100) ** beta)
-pol_contrib = rr_scaled * ((w_pol / 100) ** alpha) * ((political / 100) ** beta)
-trust_contrib = rr_scaled * ((w_trust / 100) ** alpha) * ((trust / 100) ** beta)
-market_contrib = rr_scaled * ((w_market / 100) ** alpha) * ((market / 100) ** beta)
-total_contrib = health_contrib + econ_contrib + pol_contrib + trust_contrib + market_contrib
-
-if total_contrib > 0:
-    norm_health = (health_contrib / total_contrib) * 100
-    norm_econ = (econ_contrib / total_contrib) * 100
-    norm_pol = (pol_contrib / total_contrib) * 100
-    norm_trust = (trust_contrib / total_contrib) * 100
-    norm_market = (market_contrib / total_contrib) * 100
-
-
-final_score = min(total_contrib, 100)
-final_score *= hospitalization_factor
-
-if final_score < 25:
-    risk_level = "🟢 Low Societal Risk"
-elif final_score < 50:
-    risk_level = "🟡 Moderate Societal Risk"
-elif final_score < 75:
-    risk_level = "🟠 Significant Societal Risk"
-elif final_score > 75:
-    risk_level = "🔴 High Societal Risk"
+scenario = {
+    "selected_preset": selected_preset,
+    "rr_score": rr_score,
+    "base": base,
+    "exponent": exponent,
+    "total_population": total_population,
+    "hospitalization_choice": hospitalization_choice,
+    "economic_choice": economic_choice,
+    "political_choice": political_choice,
+    "trust_choice": trust_choice,
+    "market_choice": market_choice,
+    "health_weight_choice": health_weight_choice,
+    "econ_weight_choice": econ_weight_choice,
+    "pol_weight_choice": pol_weight_choice,
+    "trust_weight_choice": trust_weight_choice,
+    "market_weight_choice": market_weight_choice,
+}
+    # Canonical input tuple, the key of every memoized computation below
+model_inputs = (
+    float(rr_score), float(base), float(exponent), float(total_population),
+    float(economic), float(political), float(trust), float(market),
+    float(w_health), float(w_econ), float(w_pol), float(w_trust), float(w_market),
+    float(hospitalization_factor),
+)
+
+with timed("scoring"):
+    result = cached_score(model_inputs)
+illness_factor = result["illness_factor"]
+category = result["category"]
+norm_health = result["norm_health"]
+norm_econ = result["norm_econ"]
+norm_pol = result["norm_pol"]
+norm_trust = result["norm_trust"]
+norm_market = result["norm_market"]
+final_score = result["final_score"]
+risk_level = result["risk_level"]
+scenario.update(
+    illness_factor=illness_factor, final_score=final_score, risk_level=risk_level,
+    norm_health=norm_health, norm_econ=norm_econ, norm_pol=norm_pol, norm_trust=norm_trust, norm_market=norm_market,
+)
 
 st.subheader("📊 Final Score")
-st.metric(label="Composite Risk Score", value=f"{final_score:.2f} / 100", delta=risk_level)
+
+
+@st.fragment
+def final_score_section(model_inputs, final_score, risk_level):
+    with st.expander("🎲 Uncertainty (Monte Carlo)"):
+        run_uncertainty = st.checkbox("Propagate input uncertainty to the score", value=False)
+        mc_col1, mc_col2 = st.columns(2)
+        with mc_col1:
+            rr_range = st.slider("Risk Ranger Score range (triangular)", 0, 100,
+                                 value=(max(int(model_inputs[0]) - 10, 0), min(int(model_inputs[0]) + 10, 100)))
+            cases_gsd = st.number_input("Estimated cases – geometric SD (lognormal)", min_value=1.0, value=2.0, step=0.5)
+        with mc_col2:
+            n_samples = st.select_slider("Samples", options=[10_000, 100_000, 1_000_000], value=100_000)
+            mc_float32 = st.checkbox("Use float32 (faster)", value=True)
+            mc_seed = st.number_input("Random seed", min_value=0, value=42, step=1)
+
+    score_col, band_col = st.columns(2)
+    with score_col:
+        st.metric(label="Composite Risk Score", value=f"{final_score:.2f} / 100", delta=risk_level)
+
+    if run_uncertainty:
+        with timed("monte_carlo"):
+            mc = cached_simulation(model_inputs, tuple(rr_range), cases_gsd, n_samples, int(mc_seed), mc_float32)
+        with band_col:
+            st.metric(label="90% Uncertainty Band (P5 – P95)",
+                      value=f"{mc['percentiles'][5]:.2f} – {mc['percentiles'][95]:.2f}",
+                      delta=f"median {mc['percentiles'][50]:.2f}", delta_color="off")
+        st.caption("Probability of each risk level: " + " · ".join(
+            f"{level} {p:.1%}" for level, p in mc["p_risk_level"].items()))
+        if not rr_range[0] <= model_inputs[0] <= rr_range[1]:
+            st.caption(f"ℹ️ The Risk Ranger Score ({model_inputs[0]}) is outside the chosen range; "
+                       f"the triangular distribution peaks at {min(max(model_inputs[0], rr_range[0]), rr_range[1])}.")
+
+
+final_score_section(model_inputs, final_score, risk_level)
 
 
 with st.expander("📥 Contribution by Domain", expanded=True):
@@ -468,329 +394,391 @@ for label, value in zip(labels_context, values_context):
         filtered_values.append(value)
 
 if filtered_values:
-    fig = go.Figure(data=[go.Pie(
-        labels=filtered_labels,
-        values=filtered_values,
-        textinfo='label+percent',
-        insidetextorientation='radial'
-        )])
-    fig.update_layout(
-        template='plotly_white',
-            paper_bgcolor='white',
-            plot_bgcolor='white',
-            width=600,
-            height=600,
-            font=dict(size=16),
-            legend=dict(font=dict(size=18, color='black'))
-        )
-    st.plotly_chart(fig)
-
-        # Save image if needed for PDF
-    pie_path = "context_pie.png"
-    fig.write_image(pie_path, width=800, height=800, engine="kaleido")
-    pie_image = ImageReader(pie_path)
+    with timed("figure"):
+        pie = pie_figure(tuple(filtered_labels), tuple(filtered_values))
+    st.plotly_chart(pie)
 
 else:
     st.warning("⚠️ Cannot display pie chart – all contextual contributions are zero or missing.")
 
-    # ---------------- FEEDBACK + PDF REPORT ----------------
-st.header("📝 Notes & PDF Report")
-
-    # Feedback Text Area
-user_feedback = st.text_area("💬 Write here notes to add to your PDF report:", height=70)
-
-    # Generate PDF Button
-generate_report = st.button("📄 Generate Risk Report (PDF)")
-
-if generate_report:
-    from io import BytesIO
-    from reportlab.lib.pagesizes import A4
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.utils import ImageReader
-    import plotly.io as pio
-    import os
-
-    buffer = BytesIO()
-        # Forza il tema chiaro globale di Plotly
-    import plotly.io as pio
-    pio.templates.default = "plotly_white"
-
-        # Solo se abbiamo dati per il grafico
-    if filtered_values:
-        # Configura layout grafico
-        fig.update_layout(
-            title_text="📊 Contextual Risk Breakdown",
-            width=800,
-            height=800,
-            font=dict(size=18),
-            legend=dict(font=dict(size=16))
-            )
-        fig.update_traces(hole=0)
-
-            # Salva il grafico Plotly
-        pie_path = "context_pie.png"
-        fig.write_image(pie_path, width=800, height=800, engine="kaleido")
-        pie_image = ImageReader(pie_path)
-
-
-
-            # Inizio generazione PDF
-        c = canvas.Canvas(buffer, pagesize=A4)
-        width, height = A4
-        y = height - 40
-
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(50, y, "📄 HoliRisk – Risk Assessment Report")
-        y -= 30
-
-        c.setFont("Helvetica", 11)
-        c.drawString(50, y, f"Selected Scenario: {selected_preset}")
-        y -= 20
-
-            # Microbiological Inputs
-        c.drawString(50, y, "🧮 Microbiological Inputs:")
-        y -= 15
-        c.drawString(70, y, f"Risk Ranger Score: {rr_score}")
-        y -= 15
-        c.drawString(70, y, f"Estimated Illness Base: {base}")
-        y -= 15
-        c.drawString(70, y, f"Exponent: {exponent}")
-        y -= 15
-        c.drawString(70, y, f"Total Population at Risk: {total_population}")
-        y -= 25
-
-            # Contextual Impacts
-        c.drawString(50, y, "🌍 Contextual Impact Selections:")
-        y -= 15
-        c.drawString(70, y, f"Economic Impact: {economic_choice}")
-        y -= 15
-        c.drawString(70, y, f"Political Sensitivity: {political_choice}")
-        y -= 15
-        c.drawString(70, y, f"Consumer Trust Loss: {trust_choice}")
-        y -= 15
-        c.drawString(70, y, f"Market Disruption: {market_choice}")
-        y -= 25
-
-            # Weights
-        c.drawString(50, y, "⚖️ Importance Weights:")
-        y -= 15
-        c.drawString(70, y, f"Health Weight: {health_weight_choice}")
-        y -= 15
-        c.drawString(70, y, f"Economic Weight: {econ_weight_choice}")
-        y -= 15
-        c.drawString(70, y, f"Political Weight: {pol_weight_choice}")
-        y -= 15
-        c.drawString(70, y, f"Trust Weight: {trust_weight_choice}")
-        y -= 15
-        c.drawString(70, y, f"Market Weight: {market_weight_choice}")
-        y -= 25
-
-            # Final Results
-        c.drawString(50, y, "📊 Final Results:")
-        y -= 15
-        c.drawString(70, y, f"Composite Risk Score: {final_score:.2f} / 100 – {risk_level}")
-        y -= 15
-
-            # Normalized Contributions
-        c.drawString(50, y, "🔹 Factors contributions:")
-        y -= 15
-        c.drawString(70, y, f"⚕️ Health: {norm_health:.1f}%")
-        y -= 15
-        c.drawString(70, y, f"💸 Economic: {norm_econ:.1f}%")
-        y -= 15
-        c.drawString(70, y, f"📢 Political: {norm_pol:.1f}%")
-        y -= 15
-        c.drawString(70, y, f"🛒 Trust: {norm_trust:.1f}%")
-        y -= 15
-        c.drawString(70, y, f"🔗 Market: {norm_market:.1f}%")
-        y -= 25
-
-            # Inserisci grafico Plotly se disponibile
-        if pie_image and y > 350:
-            c.drawString(50, y, "🥧 Contextual Risk Pie Chart:")
-            y -= 10
-            c.drawImage(pie_image, x=105, y=y - 300, width=300, height=300)
-            y -= 320
-        elif pie_image:
-            c.showPage()
-            y = height - 40
-            c.drawString(50, y, "🥧 Contextual Risk Pie Chart (continued):")
-            y -= 10
-            c.drawImage(pie_image, x=105, y=y - 300, width=300, height=300)
-            y -= 320
-
-            # Feedback
-        if user_feedback:
-            if y < 100:
-                c.showPage()
-                y = height - 40
-            c.drawString(50, y, "✍️ User Feedback:")
-            y -= 20
-            text = c.beginText(70, y)
-            text.setFont("Helvetica-Oblique", 10)
-            for line in user_feedback.splitlines():
-                text.textLine(line)
-                y -= 14
-            c.drawText(text)
-
-        c.save()
-        buffer.seek(0)
-
-            # Cleanup image file
-        if filtered_values and os.path.exists(pie_path):
-            os.remove(pie_path)
 
+    # ---------------- SENSITIVITY ----------------
+@st.fragment
+def sensitivity_section(model_inputs):
+    with st.expander("🌪️ Sensitivity Analysis – which input drives the score?"):
+        st.markdown(
+            "Varies the Risk Ranger Score (±20), the estimated cases (±1 order of magnitude) "
+            "and every impact and weight level around the current scenario."
+        )
+        sa_method = st.radio("Method", ["Sobol (variance-based)", "Morris (screening)"], horizontal=True)
+        sa_samples = st.select_slider("Base samples", options=[1_000, 10_000, 100_000], value=10_000)
+        if st.checkbox("Run sensitivity analysis", value=False):
+            with timed("sensitivity"):
+                sa = cached_sensitivity(model_inputs, sa_method.split()[0].lower(), sa_samples)
+            if sa_method.startswith("Sobol"):
+                bars = [("Total effect (ST)", sa["ST"]), ("First order (S1)", sa["S1"])]
+                order = np.argsort(sa["ST"])
+            else:
+                bars = [("μ* (mean |elementary effect|)", sa["mu_star"]), ("σ (interactions)", sa["sigma"])]
+                order = np.argsort(sa["mu_star"])
+
+            names = [FACTOR_LABELS[sa["names"][i]] for i in order]
+            tornado = go.Figure([
+                go.Bar(y=names, x=values[order], name=label, orientation="h") for label, values in bars
+            ])
+            tornado.update_layout(template="plotly_white", barmode="group", height=500,
+                                  legend=dict(orientation="h", y=-0.15), margin=dict(l=10, r=10, t=30, b=10))
+            st.plotly_chart(tornado)
+            st.caption(f"{sa['evaluations']:,} model evaluations.")
+
+
+@st.fragment
+def high_risk_configurations_section(scenario):
+    with st.expander("🔎 Which weight/impact configurations reach High Societal Risk?"):
+        if st.checkbox("Search all 4^10 level combinations", value=False):
+            micro = (scenario["rr_score"], scenario["base"], scenario["exponent"], scenario["total_population"])
+            current = dict(economic=scenario["economic_choice"], political=scenario["political_choice"],
+                           trust=scenario["trust_choice"], market=scenario["market_choice"],
+                           hospitalization_factor=scenario["hospitalization_choice"])
+            with timed("lookup"):
+                table = contribution_table()
+                shares = table.level_shares(table.risk_levels(*micro))
+                weight_scores = table.final_scores(*micro, **current)
+                high = weight_scores >= RISK_THRESHOLDS[-1]
+                configurations = table.configurations(high, weight_scores, limit=20, **current)
+
+            st.caption("Share of all impact/weight/hospitalization combinations at each risk level: " + " · ".join(
+                f"{level} {share:.1%}" for level, share in shares.items()))
+            st.write(f"With the current impacts, **{int(high.sum())} of {high.size}** weight combinations "
+                     "reach 🔴 High Societal Risk.")
+            if configurations:
+                st.dataframe([
+                    {"Health": row["w_health"], "Economic": row["w_econ"], "Political": row["w_pol"],
+                     "Trust": row["w_trust"], "Market": row["w_market"]}
+                    for row in configurations
+                ])
+
+
+INVERSE_INPUTS = {
+    "Risk Ranger Score": "rr_score",
+    "Estimated cases": "estimated_cases",
+    "Population at risk": "total_population",
+}
+
+
+def format_boundary(free, value, status):
+    if status == ALWAYS_ABOVE:
+        return "reached over the whole range"
+    if status != SOLVED:
+        return "not reachable"
+    if free == "rr_score":
+        return f"{value:.1f}"
+    if free == "estimated_cases":
+        base, exponent = scientific(value)
+        return f"{float(base):.2f} × 10^{int(exponent)} ({value:,.0f} cases)"
+    return f"{value:,.0f}"
+
+
+@st.fragment
+def inverse_section(model_inputs):
+    with st.expander("🎯 Inverse mode – what would change the risk level?"):
+        free_label = st.radio("Solve for", list(INVERSE_INPUTS), horizontal=True)
+        free = INVERSE_INPUTS[free_label]
+        inputs = dict(zip(INPUTS, model_inputs))
+        with timed("inverse"):
+            levels = boundaries(inputs, free)
+            categories = boundaries(inputs, free, "illness_factor") if free != "rr_score" else {}
+
+        rows = [{"Boundary": f"{RISK_LEVELS[i + 1]} (score {target})",
+                 free_label: format_boundary(free, value[0], status[0])}
+                for i, (target, (value, status)) in enumerate(levels.items())]
+        rows += [{"Boundary": f"{CATEGORIES[i + 1]} (illness factor {target}%)",
+                  free_label: format_boundary(free, value[0], status[0])}
+                 for i, (target, (value, status)) in enumerate(categories.items())]
+        st.dataframe(rows, hide_index=True)
+        if INCREASING[free]:
+            st.caption("With every other input unchanged, the scenario reaches each level at this value or above.")
+        else:
+            st.caption("With every other input unchanged, the scenario reaches each level at this population or below.")
+
+
+# Largest grid sent to the browser, per axis (the model grid can be finer)
+SURFACE_MAX_CELLS = 120
+
+
+@st.fragment
+def surface_section(model_inputs):
+    with st.expander("🗺️ Risk surface"):
+        kind = st.radio("Axes", ["Risk Ranger Score × estimated cases", "Pair of weights"], horizontal=True)
+        if kind == "Pair of weights":
+            col_x, col_y = st.columns(2)
+            with col_x:
+                x = st.selectbox("x axis", WEIGHT_AXES, index=0, format_func=AXIS_LABELS.get)
+            with col_y:
+                y = st.selectbox("y axis", [w for w in WEIGHT_AXES if w != x], format_func=AXIS_LABELS.get)
+        else:
+            x, y = "estimated_cases", "rr_score"
+        resolution = st.select_slider("Model grid resolution", options=[100, 250, 500, 1000], value=250)
+
+        inputs = dict(zip(INPUTS, model_inputs))
+        free = {x, y} | ({"base", "exponent"} if "estimated_cases" in (x, y) else set())
+        fixed_inputs = tuple((name, value) for name, value in inputs.items() if name not in free)
+        with timed("surface"):
+            xv, yv, z = cached_surface(fixed_inputs, x, y, resolution, SURFACE_MAX_CELLS)
+        st.plotly_chart(risk_surface(
+            xv, yv, z, AXIS_LABELS[x], AXIS_LABELS[y],
+            marker=(current_value(x, inputs), current_value(y, inputs)),
+            log_x=x == "estimated_cases",
+        ))
+        st.caption(f"{resolution}×{resolution} model grid, shown as {len(xv)}×{len(yv)} cells "
+                   "(kept densest where the score changes fastest).")
+
+
+# Regional breakdown (only with a region table in HOLIRISK_REGIONS, see regions.py)
+REGION_TOP = 20
+
+
+@st.fragment
+def regions_section(model_inputs):
+    table = region_table(default_regions_path())
+    with st.expander(f"📍 Regional breakdown ({len(table):,} regions)"):
+        allocations = ["population"] + (["share"] if table.case_share is not None else [])
+        allocation = st.radio("Allocate the estimated cases", allocations, horizontal=True,
+                              format_func={"population": "By population", "share": "By regional case share"}.get)
+        prefix = st.text_input("Region code prefix", placeholder="e.g. IT, ITC4").strip()
+        with timed("regions"):
+            results = cached_regions(model_inputs, allocation, prefix)
+        if results.empty:
+            st.info("No region code starts with that prefix.")
+            return
+        counts = level_counts(results)
+        st.dataframe(counts.assign(population=counts["population"].map("{:,.0f}".format)))
+        st.caption(f"Top {min(REGION_TOP, len(results))} regions by final score:")
+        st.dataframe(results.nlargest(REGION_TOP, "final_score").round(4), hide_index=True)
+        st.download_button("📥 Download per-region scores (CSV)", results.to_csv(index=False).encode("utf-8"),
+                           file_name="HoliRisk_regions.csv", mime="text/csv")
+
+
+sensitivity_section(model_inputs)
+inverse_section(model_inputs)
+surface_section(model_inputs)
+if default_regions_path():
+    regions_section(model_inputs)
+high_risk_configurations_section(scenario)
+
+
+    # ---------------- FEEDBACK + PDF REPORT ----------------
+# Builds run in the background on the process-wide pool (see report_jobs.py);
+# the page polls the job until the download is ready.
+REPORT_POLL_SECONDS = 0.5
+
+
+@st.fragment(run_every=REPORT_POLL_SECONDS)
+def report_progress(job_id):
+    job = report_jobs().get(job_id)
+    if job is None or not job.active:
+        # Finished (or expired): redraw the report section without polling
+        st.rerun()
+    ahead = report_jobs().position(job) if job.state == "queued" else 0
+    st.progress(job.progress, text=f"⏳ {job.message}" + (f" ({ahead} reports ahead)" if ahead else ""))
+
+
+@st.fragment
+def report_section(scenario, filtered_labels, filtered_values):
+    st.header("📝 Notes & PDF Report")
+
+        # Feedback Text Area
+    user_feedback = st.text_area("💬 Write here notes to add to your PDF report:", height=70)
+
+    ctx = {
+        **scenario,
+        "pie_labels": filtered_labels,
+        "pie_values": filtered_values,
+        "user_feedback": user_feedback,
+    }
+    # Only the report of the current inputs and notes is offered for download
+    report = st.session_state.get("report_job")
+    job = report_jobs().get(report[0]) if report and report[1] == request_key(ctx) else None
+
+        # Generate PDF Button
+    generate_report = st.button("📄 Generate Risk Report (PDF)", disabled=job is not None and job.active)
+
+    if generate_report:
+            # Solo se abbiamo dati per il grafico
+        if filtered_values:
+            from report import pie_renderer
+
+            fig = None
+            if pie_renderer() == "kaleido":
+                import plotly.io as pio
+
+                    # Forza il tema chiaro globale di Plotly
+                pio.templates.default = "plotly_white"
+
+                # Configura layout grafico (on a fresh copy of the memoized figure)
+                fig = pie_figure(tuple(filtered_labels), tuple(filtered_values))
+                fig.update_layout(
+                    title_text="📊 Contextual Risk Breakdown",
+                    width=800,
+                    height=800,
+                    font=dict(size=18),
+                    legend=dict(font=dict(size=16))
+                    )
+                fig.update_traces(hole=0)
+
+            try:
+                job = report_jobs().submit(ctx, figure=fig, timings=st.session_state.setdefault("stage_timings", {}))
+                st.session_state["report_job"] = (job.id, request_key(ctx))
+            except Busy:
+                st.warning("⏳ The server is busy building other reports. Please try again in a few seconds.")
+
+    if job is None:
+        return
+    if job.active:
+        report_progress(job.id)
+    elif job.state == "done":
         st.success("✅ PDF report generated successfully!")
         st.download_button(
                 label="📥 Download Risk Report (PDF)",
-                data=buffer,
+                data=job.result,
                 file_name="HoliRisk_Risk_Report.pdf",
                 mime="application/pdf"
             )
+    else:
+        st.error(f"❌ The PDF report could not be generated: {job.error}")
 
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-import traceback
-import uuid
-import datetime
 
-st.header("☁️ Anonymized Data Submission")
+report_section(scenario, filtered_labels, filtered_values)
 
-        # Intro message
-st.markdown("""
-        ℹ️ **Why are we collecting this data?** 
-        Your input helps us understand how the tool is being used and what to improve next.
 
-        📝 Please feel free to leave a comment or describe your professional background.
-        """)
+    # ---------------- DATA SUBMISSION ----------------
+@st.fragment
+def data_submission_section(scenario):
+    st.header("☁️ Anonymized Data Submission")
 
-        # New input fields
-job_role = st.text_input("💼 What is your job role? (e.g., Microbiologist, Quality Manager, Food Safety Officer, Student)")
-institution = st.text_input("🏠 What is your home institution? (e.g. Company, University, Governative Agency)")
-years_experience = st.number_input("📅 Years of experience in the field:", min_value=0, step=1)
+            # Intro message
+    st.markdown("""
+            ℹ️ **Why are we collecting this data?**
+            Your input helps us understand how the tool is being used and what to improve next.
 
-        # Feedback box con avviso
-st.markdown("⚠️ **The following field is intended for anonymous feedback only. Please do not include personal information such as your name, email, or any other personal information.**")
+            📝 Please feel free to leave a comment or describe your professional background.
+            """)
 
-user_feedback = st.text_area("💬 Share your suggestions or difficulties using this tool:", height=70, key="user_feedback_box")
+            # New input fields
+    job_role = st.text_input("💼 What is your job role? (e.g., Microbiologist, Quality Manager, Food Safety Officer, Student)")
+    institution = st.text_input("🏠 What is your home institution? (e.g. Company, University, Governative Agency)")
+    years_experience = st.number_input("📅 Years of experience in the field:", min_value=0, step=1)
 
-        # Avviso privacy
-st.markdown(
-            "**Data Privacy Notice**  \n"
-            "The input and data you provide will be stored anonymously and used only to improve this tool.  \n"
-            "We do not collect any personal or identifying information. By submitting your input, you agree to their usage in developing **HoliRisk**."
-        )
+            # Feedback box con avviso
+    st.markdown("⚠️ **The following field is intended for anonymous feedback only. Please do not include personal information such as your name, email, or any other personal information.**")
+
+    user_feedback = st.text_area("💬 Share your suggestions or difficulties using this tool:", height=70, key="user_feedback_box")
+
+            # Avviso privacy
+    st.markdown(
+                "**Data Privacy Notice**  \n"
+                "The input and data you provide will be stored anonymously and used only to improve this tool.  \n"
+                "We do not collect any personal or identifying information. By submitting your input, you agree to their usage in developing **HoliRisk**."
+            )
 
-        # Filtro per rilevare dati personali nel feedback
-suspicious_words = ["@", "email", "telefono", "number", "call", "card", "telephone","+", "tel", "mi chiamo", "sono di", "contattami", ".it", ".com", "scrivimi", "chiamami"]
-
-if any(w in user_feedback.lower() for w in suspicious_words):
-        st.warning("⚠️ Your feedback seems to contain personal information. Please remove names, emails, or contact details before submitting.")
-        st.stop()
-
-
-        # Prevent resubmission
-if "data_sent" not in st.session_state:
-        st.session_state["data_sent"] = False
-
-if st.button("📤 Save Anonymized Data to Google Sheets"):
-    try:
-                # 🔒 Allow only CUSTOM scenarios
-        if selected_preset != "Custom":
-                st.warning("⚠️ Only custom scenarios can be submitted. Please select 'Custom' to proceed.")
-                st.stop()
-
-                # Prevent duplicate sends
-        if st.session_state["data_sent"]:
-                st.warning("⚠️ Data has already been submitted in this session.")
-                st.stop()
-
-                # Default values for Custom
-        default_values = {
-                    'rr_score': 50,
-                    'base': 1.0,
-                    'exponent': 5,
-                    'total_population': 60000000,
-                    'economic_choice': list(economic_levels.keys())[0],
-                    'political_choice': list(political_levels.keys())[0],
-                    'trust_choice': list(trust_levels.keys())[0],
-                    'market_choice': list(market_levels.keys())[0],
-                    'health_weight_choice': list(health_weight_levels.keys())[0],
-                    'econ_weight_choice': list(econ_weight_levels.keys())[0],
-                    'pol_weight_choice': list(pol_weight_levels.keys())[0],
-                    'trust_weight_choice': list(trust_weight_levels.keys())[0],
-                    'market_weight_choice': list(market_weight_levels.keys())[0],
-                }
-
-        user_values = {
-                    'rr_score': rr_score,
-                    'base': base,
-                    'exponent': exponent,
-                    'total_population': total_population,
-                    'economic_choice': economic_choice,
-                    'political_choice': political_choice,
-                    'trust_choice': trust_choice,
-                    'market_choice': market_choice,
-                    'health_weight_choice': health_weight_choice,
-                    'econ_weight_choice': econ_weight_choice,
-                    'pol_weight_choice': pol_weight_choice,
-                    'trust_weight_choice': trust_weight_choice,
-                    'market_weight_choice': market_weight_choice,
-                }
-
-        if all(user_values[k] == default_values[k] for k in default_values) and not user_feedback.strip():
-                st.warning("⚠️ Data not saved: no values were changed and no feedback was provided.")
-                st.stop()
-
-                # ⏳ Show spinner while saving
-        with st.spinner("⏳ Saving your data... Please do not close the page."):
-                    # Google Sheets connection
-            scope = [
-                        "https://spreadsheets.google.com/feeds",
-                        "https://www.googleapis.com/auth/spreadsheets",
-                        "https://www.googleapis.com/auth/drive"
-                    ]
-            creds = ServiceAccountCredentials.from_json_keyfile_dict(st.secrets["google_service_account"], scope)
-            client = gspread.authorize(creds)
-            sheet = client.open("HoliRisk Data Logger").sheet1
-
-                    # Create row
-            session_id = str(uuid.uuid4())
-            row = [
-                        datetime.datetime.now().isoformat(),
-                        session_id,
-                        selected_preset,
-                        rr_score,
-                        base,
-                        exponent,
-                        total_population,
-                        economic_choice,
-                        political_choice,
-                        trust_choice,
-                        market_choice,
-                        health_weight_choice,
-                        econ_weight_choice,
-                        pol_weight_choice,
-                        trust_weight_choice,
-                        market_weight_choice,
-                        illness_factor,
-                        risk_level,
-                        final_score,
-                        job_role,
-                        institution,
-                        years_experience,
-                        user_feedback
-                    ]
-
-                    # Save to Google Sheets
-            sheet.append_row(row, value_input_option="USER_ENTERED")
-            st.session_state["data_sent"] = True
-            st.success("✅ Your custom scenario has been saved successfully. Thank you for your contribution!")
-
-    except Exception as e:
-        st.error("❌ An error occurred while saving the data.")
-        st.code(traceback.format_exc())
-
-
-    # Inizializza sempre pie_image per evitare NameError
-pie_image = None
+            # Filtro per rilevare dati personali (see privacy.py)
+    with timed("pii_check"):
+        flagged = default_detector().scan({
+            "job role": job_role, "institution": institution, "feedback": user_feedback,
+        })
+
+    if flagged:
+            details = "; ".join(f"{field}: {describe(found)}" for field, found in flagged.items())
+            st.warning(f"⚠️ Your answers seem to contain personal information ({details}). Please remove names, emails, or contact details before submitting.")
+            return
+
+
+            # Prevent resubmission
+    if "data_sent" not in st.session_state:
+            st.session_state["data_sent"] = False
+
+    if st.button("📤 Save Anonymized Data to Google Sheets"):
+        try:
+                    # 🔒 Allow only CUSTOM scenarios
+            if scenario["selected_preset"] != "Custom":
+                    st.warning("⚠️ Only custom scenarios can be submitted. Please select 'Custom' to proceed.")
+                    return
+
+                    # Prevent duplicate sends
+            if st.session_state["data_sent"]:
+                    st.warning("⚠️ Data has already been submitted in this session.")
+                    return
+
+                    # Default values for Custom
+            default_values = {
+                        'rr_score': 50,
+                        'base': 1.0,
+                        'exponent': 5,
+                        'total_population': 60000000,
+                        'economic_choice': list(economic_levels.keys())[0],
+                        'political_choice': list(political_levels.keys())[0],
+                        'trust_choice': list(trust_levels.keys())[0],
+                        'market_choice': list(market_levels.keys())[0],
+                        'health_weight_choice': list(health_weight_levels.keys())[0],
+                        'econ_weight_choice': list(econ_weight_levels.keys())[0],
+                        'pol_weight_choice': list(pol_weight_levels.keys())[0],
+                        'trust_weight_choice': list(trust_weight_levels.keys())[0],
+                        'market_weight_choice': list(market_weight_levels.keys())[0],
+                    }
+
+            if all(scenario[k] == default_values[k] for k in default_values) and not user_feedback.strip():
+                    st.warning("⚠️ Data not saved: no values were changed and no feedback was provided.")
+                    return
+
+                    # ⏳ Show spinner while saving
+            with st.spinner("⏳ Saving your data... Please do not close the page."):
+                        # Create row
+                if "session_id" not in st.session_state:
+                    st.session_state["session_id"] = str(uuid.uuid4())
+                session_id = st.session_state["session_id"]
+                row = submission_row(scenario, session_id, job_role, institution, years_experience, user_feedback)
+
+                        # Spool locally; the background flusher sends it to Google Sheets
+                with timed("sheets_submit"):
+                    submission_pipeline().submit(session_id, row)
+                EVENTS.inc(event="submission")
+                st.session_state["data_sent"] = True
+                st.success("✅ Your custom scenario has been saved successfully. Thank you for your contribution!")
+
+        except Exception as e:
+            st.error("❌ An error occurred while saving the data.")
+            st.code(traceback.format_exc())
+
+
+data_submission_section(scenario)
+
+
+    # ---------------- DEBUG PANEL ----------------
+def debug_panel():
+    timings = st.session_state.get("stage_timings", {})
+    stages = sorted(set(timings) | {key[0] for key in STAGE_SECONDS.snapshot()})
+    with st.expander("🛠️ Debug – stage timings", expanded=True):
+        rows = []
+        for name in stages:
+            p50 = STAGE_SECONDS.quantile(0.5, stage=name)
+            p99 = STAGE_SECONDS.quantile(0.99, stage=name)
+            rows.append({
+                "Stage": name,
+                "This rerun (ms)": round(timings[name] * 1000, 2) if name in timings else None,
+                "Process count": STAGE_SECONDS.snapshot().get((name,), {}).get("count", 0),
+                "Process p50 (ms)": round(p50 * 1000, 2) if p50 is not None else None,
+                "Process p99 (ms)": round(p99 * 1000, 2) if p99 is not None else None,
+            })
+        st.dataframe(rows)
+        st.caption(f"Session state: {deep_sizeof(dict(st.session_state)) / 1024:.1f} KiB · "
+                   f"process RSS: {rss_bytes() / 2 ** 20:.0f} MiB · "
+                   f"reruns in this process: {EVENTS.value(event='rerun')}")
+
+
+script_seconds = time.perf_counter() - script_start
+STAGE_SECONDS.observe(script_seconds, stage="script")
+st.session_state["stage_timings"]["script"] = script_seconds
+
+# Hidden unless the page is opened with ?debug=1 (or HOLIRISK_DEBUG=1)
+if st.query_params.get("debug") == "1" or os.environ.get("HOLIRISK_DEBUG") == "1":
+    debug_panel()
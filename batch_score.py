@@ -0,0 +1,100 @@
+"""Headless batch scoring.
+
+Streams a CSV or Parquet file of scenarios through scoring.score_frame() in
+fixed-size chunks, so memory stays flat however large the input grows.
+
+    python batch_score.py scenarios.csv scored.parquet --chunksize 200000
+
+Input columns are the names in scoring.INPUTS; the scored columns are appended
+to each input row. With ``--solve rr_score`` (or ``estimated_cases``,
+``total_population``) the risk level boundaries of that input are appended too
+(see inverse.py).
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from scoring import score_frame
+
+
+def _is_parquet(path):
+    return os.path.splitext(path)[1].lower() in (".parquet", ".pq")
+
+
+def iter_chunks(path, chunksize):
+    """Yield DataFrames of at most ``chunksize`` rows from a CSV/Parquet file."""
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+class ChunkWriter:
+    """Append scored chunks to a CSV or Parquet file as they are produced."""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = _is_parquet(path)
+        self._writer = None
+        self._header = True
+
+    def write(self, df):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode="w" if self._header else "a", header=self._header, index=False)
+            self._header = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def score_file(input_path, output_path, chunksize=100_000, solve=None):
+    """Score ``input_path`` into ``output_path``; returns the number of rows."""
+    writer = ChunkWriter(output_path)
+    rows = 0
+    try:
+        for chunk in iter_chunks(input_path, chunksize):
+            chunk = chunk.reset_index(drop=True)
+            parts = [chunk, score_frame(chunk)]
+            if solve:
+                from inverse import boundary_frame
+
+                parts.append(boundary_frame(chunk, solve))
+            writer.write(pd.concat(parts, axis=1))
+            rows += len(chunk)
+    finally:
+        writer.close()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file of HoliRisk scenarios.")
+    parser.add_argument("input", help="CSV or Parquet file with one scenario per row")
+    parser.add_argument("output", help="CSV or Parquet file to write (format from extension)")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="rows scored per chunk")
+    parser.add_argument("--solve", choices=["rr_score", "estimated_cases", "total_population"],
+                        help="also solve for the risk level boundaries of this input")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    rows = score_file(args.input, args.output, args.chunksize, args.solve)
+    elapsed = time.perf_counter() - start
+    print(f"Scored {rows} scenarios in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Cold-start budget for the Streamlit script.
+
+Runs ``app.py`` once in a fresh interpreter (through Streamlit's AppTest, with
+``-X importtime``) and checks the result against ``cold_start_budget.json``:
+
+- wall time of the first run (imports + script execution),
+- total import time of everything the first run pulled in,
+- none of the lazily loaded stacks (PDF, Sheets, image export) got imported.
+
+    python benchmarks/cold_start.py            # exit code 1 on a budget breach
+    python benchmarks/cold_start.py --top 15   # also list the costliest imports
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+BUDGET_PATH = os.path.join(HERE, "cold_start_budget.json")
+
+# Executed in the child interpreter: first run of the app, then report timings
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=120)
+at.run()
+elapsed = time.perf_counter() - start
+print(json.dumps({{"first_run": elapsed, "errors": [e.message for e in at.exception],
+                   "modules": sorted(sys.modules)}}))
+"""
+
+IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)")
+
+
+def parse_importtime(stderr):
+    """{top-level module: cumulative seconds} from ``-X importtime`` output."""
+    costs = {}
+    for line in stderr.splitlines():
+        m = IMPORTTIME.match(line)
+        if m and len(m.group(3)) == 1:
+            costs[m.group(4)] = int(m.group(2)) / 1e6
+    return costs
+
+
+def measure():
+    code = CHILD.format(app=os.path.join(ROOT, "app.py"))
+    env = dict(os.environ, PYTHONPATH=ROOT, HOLIRISK_SHEETS_SINK="fake")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, cwd=ROOT, env=env)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["imports"] = parse_importtime(proc.stderr)
+    return result
+
+
+def check(result, budget):
+    """List of budget violations (empty when within budget)."""
+    failures = []
+    if result["errors"]:
+        failures.append(f"app raised on first run: {result['errors']}")
+    if result["first_run"] > budget["max_first_run_seconds"]:
+        failures.append(f"first run took {result['first_run']:.2f}s "
+                        f"(budget {budget['max_first_run_seconds']:.2f}s)")
+    total_imports = sum(result["imports"].values())
+    if total_imports > budget["max_import_seconds"]:
+        failures.append(f"imports took {total_imports:.2f}s (budget {budget['max_import_seconds']:.2f}s)")
+    loaded = sorted(m for m in budget["lazy_modules"] if m in result["modules"])
+    if loaded:
+        failures.append(f"lazily loaded modules imported at startup: {', '.join(loaded)}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the app's cold-start import cost against a budget.")
+    parser.add_argument("--budget", default=BUDGET_PATH, help="budget JSON file")
+    parser.add_argument("--top", type=int, default=10, help="number of costliest imports to list")
+    args = parser.parse_args(argv)
+
+    with open(args.budget) as f:
+        budget = json.load(f)
+    result = measure()
+
+    print(f"First run: {result['first_run']:.2f}s")
+    print(f"Imports:   {sum(result['imports'].values()):.2f}s")
+    for name, seconds in sorted(result["imports"].items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {seconds:7.3f}s  {name}")
+
+    failures = check(result, budget)
+    for failure in failures:
+        print(f"BUDGET EXCEEDED: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Load generator for the HTTP scoring service.
+
+Keeps ``--concurrency`` keep-alive connections busy against ``/score`` (or
+``/score/batch`` with ``--batch-size``) and reports latency percentiles and
+throughput. Without ``--url`` it starts ``scoring_service.py`` locally first.
+
+    python benchmarks/load_service.py --workers 4 --concurrency 32 --duration 10
+    python benchmarks/load_service.py --url http://lims-gw:8600 --batch-size 5000
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+from scoring import LEVELS  # noqa: E402
+
+
+def random_scenarios(n, seed=0):
+    """``n`` request objects with random inputs and level labels."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n):
+        row = {
+            "rr_score": round(float(rng.uniform(0, 100)), 1),
+            "base": round(float(rng.uniform(1, 10)), 2),
+            "exponent": int(rng.integers(0, 7)),
+            "total_population": 60_000_000,
+        }
+        for name, levels in LEVELS.items():
+            row[name] = list(levels)[rng.integers(len(levels))]
+        rows.append(row)
+    return rows
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers):
+    """Start scoring_service.py on a free port; returns (process, url)."""
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "scoring_service.py"), "--port", str(port), "--workers", str(workers)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return proc, url
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("scoring service did not start within 30s")
+
+
+def run_load(url, bodies, path, content_type, concurrency, duration):
+    """Send requests for ``duration`` seconds; returns (latencies, errors, elapsed)."""
+    target = urlsplit(url)
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    stop = time.perf_counter() + duration
+
+    def client(worker):
+        conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=60)
+        local = []
+        i = worker
+        while time.perf_counter() < stop:
+            body = bodies[i % len(bodies)]
+            i += concurrency
+            start = time.perf_counter()
+            try:
+                conn.request("POST", path, body=body, headers={"Content-Type": content_type})
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    raise RuntimeError(f"HTTP {response.status}")
+            except Exception as e:
+                with lock:
+                    errors.append(repr(e))
+                conn.close()
+                conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=60)
+                continue
+            local.append(time.perf_counter() - start)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(w,)) for w in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return np.asarray(latencies), errors, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the HoliRisk scoring service.")
+    parser.add_argument("--url", help="running service (default: start one locally)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="workers of the local service")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent keep-alive connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load")
+    parser.add_argument("--batch-size", type=int, default=0, help="scenarios per /score/batch request (0: /score)")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.batch_size:
+        path, content_type = "/score/batch", "application/x-ndjson"
+        bodies = ["\n".join(json.dumps(r) for r in random_scenarios(args.batch_size, seed)).encode()
+                  for seed in range(8)]
+    else:
+        path, content_type = "/score", "application/json"
+        bodies = [json.dumps(r).encode() for r in random_scenarios(1000)]
+
+    proc = None
+    url = args.url
+    if url is None:
+        proc, url = start_server(args.workers)
+    try:
+        latencies, errors, elapsed = run_load(url, bodies, path, content_type, args.concurrency, args.duration)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    done = len(latencies)
+    result = {
+        "endpoint": path,
+        "concurrency": args.concurrency,
+        "batch_size": args.batch_size or 1,
+        "requests": done,
+        "errors": len(errors),
+        "requests_per_s": done / elapsed,
+        "scenarios_per_s": done * (args.batch_size or 1) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50) * 1000) if done else None,
+        "p99_ms": float(np.percentile(latencies, 99) * 1000) if done else None,
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"{path}: {done} requests in {elapsed:.1f}s, {len(errors)} errors")
+        print(f"  {result['requests_per_s']:,.0f} req/s ({result['scenarios_per_s']:,.0f} scenarios/s)")
+        if done:
+            print(f"  latency p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms")
+        for error in sorted(set(errors))[:5]:
+            print(f"  error: {error}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""Concurrent-session load test of the Streamlit app.
+
+Drives ``--sessions`` simulated users through the real ``app.py`` at once
+(one Streamlit AppTest per user, each on its own thread, all in this
+process, so they share the ``st.cache_resource`` objects, the report pool
+and the memory of one server process). Every user runs ``--actions``
+random steps:
+
+- ``preset``   pick a random preset from the sidebar,
+- ``slider``   move the Risk Ranger slider,
+- ``select``   change one of the contextual impact selects,
+- ``pdf``      generate the PDF report and poll until it can be downloaded,
+- ``submit``   fill in the data-submission form of a custom scenario and
+               save it (Sheets is stubbed with the in-memory FakeSheetsSink).
+
+Each level of ``--sessions`` (e.g. ``1,4,16``) is run in turn and reports
+rerun latency percentiles, PDF turnaround, peak resident memory of the
+process and the errors seen (exceptions in the script, or the
+"server is busy" answer of the report pool, counted apart).
+
+    python benchmarks/load_sessions.py --sessions 1,4,16 --actions 20
+    python benchmarks/load_sessions.py --sessions 8 --pie kaleido --json
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+APP = os.path.join(ROOT, "app.py")
+sys.path.insert(0, ROOT)
+
+from metrics import rss_bytes  # noqa: E402
+
+ACTIONS = {"preset": 4, "slider": 3, "select": 3, "pdf": 1, "submit": 1}
+IMPACT_SELECTS = ("💸 Economic Impact", "📢 Political/Media Sensitivity", "🛒 Consumer Trust Loss",
+                  "🔗 Market Disruption")
+PDF_BUTTON = "📄 Generate Risk Report (PDF)"
+SAVE_BUTTON = "📤 Save Anonymized Data to Google Sheets"
+BUSY = "The server is busy"
+POLL_SECONDS = 0.5
+
+
+def _share_server_state():
+    """Make AppTest safe to run from several threads at once.
+
+    A real server has one script bytecode cache and one runtime per process;
+    AppTest compiles app.py again on every run (and concurrent compiles of
+    the same source trip CPython 3.11's AST checks) and installs a mock
+    runtime for each run, removing it when that run ends, under the feet of
+    the sessions still running; it also switches the "app testing" config
+    option on and off around each run. Share one bytecode cache, leave the
+    option on, and let a run that finds no runtime use the last one
+    installed.
+    """
+    import contextlib
+
+    import streamlit.testing.v1.app_test as app_test
+    import streamlit.testing.v1.local_script_runner as local_script_runner
+    from streamlit import config
+    from streamlit.logger import set_log_level
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+
+    shared = ScriptCache()
+    app_test.ScriptCache = local_script_runner.ScriptCache = lambda: shared
+    config.get_config_options()  # parse the config files first, or they reset these later
+    config.set_option("global.appTest", True)
+    app_test.patch_config_options = lambda options: contextlib.nullcontext()
+
+    last = []
+
+    def instance(cls):
+        if cls._instance is not None:
+            last[:] = [cls._instance]
+        elif not last:
+            raise RuntimeError("Runtime hasn't been created!")
+        return cls._instance or last[0]
+
+    Runtime.instance = classmethod(instance)
+    # Without a server, every run logs "no runtime" / "missing ScriptRunContext" notices
+    config.set_option("logger.level", "error")
+    set_log_level("error")
+
+
+def _widget(elements, label):
+    return next(w for w in elements if w.label == label)
+
+
+class Session:
+    """One simulated user: an AppTest of app.py and the timings of its reruns."""
+
+    def __init__(self, seed, timeout, pdf_timeout=60.0):
+        from streamlit.testing.v1 import AppTest
+
+        self.rng = random.Random(seed)
+        self.at = AppTest.from_file(APP, default_timeout=timeout)
+        self.latencies = []
+        self.pdf_seconds = []
+        self.errors = []
+        self.busy = 0
+        self.pdf_timeout = pdf_timeout
+
+    def run(self, widget=None):
+        start = time.perf_counter()
+        (widget.run() if widget is not None else self.at.run())
+        self.latencies.append(time.perf_counter() - start)
+        for exception in self.at.exception:
+            self.errors.append(exception.message)
+
+    # ---------------- ACTIONS ----------------
+    def preset(self):
+        select = _widget(self.at.sidebar.selectbox, "Choose scenario")
+        self.run(select.select(self.rng.choice(select.options)))
+
+    def slider(self):
+        self.run(_widget(self.at.slider, "Risk Ranger Score (0–100)").set_value(self.rng.randint(0, 100)))
+
+    def select(self):
+        select = _widget(self.at.selectbox, self.rng.choice(IMPACT_SELECTS))
+        self.run(select.select(self.rng.choice(select.options)))
+
+    def pdf(self):
+        state = self.at.session_state
+        before = state["report_job"] if "report_job" in state else None
+        start = time.perf_counter()
+        self.run(_widget(self.at.button, PDF_BUTTON).click())
+        if not self.at.warning and (state["report_job"] if "report_job" in state else None) == before:
+            return  # nothing to chart (every contextual weight is zero): no report is built
+        while time.perf_counter() - start < self.pdf_timeout:
+            if self.at.get("download_button") or self.at.error or self.at.exception:
+                break
+            if any(BUSY in w.value for w in self.at.warning):
+                self.busy += 1
+                return
+            time.sleep(POLL_SECONDS)
+            self.run()
+        if self.at.get("download_button"):
+            self.pdf_seconds.append(time.perf_counter() - start)
+        else:
+            self.errors.append("; ".join(e.value for e in self.at.error) or f"PDF not ready after {self.pdf_timeout:.0f}s")
+
+    def submit(self):
+        self.run(_widget(self.at.sidebar.selectbox, "Choose scenario").select("Custom"))
+        self.run(_widget(self.at.slider, "Risk Ranger Score (0–100)").set_value(self.rng.randint(0, 100)))
+        job_role = next(w for w in self.at.text_input if w.label.startswith("💼"))
+        job_role.input(self.rng.choice(["Microbiologist", "Quality Manager", "Student"]))
+        self.at.text_area(key="user_feedback_box").input("Load test feedback")
+        self.run(_widget(self.at.button, SAVE_BUTTON).click())
+
+    def play(self, actions):
+        try:
+            self.run()
+            names, weights = zip(*ACTIONS.items())
+            for name in self.rng.choices(names, weights, k=actions):
+                getattr(self, name)()
+        except Exception:
+            self.errors.append(traceback.format_exc(limit=3))
+
+
+def _rss_sampler(stop, peak, interval=0.05):
+    while not stop.wait(interval):
+        peak[0] = max(peak[0], rss_bytes())
+
+
+def run_level(sessions, actions, seed=0, timeout=120, pdf_timeout=60.0):
+    """Play ``sessions`` concurrent users; returns the level's summary."""
+    users = [Session(seed * 1000 + i, timeout, pdf_timeout) for i in range(sessions)]
+    rss_before = rss_bytes()
+    peak = [rss_before]
+    stop = threading.Event()
+    sampler = threading.Thread(target=_rss_sampler, args=(stop, peak), daemon=True)
+    sampler.start()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=user.play, args=(actions,)) for user in users]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    sampler.join()
+
+    latencies = np.asarray([x for user in users for x in user.latencies])
+    pdfs = np.asarray([x for user in users for x in user.pdf_seconds])
+    errors = [e for user in users for e in user.errors]
+    summary = {
+        "sessions": sessions,
+        "reruns": len(latencies),
+        "reruns_per_s": len(latencies) / elapsed,
+        **{f"p{q}_ms": float(np.percentile(latencies, q) * 1000) if len(latencies) else None for q in (50, 90, 99)},
+        "max_ms": float(latencies.max() * 1000) if len(latencies) else None,
+        "pdfs": len(pdfs),
+        "pdf_p50_s": float(np.median(pdfs)) if len(pdfs) else None,
+        "busy": sum(user.busy for user in users),
+        "errors": len(errors),
+        "error_samples": sorted(set(e.strip().splitlines()[-1] for e in errors))[:5],
+        "rss_before_mb": rss_before / 2**20,
+        "rss_peak_mb": peak[0] / 2**20,
+        "elapsed_s": elapsed,
+    }
+    del users
+    gc.collect()
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the HoliRisk Streamlit app with concurrent sessions.")
+    parser.add_argument("--sessions", default="1,2,4,8", help="comma-separated numbers of concurrent sessions")
+    parser.add_argument("--actions", type=int, default=15, help="random actions per session")
+    parser.add_argument("--pie", choices=("vector", "kaleido"), default=None,
+                        help="PDF pie renderer (default: HOLIRISK_PIE_RENDERER or vector)")
+    parser.add_argument("--pdf-timeout", type=float, default=60.0, help="seconds a PDF may take before it counts as an error")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    # Stubbed Sheets sink and a throwaway spool, before the app is first run
+    scratch = tempfile.mkdtemp(prefix="holirisk-load-")
+    os.environ["HOLIRISK_SHEETS_SINK"] = "fake"
+    os.environ.setdefault("HOLIRISK_SPOOL_PATH", os.path.join(scratch, "spool.sqlite3"))
+    if args.pie:
+        os.environ["HOLIRISK_PIE_RENDERER"] = args.pie
+    _share_server_state()
+
+    results = []
+    for sessions in (int(n) for n in args.sessions.split(",")):
+        summary = run_level(sessions, args.actions, args.seed, pdf_timeout=args.pdf_timeout)
+        results.append(summary)
+        if not args.json:
+            print(f"{sessions:>4} sessions: {summary['reruns']} reruns in {summary['elapsed_s']:.1f}s, "
+                  f"p50 {summary['p50_ms']:.0f} ms, p90 {summary['p90_ms']:.0f} ms, p99 {summary['p99_ms']:.0f} ms, "
+                  f"max {summary['max_ms']:.0f} ms | {summary['pdfs']} PDFs"
+                  + (f" (p50 {summary['pdf_p50_s']:.1f} s)" if summary["pdfs"] else "")
+                  + f", {summary['busy']} busy | peak RSS {summary['rss_peak_mb']:.0f} MB | "
+                  f"{summary['errors']} errors", file=sys.stderr)
+            for error in summary["error_samples"]:
+                print(f"      error: {error}", file=sys.stderr)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    return 1 if any(r["errors"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
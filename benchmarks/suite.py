@@ -0,0 +1,359 @@
+"""Benchmark suite with golden-value and regression gates.
+
+Times each stage separately:
+
+- ``scalar/<preset>``   score_scenario() for every built-in preset,
+- ``batch/<n>``         score_batch() over 1e3, 1e5 and 1e7 random scenarios
+                        (1e7 in chunks of 1e6, as the batch tools do),
+- ``figure/pie``        construction of the contextual risk pie,
+- ``export/kaleido``    PNG export of that figure (uncached),
+- ``report/pdf``        the ReportLab build of one report,
+- ``sheets/row``        assembly and spooling payload of one Sheets row,
+- ``privacy/<kind>``    personal-information check of a 1 MB pasted text
+                        (prose with scattered contacts, and a long run of
+                        digits that every phone/card pattern starts on).
+
+Before timing, every preset's ``final_score`` and ``risk_level`` is checked
+against ``golden_presets.json``, and the personal-information check against
+the texts of PRIVACY_GOLDEN (dates, lot numbers and other digit runs
+must not be flagged, contacts must). Results are written as JSON; with
+``--baseline`` (an earlier results file) any benchmark whose median time grew
+by more than ``--threshold`` is flagged. The exit code is 1 on a golden
+mismatch or a flagged slowdown.
+
+    python benchmarks/suite.py
+    python benchmarks/suite.py --baseline benchmarks/results/baseline.json --threshold 0.25
+    python benchmarks/suite.py --skip "batch/1e7" --skip "export/*"
+    python benchmarks/suite.py --update-golden     # after an intended model change
+"""
+import argparse
+import datetime
+import fnmatch
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+
+from presets import builtin_presets, preset_inputs  # noqa: E402
+from scoring import DOMAINS, LEVELS, score_batch, score_scenario  # noqa: E402
+
+GOLDEN_PATH = os.path.join(HERE, "golden_presets.json")
+RESULTS_DIR = os.path.join(HERE, "results")
+
+BATCH_SIZES = (1_000, 100_000, 10_000_000)
+BATCH_CHUNK = 1_000_000
+
+# Relative tolerance of the golden final scores
+GOLDEN_RTOL = 1e-9
+
+
+# ---------------- GOLDEN VALUES ----------------
+def preset_results():
+    """{preset: {"final_score", "risk_level"}} from the current model."""
+    results = {}
+    for name, preset in builtin_presets().items():
+        out = score_scenario(**preset_inputs(preset))
+        results[name] = {"final_score": out["final_score"], "risk_level": out["risk_level"]}
+    return results
+
+
+def check_golden(path=GOLDEN_PATH):
+    """List of mismatches between the model and the golden preset values."""
+    with open(path, encoding="utf-8") as f:
+        golden = json.load(f)
+    current = preset_results()
+    failures = []
+    for name in sorted(set(golden) | set(current)):
+        expected, got = golden.get(name), current.get(name)
+        if expected is None or got is None:
+            failures.append(f"{name}: {'not in golden file' if expected is None else 'preset missing'}")
+            continue
+        if not math.isclose(got["final_score"], expected["final_score"], rel_tol=GOLDEN_RTOL, abs_tol=1e-12):
+            failures.append(f"{name}: final_score {got['final_score']!r} != {expected['final_score']!r}")
+        if got["risk_level"] != expected["risk_level"]:
+            failures.append(f"{name}: risk_level {got['risk_level']!r} != {expected['risk_level']!r}")
+    return failures
+
+
+# Kinds of identifier privacy.find() must report in each text (cues ignored)
+PRIVACY_GOLDEN = {
+    "outbreak 05/2023": [],
+    "dal 01/01/2020 al 31/12/2020": [],
+    "dal 01.01.2020 al 31.12.2020": [],
+    "batch 02-2024-0001": [],
+    "lot 03-2019": [],
+    "ECDC 0617/2018": [],
+    "EFSA Journal 2023;21(12):e08442": [],
+    "lot 0123456": [],
+    "batch 012345": [],
+    "samples 250 500 1000": [],
+    "P.IVA 01234567890": [],
+    "Outbreak ID 2024-0315 cases 312 455 7890": [],
+    "tel 06 1234 5678": ["phone"],
+    "055-123456": ["phone"],
+    "+39 333 123 4567": ["phone"],
+    "333-123-4567": ["phone"],
+    "(312) 555-0199": ["phone"],
+    "telefono 0612345678": ["phone"],
+    "call me at 312 455 7890": ["phone"],
+    "mario.rossi@example.it": ["email"],
+    "4111 1111 1111 1111": ["card"],
+}
+
+
+def check_privacy(cases=PRIVACY_GOLDEN):
+    """List of texts where the personal-information check finds other kinds than expected."""
+    from privacy import default_detector
+
+    failures = []
+    for text, expected in cases.items():
+        got = [f.kind for f in default_detector().find(text) if f.kind != "cue"]
+        if got != expected:
+            failures.append(f"privacy {text!r}: {got} != {expected}")
+    return failures
+
+
+# ---------------- BENCHMARKS ----------------
+def random_inputs(n, seed=0):
+    rng = np.random.default_rng(seed)
+    inputs = {
+        "rr_score": rng.uniform(0, 100, n),
+        "base": rng.uniform(1, 10, n),
+        "exponent": rng.integers(0, 8, n).astype(float),
+        "total_population": np.full(n, 60_000_000.0),
+    }
+    for name, levels in LEVELS.items():
+        inputs[name] = rng.choice(np.asarray(list(levels.values()), dtype=float), n)
+    return inputs
+
+
+def _batch_case(n):
+    inputs = random_inputs(min(n, BATCH_CHUNK))
+
+    def run():
+        for start in range(0, n, BATCH_CHUNK):
+            score_batch(**inputs)
+
+    return run, n
+
+
+def _sample_context():
+    from report import context_slices
+
+    name = "RTE Chicken – Simulation 1"
+    preset = builtin_presets()[name]
+    out = score_scenario(**preset_inputs(preset))
+    norms = [out[f"norm_{d}"] for d in DOMAINS]
+    labels, values = context_slices(norms)
+    return {
+        "selected_preset": name,
+        "rr_score": preset["rr_score"],
+        "base": preset["illness_base"],
+        "exponent": preset["illness_exponent"],
+        "total_population": preset["population"],
+        "economic_choice": preset["economic"],
+        "political_choice": preset["political"],
+        "trust_choice": preset["trust"],
+        "market_choice": preset["market"],
+        "health_weight_choice": preset["weights"]["health"],
+        "econ_weight_choice": preset["weights"]["economic"],
+        "pol_weight_choice": preset["weights"]["political"],
+        "trust_weight_choice": preset["weights"]["trust"],
+        "market_weight_choice": preset["weights"]["market"],
+        "hospitalization_choice": next(iter(LEVELS["hospitalization_factor"])),
+        "illness_factor": out["illness_factor"],
+        "final_score": out["final_score"],
+        "risk_level": out["risk_level"],
+        **{f"norm_{d}": v for d, v in zip(DOMAINS, norms)},
+        "pie_labels": labels,
+        "pie_values": values,
+        "user_feedback": "Benchmark notes\nsecond line",
+    }
+
+
+def _figure_case():
+    from charts import context_pie
+
+    ctx = _sample_context()
+    return lambda: context_pie(ctx["pie_labels"], ctx["pie_values"]), 1
+
+
+def _kaleido_case():
+    from charts import context_pie
+
+    ctx = _sample_context()
+    fig = context_pie(ctx["pie_labels"], ctx["pie_values"])
+    return lambda: fig.to_image(format="png", width=800, height=800, engine="kaleido"), 1
+
+
+def _pdf_case():
+    from report import build_report, warm_up
+
+    warm_up()
+    ctx = _sample_context()
+    return lambda: build_report(ctx), 1
+
+
+def _sheets_row_case():
+    from submissions import submission_row
+
+    ctx = _sample_context()
+
+    def run():
+        row = submission_row(ctx, "00000000-0000-0000-0000-000000000000", "Microbiologist",
+                             "University", 5, ctx["user_feedback"])
+        json.dumps(row, default=str)
+
+    return run, 1
+
+
+PRIVACY_TEXT_CHARS = 1_000_000
+
+
+def _privacy_case(kind):
+    from privacy import default_detector
+
+    if kind == "prose":
+        paragraph = ("The tool works well for our RTE salad scenarios, but the Monte Carlo panel is slow "
+                     "with 1e7 samples (population 60.000.000, score 37.5, outbreak 05/2023, lot 02-2024-0001). ")
+        contact = "Scrivimi a mario.rossi@example.it o chiamami al +39 333 123 4567. "
+        text = (paragraph * 9 + contact) * (PRIVACY_TEXT_CHARS // (len(paragraph) * 9 + len(contact)))
+    else:
+        text = "1234 5678 " * (PRIVACY_TEXT_CHARS // 10)
+    detector = default_detector()
+    return lambda: detector.find(text), len(text)
+
+
+def cases():
+    """{name: factory returning (callable, items per call)}."""
+    out = {}
+    for name, preset in builtin_presets().items():
+        inputs = preset_inputs(preset)
+        out[f"scalar/{name}"] = lambda inputs=inputs: ((lambda: score_scenario(**inputs)), 1)
+    for n in BATCH_SIZES:
+        out[f"batch/{n:.0e}".replace("+0", "")] = lambda n=n: _batch_case(n)
+    out["figure/pie"] = _figure_case
+    out["export/kaleido"] = _kaleido_case
+    out["report/pdf"] = _pdf_case
+    out["sheets/row"] = _sheets_row_case
+    for kind in ("prose", "digits"):
+        out[f"privacy/{kind}"] = lambda kind=kind: _privacy_case(kind)
+    return out
+
+
+def measure(fn, min_time=0.5, min_repeats=3, max_repeats=10_000):
+    """Call ``fn`` until ``min_time`` has passed (at least ``min_repeats`` times)."""
+    fn()  # warm-up
+    times = []
+    deadline = time.perf_counter() + min_time
+    while len(times) < max_repeats and (len(times) < min_repeats or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run_suite(skip=(), min_time=0.5):
+    results = {}
+    for name, factory in cases().items():
+        if any(fnmatch.fnmatch(name, pattern) for pattern in skip):
+            continue
+        try:
+            fn, items = factory()
+            times = measure(fn, min_time=min_time)
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+            print(f"  {name:<40} ERROR {e}", file=sys.stderr)
+            continue
+        median = statistics.median(times)
+        results[name] = {
+            "median_s": median,
+            "min_s": min(times),
+            "repeats": len(times),
+            "items": items,
+            "items_per_s": items / median if median > 0 else None,
+        }
+        print(f"  {name:<40} {median * 1e3:12.4f} ms  ({len(times)} runs)", file=sys.stderr)
+    return results
+
+
+# ---------------- REGRESSIONS ----------------
+def compare(results, baseline, threshold):
+    """Benchmarks whose median time grew by more than ``threshold`` (a fraction)."""
+    flagged = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or "median_s" not in previous or "median_s" not in current:
+            continue
+        ratio = current["median_s"] / previous["median_s"]
+        if ratio > 1 + threshold:
+            flagged.append({"name": name, "baseline_s": previous["median_s"],
+                            "median_s": current["median_s"], "ratio": ratio})
+    return flagged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the HoliRisk benchmark suite.")
+    parser.add_argument("--output", help="results file (default: results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, as a fraction")
+    parser.add_argument("--skip", action="append", default=[], help="glob of benchmark names to skip")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds spent on each benchmark")
+    parser.add_argument("--update-golden", action="store_true", help="rewrite golden_presets.json and exit")
+    args = parser.parse_args(argv)
+
+    if args.update_golden:
+        with open(GOLDEN_PATH, "w", encoding="utf-8") as f:
+            json.dump(preset_results(), f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"Wrote {GOLDEN_PATH}", file=sys.stderr)
+        return 0
+
+    golden_failures = check_golden() + check_privacy()
+    for failure in golden_failures:
+        print(f"GOLDEN MISMATCH {failure}", file=sys.stderr)
+
+    print("Benchmarks:", file=sys.stderr)
+    results = run_suite(args.skip, args.min_time)
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.platform(),
+        "cpus": os.cpu_count(),
+        "golden_failures": golden_failures,
+        "benchmarks": results,
+    }
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["benchmarks"]
+        report["baseline"] = os.path.abspath(args.baseline)
+        report["threshold"] = args.threshold
+        report["regressions"] = compare(results, baseline, args.threshold)
+        for r in report["regressions"]:
+            print(f"SLOWER {r['name']}: {r['baseline_s'] * 1e3:.4f} ms -> {r['median_s'] * 1e3:.4f} ms "
+                  f"(x{r['ratio']:.2f})", file=sys.stderr)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, datetime.datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Results written to {output}", file=sys.stderr)
+
+    return 1 if golden_failures or report.get("regressions") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
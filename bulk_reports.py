@@ -0,0 +1,135 @@
+"""Bulk PDF report generation.
+
+Builds one risk assessment report per scenario of a CSV/Parquet table (same
+columns as ``batch_score.py``, plus optional ``scenario`` and ``notes``) on a
+process pool and streams the PDFs into a ZIP archive as they finish:
+
+    python bulk_reports.py scenarios.csv reports.zip --workers 8
+
+At most ``--max-in-flight`` reports are pending at any time, so the batch
+never sits in memory at once.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from batch_score import iter_chunks
+from report import build_report, context_slices, warm_up
+from scoring import DOMAINS, INPUTS, LEVELS, RISK_LEVELS, score_batch, to_numeric
+
+# Report field holding the selectbox label of each level input
+CHOICE_FIELDS = {
+    "economic": "economic_choice",
+    "political": "political_choice",
+    "trust": "trust_choice",
+    "market": "market_choice",
+    "w_health": "health_weight_choice",
+    "w_econ": "econ_weight_choice",
+    "w_pol": "pol_weight_choice",
+    "w_trust": "trust_weight_choice",
+    "w_market": "market_weight_choice",
+}
+
+
+def _label(name, value):
+    """Selectbox label for a level value (labels pass through)."""
+    if isinstance(value, str):
+        return value
+    for label, level in LEVELS[name].items():
+        if level == value:
+            return label
+    return str(value)
+
+
+def report_contexts(df, start=0):
+    """Yield (file name, build_report() context) for every row of ``df``."""
+    args = {c: to_numeric(df[c], c) for c in INPUTS if c in df.columns}
+    out = score_batch(**args)
+    names = df["scenario"].astype(str).tolist() if "scenario" in df.columns else [None] * len(df)
+    notes = df["notes"].fillna("").astype(str).tolist() if "notes" in df.columns else [""] * len(df)
+    raw = {c: df[c].tolist() for c in CHOICE_FIELDS}
+
+    for i in range(len(df)):
+        number = start + i + 1
+        name = names[i] or f"Scenario {number}"
+        norms = [float(out[f"norm_{d}"][i]) for d in DOMAINS]
+        labels, values = context_slices(norms)
+        ctx = {
+            "selected_preset": name,
+            "rr_score": df["rr_score"].iat[i],
+            "base": df["base"].iat[i],
+            "exponent": df["exponent"].iat[i],
+            "total_population": df["total_population"].iat[i],
+            **{field: _label(c, raw[c][i]) for c, field in CHOICE_FIELDS.items()},
+            "final_score": float(out["final_score"][i]),
+            "risk_level": RISK_LEVELS[int(out["risk_level"][i])],
+            **{f"norm_{d}": v for d, v in zip(DOMAINS, norms)},
+            "pie_labels": labels,
+            "pie_values": values,
+            "user_feedback": notes[i],
+        }
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_")[:60] or "scenario"
+        yield f"{number:06d}_{slug}.pdf", ctx
+
+
+def _build(item):
+    file_name, ctx = item
+    return file_name, build_report(ctx)
+
+
+def bulk_reports(input_path, zip_path, workers=None, chunksize=1000, max_in_flight=None):
+    """Write one PDF per scenario of ``input_path`` into ``zip_path``.
+
+    Returns ``(reports, seconds)``.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 4
+    start = time.perf_counter()
+    written = 0
+
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zf, \
+            ProcessPoolExecutor(max_workers=workers, initializer=warm_up) as pool:
+        pending = set()
+
+        def drain(futures):
+            nonlocal written
+            for future in futures:
+                file_name, pdf = future.result()
+                zf.writestr(file_name, pdf)
+                written += 1
+
+        offset = 0
+        for chunk in iter_chunks(input_path, chunksize):
+            for item in report_contexts(chunk.reset_index(drop=True), start=offset):
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    drain(done)
+                pending.add(pool.submit(_build, item))
+            offset += len(chunk)
+        drain(pending)
+
+    return written, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build one HoliRisk PDF report per scenario into a ZIP archive.")
+    parser.add_argument("input", help="CSV or Parquet file with one scenario per row")
+    parser.add_argument("output", help="ZIP archive to write")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=1000, help="scenarios read and scored per chunk")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="reports pending at once (default: 4 × workers)")
+    args = parser.parse_args(argv)
+
+    reports, elapsed = bulk_reports(args.input, args.output, args.workers, args.chunksize, args.max_in_flight)
+    print(f"Wrote {reports} reports to {args.output} in {elapsed:.2f}s "
+          f"({reports / max(elapsed, 1e-9):,.1f} reports/sec)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""Fit the model constants to labelled historical incidents.
+
+The constants in scoring.py (``L``, ``x0``, ``k``, ``alpha``, ``beta``) and
+the hospitalization multipliers are fitted to a table of past incidents
+(CSV or Parquet): the scoring.INPUTS columns (labels or numbers, with the
+hospitalization level as a label in ``hospitalization``), plus
+
+- ``observed_level``: the risk level experts assigned (a RISK_LEVELS label,
+  its first word such as ``High``, or its index 0-3), and/or
+- ``observed_score``: an expert score on the final score scale.
+
+The loss is one vectorized scoring.score_batch() call over the whole table:
+the squared distance of each final score from its observed score, or from
+the observed level's band (narrowed by ``--margin`` points), plus a small
+ridge pull towards the built-in constants. It is minimised with bounded
+L-BFGS-B from ``--starts`` points (the built-in constants and a Latin
+hypercube over the bounds), spread over worker processes. Hospitalization
+multipliers are fitted as non-negative steps above the first level (fixed
+at 1), so they stay ordered.
+
+``--folds`` k-fold cross-validation reports the held-out loss and level
+accuracy before the final fit on every incident. The result is written as a
+versioned parameter set; point ``HOLIRISK_PARAMS`` at it to use it:
+
+    python calibrate.py data/fixtures/incidents.csv --folds 5 --starts 16
+    HOLIRISK_PARAMS=data/params/20261018-3f2a9c1b.json streamlit run app.py
+
+``data/fixtures/incidents.csv`` is a synthetic example of the format.
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import scoring
+from batch_score import iter_chunks
+from scoring import INPUTS, PARAM_NAMES, RISK_LEVELS, RISK_THRESHOLDS, hospitalization_options, to_numeric
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PARAMS_DIR = os.path.join(HERE, "data", "params")
+HOSPITALIZATION_LABELS = tuple(hospitalization_options)
+
+# Search box of each fitted value: the constants, then the multiplier steps
+BOUNDS = {
+    "L": (0.1, 1.0),
+    "x0": (0.001, 5.0),
+    "k": (0.5, 50.0),
+    "alpha": (0.5, 3.0),
+    "beta": (0.5, 3.0),
+    **{f"hospitalization_step_{i}": (0.0, 1.5) for i in range(1, len(HOSPITALIZATION_LABELS))},
+}
+FIT_NAMES = tuple(BOUNDS)
+
+
+# ---------------- DATA ----------------
+def _level_index(value):
+    if isinstance(value, (int, np.integer)) or (isinstance(value, float) and value.is_integer()):
+        if 0 <= int(value) < len(RISK_LEVELS):
+            return int(value)
+    text = str(value).strip().lower()
+    for i, label in enumerate(RISK_LEVELS):
+        name = label.split(" ", 1)[1].lower()  # drop the emoji
+        if text in (label.lower(), name, name.split()[0]):
+            return i
+    raise ValueError(f"Unknown risk level {value!r}")
+
+
+def _hospitalization_index(column):
+    labels = {label.strip(): i for i, label in enumerate(HOSPITALIZATION_LABELS)}
+    values = {v: i for i, v in enumerate(hospitalization_options.values())}
+    index = []
+    for value in column:
+        if isinstance(value, str) and value.strip() in labels:
+            index.append(labels[value.strip()])
+        elif not isinstance(value, str) and float(value) in values:
+            index.append(values[float(value)])
+        else:
+            raise ValueError(f"Unknown hospitalization level {value!r}")
+    return np.asarray(index)
+
+
+def load_incidents(df):
+    """Arrays the loss works on: numeric inputs, hospitalization level index,
+    observed scores (NaN where missing) and observed levels (-1 where missing)."""
+    missing = [c for c in INPUTS if c not in df.columns and c != "hospitalization_factor"]
+    if missing:
+        raise ValueError(f"Missing input column(s): {', '.join(missing)}")
+    if "observed_level" not in df.columns and "observed_score" not in df.columns:
+        raise ValueError("Need an observed_level and/or observed_score column")
+    inputs = {c: to_numeric(df[c], c) for c in INPUTS if c != "hospitalization_factor"}
+    if "hospitalization" in df.columns:
+        hospitalization = _hospitalization_index(df["hospitalization"])
+    elif "hospitalization_factor" in df.columns:
+        hospitalization = _hospitalization_index(df["hospitalization_factor"])
+    else:
+        hospitalization = np.zeros(len(df), dtype=int)
+    score = pd.to_numeric(df.get("observed_score", pd.Series(np.nan, index=df.index)), errors="coerce").to_numpy(float)
+    level = np.array([-1 if pd.isna(v) else _level_index(v) for v in df.get("observed_level", [None] * len(df))])
+    if np.all(np.isnan(score) & (level < 0)):
+        raise ValueError("No incident has an observed level or score")
+    return {"inputs": inputs, "hospitalization": hospitalization, "score": score, "level": level}
+
+
+def subset(data, rows):
+    return {
+        "inputs": {c: v[rows] for c, v in data["inputs"].items()},
+        "hospitalization": data["hospitalization"][rows],
+        "score": data["score"][rows],
+        "level": data["level"][rows],
+    }
+
+
+# ---------------- LOSS ----------------
+def unpack(theta):
+    """(model constants, hospitalization multipliers) of a fitted vector."""
+    theta = np.asarray(theta, dtype=float)
+    params = dict(zip(PARAM_NAMES, theta[:len(PARAM_NAMES)]))
+    multipliers = np.concatenate([[1.0], 1.0 + np.cumsum(theta[len(PARAM_NAMES):])])
+    return params, multipliers
+
+
+def pack(params, multipliers):
+    """Inverse of unpack() (the first multiplier is taken as 1)."""
+    steps = np.diff(np.asarray(multipliers, dtype=float))
+    return np.array([params[name] for name in PARAM_NAMES] + list(np.maximum(steps, 0.0)))
+
+
+def builtin_theta():
+    return pack(scoring.model_params(), list(hospitalization_options.values()))
+
+
+def final_scores(theta, data):
+    params, multipliers = unpack(theta)
+    return scoring.score_batch(**data["inputs"], hospitalization_factor=multipliers[data["hospitalization"]],
+                               params=params)["final_score"]
+
+
+def residuals(scores, data, margin=1.0):
+    """Distance (score points) of each final score from its observation."""
+    edges = np.concatenate([[-np.inf], RISK_THRESHOLDS, [np.inf]])
+    level = np.maximum(data["level"], 0)
+    lo, hi = edges[level] + margin, edges[level + 1] - margin
+    band = np.maximum(lo - scores, 0) + np.maximum(scores - hi, 0)
+    band = np.where(data["level"] >= 0, band, 0.0)
+    return np.where(np.isnan(data["score"]), band, scores - np.nan_to_num(data["score"]))
+
+
+def loss(theta, data, margin=1.0, ridge=1e-3, prior=None):
+    """Mean squared residual (in units of 100 score points) plus the ridge term."""
+    r = residuals(final_scores(theta, data), data, margin) / 100
+    value = float(np.mean(r * r))
+    if ridge:
+        widths = np.array([hi - lo for lo, hi in BOUNDS.values()])
+        prior = builtin_theta() if prior is None else prior
+        value += ridge * float(np.sum(((np.asarray(theta) - prior) / widths) ** 2))
+    return value
+
+
+def evaluate(theta, data, margin=1.0):
+    """Held-out metrics: loss without the ridge term, level accuracy, score MAE."""
+    scores = final_scores(theta, data)
+    observed = data["level"] >= 0
+    has_score = ~np.isnan(data["score"])
+    return {
+        "loss": loss(theta, data, margin, ridge=0.0),
+        "level_accuracy": float(np.mean(scoring.risk_level_index(scores)[observed] == data["level"][observed]))
+        if observed.any() else None,
+        "score_mae": float(np.mean(np.abs(scores[has_score] - data["score"][has_score]))) if has_score.any() else None,
+    }
+
+
+# ---------------- OPTIMISATION ----------------
+def starting_points(n, seed=0):
+    """The built-in constants plus ``n - 1`` Latin hypercube points over BOUNDS."""
+    rng = np.random.default_rng(seed)
+    lo, hi = np.array(list(BOUNDS.values())).T
+    points = [np.clip(builtin_theta(), lo, hi)]
+    if n > 1:
+        m = n - 1
+        strata = (rng.permuted(np.tile(np.arange(m), (len(lo), 1)), axis=1).T + rng.random((m, len(lo)))) / m
+        points += list(lo + strata * (hi - lo))
+    return points
+
+
+_DATA = None
+
+
+def _init_worker(data):
+    global _DATA
+    _DATA = data
+
+
+def _fit_one(task):
+    from scipy.optimize import minimize
+
+    fold, rows, start, margin, ridge, max_iter = task
+    data = subset(_DATA, rows)
+    result = minimize(loss, start, args=(data, margin, ridge), method="L-BFGS-B",
+                      bounds=list(BOUNDS.values()), options={"maxiter": max_iter})
+    return fold, result.x, float(result.fun), bool(result.success)
+
+
+def fit(data, folds, starts, workers=None, margin=1.0, ridge=1e-3, max_iter=500, seed=0):
+    """Best fitted vector per fold: ``folds`` is a list of training row indices."""
+    tasks = [(f, rows, start, margin, ridge, max_iter)
+             for f, rows in enumerate(folds) for start in starting_points(starts, seed)]
+    best = {}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                             initializer=_init_worker, initargs=(data,)) as pool:
+        for fold, theta, value, _ in pool.map(_fit_one, tasks):
+            if fold not in best or value < best[fold][1]:
+                best[fold] = (theta, value)
+    return [best[f] for f in range(len(folds))]
+
+
+def kfold(n, k, seed=0):
+    """(train rows, test rows) of each fold."""
+    order = np.random.default_rng(seed).permutation(n)
+    parts = np.array_split(order, k)
+    return [(np.sort(np.concatenate(parts[:i] + parts[i + 1:])), np.sort(parts[i])) for i in range(k)]
+
+
+def calibrate(df, folds=5, starts=16, workers=None, margin=1.0, ridge=1e-3, seed=0):
+    """Cross-validate, fit on every incident and return the parameter set."""
+    data = load_incidents(df)
+    n = len(df)
+    splits = kfold(n, folds, seed) if folds > 1 else []
+    fits = fit(data, [train for train, _ in splits] + [np.arange(n)], starts, workers, margin, ridge, seed=seed)
+
+    per_fold = [evaluate(theta, subset(data, test), margin) for (theta, _), (_, test) in zip(fits, splits)]
+    theta, value = fits[-1]
+    params, multipliers = unpack(theta)
+
+    def summary(key):
+        values = [f[key] for f in per_fold if f[key] is not None]
+        return (float(np.mean(values)), float(np.std(values))) if values else (None, None)
+
+    return {
+        "model": {name: float(v) for name, v in params.items()},
+        "hospitalization": dict(zip(HOSPITALIZATION_LABELS, (float(m) for m in multipliers))),
+        "calibration": {
+            "incidents": n,
+            "loss": value,
+            "train": evaluate(theta, data, margin),
+            "builtin": evaluate(builtin_theta(), data, margin),
+            "cv": {
+                "folds": len(splits),
+                "loss_mean": summary("loss")[0],
+                "loss_std": summary("loss")[1],
+                "level_accuracy_mean": summary("level_accuracy")[0],
+                "level_accuracy_std": summary("level_accuracy")[1],
+                "score_mae_mean": summary("score_mae")[0],
+                "score_mae_std": summary("score_mae")[1],
+                "per_fold": per_fold,
+            },
+            "starts": starts,
+            "margin": margin,
+            "ridge": ridge,
+            "seed": seed,
+            "bounds": {name: list(b) for name, b in BOUNDS.items()},
+        },
+    }
+
+
+def versioned(params, data_path):
+    """Stamp ``params`` with a version (date + content hash) and provenance."""
+    with open(data_path, "rb") as f:
+        data_hash = hashlib.sha256(f.read()).hexdigest()
+    content = json.dumps([params["model"], params["hospitalization"]], sort_keys=True)
+    digest = hashlib.sha256((content + data_hash).encode("utf-8")).hexdigest()[:8]
+    now = datetime.datetime.now()
+    params["calibration"]["data"] = os.path.basename(data_path)
+    params["calibration"]["data_sha256"] = data_hash
+    return {"version": f"{now:%Y%m%d}-{digest}", "created": now.isoformat(timespec="seconds"), **params}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit the HoliRisk model constants to labelled historical incidents.")
+    parser.add_argument("input", help="CSV or Parquet file of incidents (see module docstring)")
+    parser.add_argument("--out", help="parameter set to write (default data/params/<version>.json)")
+    parser.add_argument("--folds", type=int, default=5, help="cross-validation folds (1 to skip)")
+    parser.add_argument("--starts", type=int, default=16, help="optimiser starting points per fit")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--margin", type=float, default=1.0, help="score points kept inside an observed level's band")
+    parser.add_argument("--ridge", type=float, default=1e-3, help="pull towards the built-in constants")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    df = pd.concat(iter_chunks(args.input, 100_000), ignore_index=True)
+    params = versioned(calibrate(df, args.folds, args.starts, args.workers, args.margin, args.ridge, args.seed),
+                       args.input)
+    out = args.out or os.path.join(PARAMS_DIR, f"{params['version']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(params, f, ensure_ascii=False, indent=1)
+
+    report = params["calibration"]
+    print(json.dumps({"model": params["model"], "hospitalization": list(params["hospitalization"].values())}),
+          file=sys.stderr)
+    # Tables with only observed scores (or only levels) have no level accuracy (or score MAE)
+    metric = "level_accuracy" if report["train"]["level_accuracy"] is not None else "score_mae"
+    label = {"level_accuracy": "Level accuracy", "score_mae": "Score MAE"}[metric]
+    print(f"{label} on all incidents: {report['train'][metric]:.3f} "
+          f"(built-in constants {report['builtin'][metric]:.3f})", file=sys.stderr)
+    cv = report["cv"]
+    if cv["folds"]:
+        print(f"{cv['folds']}-fold CV: loss {cv['loss_mean']:.5f} ± {cv['loss_std']:.5f}, "
+              f"{label[0].lower() + label[1:]} {cv[metric + '_mean']:.3f} ± {cv[metric + '_std']:.3f}", file=sys.stderr)
+    print(f"Wrote {out} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Plotly figures shown on the Streamlit page."""
+import numpy as np
+import plotly.graph_objects as go
+
+
+def context_pie(labels, values):
+    """Contextual risk breakdown pie (label + percent on each slice)."""
+    fig = go.Figure(data=[go.Pie(
+        labels=list(labels),
+        values=list(values),
+        textinfo='label+percent',
+        insidetextorientation='radial'
+        )])
+    fig.update_layout(
+        template='plotly_white',
+            paper_bgcolor='white',
+            plot_bgcolor='white',
+            width=600,
+            height=600,
+            font=dict(size=16),
+            legend=dict(font=dict(size=18, color='black'))
+        )
+    return fig
+
+
+def risk_surface(x, y, z, x_label, y_label, marker, log_x=False, log_y=False):
+    """Heatmap of final_score over two inputs, with the current scenario marked."""
+    zmax = max(float(np.max(z)), 100.0)
+    # Colour bands follow the risk level cut-offs (25/50/75)
+    colorscale = [[0, "#2ca02c"], [25 / zmax, "#f2d13a"], [50 / zmax, "#ff9f43"],
+                  [75 / zmax, "#d62728"], [1, "#67000d"]]
+    fig = go.Figure(go.Heatmap(
+        x=x, y=y, z=np.round(z, 2), zmin=0, zmax=zmax, colorscale=colorscale,
+        colorbar=dict(title="Score"),
+        hovertemplate=f"{x_label}: %{{x:.3g}}<br>{y_label}: %{{y:.3g}}<br>Score: %{{z:.2f}}<extra></extra>",
+    ))
+    fig.add_trace(go.Scatter(
+        x=[marker[0]], y=[marker[1]], mode="markers", name="Current scenario",
+        marker=dict(symbol="x", size=14, color="black", line=dict(width=2, color="white")),
+    ))
+    fig.update_layout(
+        template="plotly_white", height=500, margin=dict(l=10, r=10, t=30, b=10),
+        xaxis=dict(title=x_label, type="log" if log_x else "linear"),
+        yaxis=dict(title=y_label, type="log" if log_y else "linear"),
+        legend=dict(orientation="h", y=-0.2),
+    )
+    return fig
+
+
+def comparison_bars(names, contributions, final_scores):
+    """Grouped bars of each scenario's domain contributions (score points) and
+    final score; ``contributions`` maps a domain name to one value per scenario.
+    Many scenarios are laid out horizontally so their names stay readable."""
+    horizontal = len(names) > 8
+    fig = go.Figure()
+    for domain, values in list(contributions.items()) + [("Final score", final_scores)]:
+        values = np.round(np.asarray(values, dtype=float), 2)
+        fig.add_trace(go.Bar(
+            name=domain,
+            x=values if horizontal else list(names),
+            y=list(names) if horizontal else values,
+            orientation="h" if horizontal else "v",
+            marker=dict(color="black") if domain == "Final score" else None,
+        ))
+    # Risk level cut-offs (25/50/75) as reference lines
+    for threshold in (25, 50, 75):
+        if horizontal:
+            fig.add_vline(x=threshold, line_dash="dot", line_color="grey")
+        else:
+            fig.add_hline(y=threshold, line_dash="dot", line_color="grey")
+    fig.update_layout(
+        template="plotly_white", barmode="group",
+        height=max(450, 28 * len(names) * 2) if horizontal else 450,
+        margin=dict(l=10, r=10, t=30, b=10),
+        legend=dict(orientation="h", y=1.02, yanchor="bottom"),
+        **({"xaxis_title": "Score points", "yaxis": dict(autorange="reversed")} if horizontal
+           else {"yaxis_title": "Score points"}),
+    )
+    return fig
@@ -0,0 +1,98 @@
+"""Side-by-side scenario comparison.
+
+Scenarios (presets or custom rows) are a DataFrame with a ``scenario`` name
+column and the scoring.INPUTS columns, level inputs as selectbox labels.
+compare() scores every one of them in a single score_frame() call and adds
+each domain's contribution in score points (its share of the final score),
+which is what the grouped bar chart and the comparison PDF show.
+"""
+import numpy as np
+import pandas as pd
+
+from presets import IMPACT_FIELDS, WEIGHT_INPUTS
+from scoring import DOMAINS, INPUTS, LEVELS, hospitalization_options, score_frame
+
+COLUMNS = ("scenario",) + INPUTS
+DOMAIN_NAMES = {"health": "Health", "econ": "Economic", "pol": "Political", "trust": "Trust", "market": "Market"}
+
+
+def preset_row(name, preset):
+    """Comparison row (level labels) of a preset."""
+    row = {
+        "scenario": name,
+        "rr_score": float(preset["rr_score"]),
+        "base": float(preset["illness_base"]),
+        "exponent": float(preset["illness_exponent"]),
+        "total_population": float(preset["population"]),
+    }
+    for field in IMPACT_FIELDS:
+        row[field] = preset[field]
+    for key, column in WEIGHT_INPUTS.items():
+        row[column] = preset["weights"][key]
+    row["hospitalization_factor"] = preset.get("hospitalization") or next(iter(hospitalization_options))
+    return row
+
+
+def custom_row(name="Custom scenario"):
+    """Comparison row with the first level of every select, to edit from."""
+    row = {"scenario": name, "rr_score": 50.0, "base": 1.0, "exponent": 3.0, "total_population": 1e6}
+    for column in INPUTS:
+        if column in LEVELS:
+            row[column] = next(iter(LEVELS[column]))
+    return row
+
+
+def scenario_frame(rows):
+    """DataFrame of comparison rows, with unique scenario names."""
+    df = pd.DataFrame(list(rows), columns=COLUMNS)
+    seen = {}
+    names = []
+    for name in df["scenario"].fillna("").astype(str):
+        name = name.strip() or "Scenario"
+        seen[name] = seen.get(name, 0) + 1
+        names.append(name if seen[name] == 1 else f"{name} ({seen[name]})")
+    df["scenario"] = names
+    return df
+
+
+def compare(df):
+    """Score every scenario of ``df`` at once.
+
+    Returns ``(results, skipped)``: one result row per complete scenario
+    (final_score, risk_level, illness_factor, category, ``norm_*`` and the
+    ``contrib_*`` domain contributions in score points) and the names of the
+    rows left out because an input is missing or not a known level.
+    """
+    df = scenario_frame(df.to_dict("records"))
+    complete = df[list(INPUTS)].notna().all(axis=1)
+    for column in INPUTS:
+        if column in LEVELS:
+            complete &= df[column].map(lambda v, c=column: v in LEVELS[c] or isinstance(v, (int, float)))
+    skipped = df.loc[~complete, "scenario"].tolist()
+    df = df[complete].reset_index(drop=True)
+    if df.empty:
+        return pd.DataFrame(columns=["scenario", "final_score", "risk_level"]), skipped
+
+    scored = score_frame(df)
+    results = pd.concat([df[["scenario"]], scored], axis=1)
+    for name in DOMAINS:
+        results[f"contrib_{name}"] = results[f"norm_{name}"] / 100 * results["final_score"]
+    return results, skipped
+
+
+def comparison_context(results, title="Scenario comparison"):
+    """build_comparison_report() context for compare() results."""
+    return {
+        "title": title,
+        "domains": [DOMAIN_NAMES[d] for d in DOMAINS],
+        "scenarios": [
+            {
+                "name": row.scenario,
+                "final_score": float(row.final_score),
+                "risk_level": row.risk_level,
+                "illness_factor": float(row.illness_factor),
+                "contributions": [float(np.nan_to_num(getattr(row, f"contrib_{d}"))) for d in DOMAINS],
+            }
+            for row in results.itertuples(index=False)
+        ],
+    }
@@ -0,0 +1,157 @@
+"""Inverse mode: solve the scoring model backwards.
+
+For one free input, with every other input fixed, find the value at which a
+scenario crosses a risk level cut-off (``final_score`` = 25/50/75, see
+scoring.RISK_THRESHOLDS) or an illness category threshold (``illness_factor``
+= 0.01/0.1/0.5 %, see scoring.CATEGORY_THRESHOLDS):
+
+- ``rr_score``: which Risk Ranger score keeps the scenario below 50?
+- ``estimated_cases``: how many cases tip it from Significant to High?
+- ``total_population``: below which population does it become High?
+
+The score is monotone in each of them, so every scenario of a batch is solved
+at once with a vectorized, bracketed Illinois (regula falsi) iteration on
+scoring.score_batch(); converged rows drop out of the active set.
+
+Each result comes with a status: SOLVED, ALWAYS_ABOVE (at or above the
+target over the whole range of the free input) or NEVER_REACHED.
+"""
+import numpy as np
+
+from scoring import CATEGORY_THRESHOLDS, INPUTS, RISK_THRESHOLDS, score_batch
+
+SOLVED, ALWAYS_ABOVE, NEVER_REACHED = 0, 1, 2
+STATUS_LABELS = ("solved", "always above", "never reached")
+
+# Free input -> does the score grow with it?
+INCREASING = {"rr_score": True, "estimated_cases": True, "total_population": False}
+
+QUANTITIES = {"final_score": RISK_THRESHOLDS, "illness_factor": CATEGORY_THRESHOLDS}
+
+# Orders of magnitude searched below (cases) / above (population) the other input
+LOG_SPAN = 15
+
+
+def _broadcast(inputs):
+    """Inputs as 1-d float arrays of a common length (estimated cases folded in)."""
+    args = {name: inputs[name] for name in INPUTS if name in inputs}
+    args.setdefault("hospitalization_factor", 1.0)
+    if "estimated_cases" in inputs:
+        args["base"], args["exponent"] = inputs["estimated_cases"], 0
+    arrays = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in args.values()))
+    return {name: np.atleast_1d(a).astype(float).copy() for name, a in zip(args, arrays)}
+
+
+def _domain(args, free):
+    """Search interval of the free input, in the coordinate the solver works in
+    (log10 for cases and population), plus the map back to input values."""
+    cases = args["base"] * 10.0 ** args["exponent"]
+    if free == "rr_score":
+        lo, hi = np.zeros_like(cases), np.full_like(cases, 100.0)
+        return lo, hi, (lambda t: t)
+    if free == "estimated_cases":
+        top = np.log10(np.maximum(args["total_population"], 1e-300))
+        return top - LOG_SPAN, top, (lambda t: 10.0 ** t)
+    if free == "total_population":
+        bottom = np.log10(np.maximum(cases, 1e-300))
+        return bottom, bottom + LOG_SPAN, (lambda t: 10.0 ** t)
+    raise ValueError(f"Cannot solve for {free!r}; choose one of {sorted(INCREASING)}")
+
+
+def _evaluate(args, free, quantity, x, rows):
+    sub = {name: value[rows] for name, value in args.items()}
+    if free == "estimated_cases":
+        sub["base"], sub["exponent"] = x, np.zeros_like(x)
+    else:
+        sub[free] = x
+    return score_batch(**sub)[quantity]
+
+
+def solve(inputs, free, target, quantity="final_score", xtol=1e-12, max_iter=100):
+    """Value of ``free`` at which ``quantity`` equals ``target``, per scenario.
+
+    ``inputs`` maps scoring.INPUTS names (or ``estimated_cases``, replacing
+    base/exponent) to scalars or arrays; they are broadcast together and the
+    entry for ``free`` is ignored. Returns ``(value, status)`` arrays; value is
+    NaN unless status is SOLVED. For increasing inputs the scenario is at or
+    above ``target`` from ``value`` upwards, for ``total_population`` from
+    ``value`` downwards.
+    """
+    if quantity not in QUANTITIES:
+        raise ValueError(f"quantity must be one of {sorted(QUANTITIES)}")
+    args = _broadcast(inputs)
+    lo, hi, to_value = _domain(args, free)
+    n = lo.size
+    rows = np.arange(n)
+
+    def g(t, idx):
+        return _evaluate(args, free, quantity, to_value(t), idx) - target
+
+    # a: end of the range with the lowest score, b: the highest
+    a, b = (lo, hi) if INCREASING[free] else (hi, lo)
+    fa, fb = g(a, rows), g(b, rows)
+    # The true low end for cases is zero cases, not the bottom of the log range
+    f_min = _evaluate(args, free, quantity, np.zeros(n), rows) - target if free == "estimated_cases" else fa
+
+    value = np.full(n, np.nan)
+    status = np.full(n, SOLVED, dtype=np.int8)
+    status[f_min >= 0] = ALWAYS_ABOVE
+    status[(f_min < 0) & (fb < 0)] = NEVER_REACHED
+    # Crossing between zero cases and the bottom of the log range
+    at_bottom = (status == SOLVED) & (fa >= 0)
+    value[at_bottom] = to_value(a[at_bottom])
+
+    active = np.flatnonzero((status == SOLVED) & ~at_bottom)
+    a, b, fa, fb = a[active], b[active], fa[active], fb[active]
+    scale = max(abs(target), 1.0)
+
+    for _ in range(max_iter):
+        if active.size == 0:
+            break
+        denom = np.where(fb != fa, fb - fa, 1.0)
+        c = np.where(fb != fa, b - fb * (b - a) / denom, (a + b) / 2)
+        fc = g(c, active)
+
+        crossed = (fc >= 0) != (fb >= 0)
+        a = np.where(crossed, b, a)
+        fa = np.where(crossed, fb, fa / 2)  # Illinois step: halve the stale end
+        b, fb = c, fc
+
+        done = (np.abs(fc) <= 1e-12 * scale) | (np.abs(b - a) <= xtol * np.maximum(np.abs(b), 1.0))
+        value[active[done]] = to_value(b[done])
+        keep = ~done
+        active, a, b, fa, fb = active[keep], a[keep], b[keep], fa[keep], fb[keep]
+
+    value[active] = to_value(b)
+    return value, status
+
+
+def boundaries(inputs, free, quantity="final_score", targets=None):
+    """solve() for every cut-off of ``quantity``: {target: (value, status)}."""
+    if targets is None:
+        targets = QUANTITIES[quantity]
+    return {target: solve(inputs, free, target, quantity) for target in targets}
+
+
+def boundary_frame(df, free, quantity="final_score"):
+    """boundaries() for every row of a scenario DataFrame (see score_frame()),
+    as ``{free}_at_{target}`` and ``{free}_at_{target}_status`` columns."""
+    import pandas as pd
+
+    from scoring import to_numeric
+
+    inputs = {c: to_numeric(df[c], c) for c in INPUTS if c in df.columns}
+    out = {}
+    for target, (value, status) in boundaries(inputs, free, quantity).items():
+        column = f"{free}_at_{target:g}"
+        out[column] = value
+        out[f"{column}_status"] = np.asarray(STATUS_LABELS)[status]
+    return pd.DataFrame(out, index=df.index)
+
+
+def scientific(cases):
+    """(base, exponent) of a case count, as entered in the app (base × 10^exponent)."""
+    cases = np.asarray(cases, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        exponent = np.where(cases > 0, np.floor(np.log10(np.where(cases > 0, cases, 1))), 0)
+    return cases / 10.0 ** exponent, exponent.astype(int)
@@ -0,0 +1,343 @@
+"""Streaming mode for live outbreaks.
+
+During an incident the estimated case count changes many times a day. This
+reads case-count updates as JSON lines, from a file being appended to
+(``--tail``) or from TCP clients (``--listen``), and re-scores the scenarios
+of the incident each update names:
+
+    {"incident": "listeria-2026-04", "cases": 1840, "time": "2026-04-03T09:15:00"}
+
+``cases`` may also be given as ``base``/``exponent``; ``time`` defaults to
+the arrival time. Incidents come from a JSON/YAML file mapping each incident
+to its scenarios, given as a preset name or as scoring inputs (labels or
+numbers, like the batch input columns):
+
+    {"listeria-2026-04": {"national": "RTE Salad – Standard",
+                          "regional": {"preset": "RTE Salad – Standard", "total_population": 5000000}}}
+
+Only the case-dependent part of the model is evaluated per update
+(scoring.rescore_cases()): the weight and impact terms of each scenario are
+computed once when the incident is loaded. Every incident keeps a sliding
+window (``--window`` seconds) of illness factor, final score and risk level
+per scenario, and an alert is raised when a scenario crosses a risk level
+boundary. ``--hysteresis`` points keep a score hovering around a cut-off
+from alerting on every update: a level is only left downwards once the score
+is that far below its threshold.
+
+    python live.py incidents.json --tail updates.ndjson --alerts alerts.ndjson
+    python live.py incidents.json --listen 127.0.0.1:9010
+
+Each scored update is written to stdout as a JSON line; alerts go to stderr
+and, with ``--alerts``, to a file.
+"""
+import argparse
+import datetime
+import json
+import os
+import queue
+import socketserver
+import sys
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from metrics import EVENTS, stage, start_exporters
+from presets import PresetError, builtin_presets, load_file, open_store, preset_inputs
+from scoring import INPUTS, LEVELS, RISK_LEVELS, RISK_THRESHOLDS, domain_terms, rescore_cases, risk_level_index
+
+# Inputs that stay fixed for a scenario while its case count streams in
+CONTEXT_INPUTS = ("economic", "political", "trust", "market", "w_health", "w_econ", "w_pol", "w_trust", "w_market")
+
+
+class UpdateError(ValueError):
+    pass
+
+
+# ---------------- INCIDENTS ----------------
+def scenario_inputs(spec, presets=None):
+    """Numeric scoring.INPUTS of a scenario given as a preset name or a dict
+    of inputs (optionally on top of a ``preset``, with its ``hospitalization``
+    level). ``presets`` is a PresetStore or a dict (default: the built-ins)."""
+    if isinstance(spec, str):
+        spec = {"preset": spec}
+    inputs = {}
+    if "preset" in spec:
+        try:
+            preset = (presets if presets is not None else builtin_presets()).get(spec["preset"])
+        except KeyError:
+            preset = None
+        if preset is None:
+            raise PresetError(f"Unknown preset {spec['preset']!r}")
+        inputs = preset_inputs(preset, spec.get("hospitalization"))
+    for name in INPUTS:
+        if name in spec:
+            value = spec[name]
+            try:
+                inputs[name] = float(LEVELS.get(name, {}).get(value, value))
+            except (TypeError, ValueError):
+                raise PresetError(f"Unknown {name} level {value!r}") from None
+    inputs.setdefault("hospitalization_factor", 1.0)
+    missing = [name for name in INPUTS if name not in inputs]
+    if missing:
+        raise PresetError(f"Missing input(s): {', '.join(missing)}")
+    return inputs
+
+
+class Incident:
+    """The scenarios of one incident, scored together on every update."""
+
+    def __init__(self, name, scenarios, window=86400.0, max_points=10000):
+        self.name = name
+        self.scenarios = list(scenarios)
+        self.window = window
+        columns = {c: np.array([scenarios[s][c] for s in self.scenarios], dtype=float) for c in INPUTS}
+        self.rr_score = columns["rr_score"]
+        self.total_population = columns["total_population"]
+        self.hospitalization_factor = columns["hospitalization_factor"]
+        self.terms = domain_terms(*(columns[c] for c in CONTEXT_INPUTS))
+        self.cases = columns["base"] * 10.0 ** columns["exponent"]
+        self.level = None
+        self.history = {s: deque(maxlen=max_points) for s in self.scenarios}
+
+    def update(self, cases, timestamp, hysteresis=0.0):
+        """Re-score every scenario at ``cases``; returns (rows, alerts)."""
+        self.cases = np.full(len(self.scenarios), float(cases))
+        out = rescore_cases(self.terms, self.rr_score, self.cases, 0, self.total_population,
+                            self.hospitalization_factor)
+        score = out["final_score"]
+        raw = out["risk_level"]
+        if self.level is None:
+            previous, level = raw, raw
+        else:
+            previous = self.level
+            # Up as soon as a cut-off is crossed, down only past the hysteresis band
+            level = np.where(raw > previous, raw, np.minimum(previous, risk_level_index(score + hysteresis)))
+        self.level = level
+
+        rows, alerts = [], []
+        for i, scenario in enumerate(self.scenarios):
+            point = (timestamp, float(out["illness_factor"][i]), float(score[i]), int(level[i]))
+            history = self.history[scenario]
+            history.append(point)
+            while history and history[0][0] < timestamp - self.window:
+                history.popleft()
+            row = {
+                "incident": self.name,
+                "scenario": scenario,
+                "time": _iso(timestamp),
+                "cases": float(cases),
+                "illness_factor": point[1],
+                "final_score": point[2],
+                "risk_level": RISK_LEVELS[point[3]],
+            }
+            rows.append(row)
+            if level[i] != previous[i]:
+                up = level[i] > previous[i]
+                alerts.append({
+                    **row,
+                    "alert": "escalation" if up else "de-escalation",
+                    "previous_level": RISK_LEVELS[int(previous[i])],
+                    "threshold": RISK_THRESHOLDS[int(min(level[i], previous[i]))],
+                })
+        return rows, alerts
+
+
+def load_incidents(path, window=86400.0, presets=None):
+    """{incident: Incident} from an incidents file (see module docstring)."""
+    if presets is None:
+        presets = builtin_presets()
+    incidents = {}
+    for name, scenarios in load_file(path).items():
+        if not isinstance(scenarios, dict) or not scenarios:
+            raise PresetError(f"{name}: expected an object of scenarios")
+        inputs = {scenario: scenario_inputs(spec, presets) for scenario, spec in scenarios.items()}
+        incidents[name] = Incident(name, inputs, window)
+    return incidents
+
+
+# ---------------- UPDATES ----------------
+def _iso(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).isoformat(timespec="seconds")
+
+
+def _timestamp(value):
+    if value is None:
+        return time.time()
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        raise UpdateError(f"Bad time {value!r}") from None
+
+
+def parse_update(line):
+    """(incident, cases, timestamp) of one JSON line."""
+    try:
+        message = json.loads(line)
+    except ValueError as e:
+        raise UpdateError(f"Not JSON: {e}") from None
+    if not isinstance(message, dict) or "incident" not in message:
+        raise UpdateError("Updates need an 'incident'")
+    try:
+        if "cases" in message:
+            cases = float(message["cases"])
+        else:
+            cases = float(message["base"]) * 10.0 ** float(message.get("exponent", 0))
+    except (KeyError, TypeError, ValueError):
+        raise UpdateError("Updates need 'cases' or 'base'/'exponent' numbers") from None
+    if not np.isfinite(cases) or cases < 0:
+        raise UpdateError(f"Bad case count {cases!r}")
+    return str(message["incident"]), cases, _timestamp(message.get("time"))
+
+
+class LiveScorer:
+    """Applies updates to incidents and hands the results to callbacks."""
+
+    def __init__(self, incidents, hysteresis=0.0, on_row=None, on_alert=None, on_error=None):
+        self.incidents = incidents
+        self.hysteresis = hysteresis
+        self.on_row = on_row or (lambda row: None)
+        self.on_alert = on_alert or (lambda alert: None)
+        self.on_error = on_error or (lambda line, error: None)
+
+    def handle(self, line):
+        line = line.strip()
+        if not line:
+            return
+        try:
+            name, cases, timestamp = parse_update(line)
+            incident = self.incidents.get(name)
+            if incident is None:
+                raise UpdateError(f"Unknown incident {name!r}")
+        except UpdateError as e:
+            EVENTS.inc(event="live_update_rejected")
+            self.on_error(line, e)
+            return
+        with stage("live_rescore"):
+            rows, alerts = incident.update(cases, timestamp, self.hysteresis)
+        EVENTS.inc(event="live_update")
+        for row in rows:
+            self.on_row(row)
+        for alert in alerts:
+            EVENTS.inc(event="risk_alert")
+            self.on_alert(alert)
+
+    def run(self, lines):
+        for line in lines:
+            self.handle(line)
+
+    def history(self, incident, scenario):
+        """Sliding window of (time, illness_factor, final_score, risk level) points."""
+        return [(_iso(t), f, s, RISK_LEVELS[level]) for t, f, s, level in self.incidents[incident].history[scenario]]
+
+
+# ---------------- SOURCES ----------------
+def follow(path, poll=0.5, from_start=False, stop=None):
+    """Yield lines appended to ``path``, like ``tail -F``: waits for the file
+    to appear and reopens it when it is truncated or replaced."""
+    f = None
+    inode = None
+    partial = ""
+    while stop is None or not stop.is_set():
+        if f is None:
+            try:
+                f = open(path, encoding="utf-8")
+            except FileNotFoundError:
+                time.sleep(poll)
+                continue
+            inode = os.fstat(f.fileno()).st_ino
+            if not from_start:
+                f.seek(0, os.SEEK_END)
+            from_start = True  # files that appear later are read from the top
+        chunk = f.readline()
+        if chunk:
+            partial += chunk
+            if partial.endswith("\n"):
+                yield partial
+                partial = ""
+            continue
+        try:
+            st = os.stat(path)
+            replaced = st.st_ino != inode or st.st_size < f.tell()
+        except FileNotFoundError:
+            replaced = True
+        if replaced:
+            f.close()
+            f = None
+            partial = ""
+        else:
+            time.sleep(poll)
+    if f is not None:
+        f.close()
+
+
+def listen(host, port, stop=None):
+    """Yield lines sent by any number of TCP clients to ``host:port``."""
+    lines = queue.Queue(maxsize=10000)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for raw in self.rfile:
+                lines.put(raw.decode("utf-8", "replace"))
+
+    server = socketserver.ThreadingTCPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="holirisk-live-listener", daemon=True).start()
+    try:
+        while stop is None or not stop.is_set():
+            try:
+                yield lines.get(timeout=0.5)
+            except queue.Empty:
+                pass
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-score HoliRisk incidents as case-count updates stream in.")
+    parser.add_argument("incidents", help="JSON/YAML file mapping incidents to their scenarios")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--tail", metavar="PATH", help="follow a file of JSON-line updates")
+    source.add_argument("--listen", metavar="HOST:PORT", help="accept JSON-line updates over TCP")
+    parser.add_argument("--from-start", action="store_true", help="with --tail, replay the lines already in the file")
+    parser.add_argument("--window", type=float, default=86400.0, help="history kept per scenario (s)")
+    parser.add_argument("--hysteresis", type=float, default=0.0, help="score points below a cut-off before a level is left")
+    parser.add_argument("--alerts", help="append alerts to this JSON-lines file")
+    parser.add_argument("--presets", action="store_true", help="resolve preset names in the preset store, not only the built-ins")
+    args = parser.parse_args(argv)
+
+    incidents = load_incidents(args.incidents, args.window, open_store() if args.presets else None)
+    start_exporters()
+
+    def on_row(row):
+        print(json.dumps(row, ensure_ascii=False), flush=True)
+
+    def on_alert(alert):
+        text = json.dumps(alert, ensure_ascii=False)
+        print(f"ALERT {text}", file=sys.stderr, flush=True)
+        if args.alerts:
+            with open(args.alerts, "a", encoding="utf-8") as f:
+                f.write(text + "\n")
+
+    def on_error(line, error):
+        print(f"Skipped update ({error}): {line[:200]}", file=sys.stderr, flush=True)
+
+    scorer = LiveScorer(incidents, args.hysteresis, on_row, on_alert, on_error)
+    if args.tail:
+        lines = follow(args.tail, from_start=args.from_start)
+    else:
+        host, _, port = args.listen.rpartition(":")
+        lines = listen(host or "127.0.0.1", int(port))
+    try:
+        scorer.run(lines)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+"""Precomputed, memory-mapped table over the discrete input space.
+
+Apart from ``rr_score``, the estimated cases and the population, every input
+is a 4-level select: four impacts, five weights and the hospitalization
+factor, i.e. 4^10 = 1,048,576 combinations. No contribution depends on the
+hospitalization factor, so the table covers the 4^9 impact/weight
+combinations and stores, for each, the five domain contribution factors
+``w^alpha * impact^beta`` and their sum; for any microbiological input
+
+    final_score = min(rr_scaled * total_factor, 100) * hospitalization_factor
+
+is then one array expression over the whole space (hospitalization is
+broadcast along a tenth axis), evaluated in float64 like
+scoring.score_batch(), and questions such as "which weight/impact
+configurations push this scenario into High Societal Risk" are array
+lookups and reductions instead of a recompute loop.
+
+The table is a ``.npy`` file opened with ``mmap_mode="r"`` (plus a JSON
+sidecar describing the index). Each factor is its own contiguous block
+(``data[i]``, the total last), so it loads in milliseconds and a query
+over total_factor reads that block only. Build it with::
+
+    python lookup_table.py [path]
+"""
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+import scoring
+from scoring import DOMAINS, LEVELS, RISK_LEVELS
+
+# Index order of the query axes; each axis follows the level dict order. The
+# table has all but the last: hospitalization only scales the final score.
+DIMS = ("economic", "political", "trust", "market",
+        "w_health", "w_econ", "w_pol", "w_trust", "w_market",
+        "hospitalization_factor")
+TABLE_DIMS = DIMS[:-1]
+IMPACT_OF = {"w_econ": "economic", "w_pol": "political", "w_trust": "trust", "w_market": "market"}
+WEIGHTS = ("w_health", "w_econ", "w_pol", "w_trust", "w_market")
+
+DEFAULT_PATH = os.environ.get("HOLIRISK_TABLE_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "contrib_table.npy")
+FORMAT_VERSION = 2
+
+
+def _header():
+    return {
+        "version": FORMAT_VERSION,
+        "alpha": scoring.alpha,
+        "beta": scoring.beta,
+        "dims": list(DIMS),
+        "table_dims": list(TABLE_DIMS),
+        "labels": {d: list(LEVELS[d]) for d in DIMS},
+        "values": {d: list(LEVELS[d].values()) for d in DIMS},
+        "columns": list(DOMAINS) + ["total"],
+    }
+
+
+def _axis_values(dim):
+    """Level values of ``dim`` shaped to broadcast along its table axis."""
+    shape = [1] * len(TABLE_DIMS)
+    shape[TABLE_DIMS.index(dim)] = 4
+    return np.asarray(list(LEVELS[dim].values()), dtype=np.float64).reshape(shape)
+
+
+def build(path=DEFAULT_PATH):
+    """Compute the table and write it to ``path`` (+ ``path.json``)."""
+    shape = (len(DOMAINS) + 1,) + (4,) * len(TABLE_DIMS)
+    table = np.lib.format.open_memmap(path + ".tmp", mode="w+", dtype=np.float64, shape=shape)
+    total = np.zeros(shape[1:])
+    for i, weight in enumerate(WEIGHTS):
+        factor = (_axis_values(weight) / 100) ** scoring.alpha
+        if weight in IMPACT_OF:
+            factor = factor * (_axis_values(IMPACT_OF[weight]) / 100) ** scoring.beta
+        factor = np.broadcast_to(factor, total.shape)
+        table[i] = factor
+        total = total + factor
+    table[-1] = total
+    table.flush()
+    del table
+    os.replace(path + ".tmp", path)
+    with open(path + ".json", "w") as f:
+        json.dump(_header(), f, ensure_ascii=False, indent=1)
+    return path
+
+
+class ContributionTable:
+    """Read-only view of a built table."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        with open(path + ".json") as f:
+            self.header = json.load(f)
+        if self.header != _header():
+            raise ValueError(f"{path} was built for a different model or level set; rebuild it")
+        self.path = path
+        self.data = np.load(path, mmap_mode="r")
+        self.labels = self.header["labels"]
+
+    @property
+    def total_factor(self):
+        return self.data[-1]
+
+    def index(self, **choices):
+        """Table index for level labels (or values); unspecified dims are sliced."""
+        idx = []
+        for dim in DIMS:
+            choice = choices.get(dim)
+            if choice is None:
+                idx.append(slice(None))
+            elif isinstance(choice, str):
+                idx.append(self.labels[dim].index(choice))
+            else:
+                idx.append(self.header["values"][dim].index(choice))
+        return tuple(idx)
+
+    def final_scores(self, rr_score, base, exponent, total_population, **fixed):
+        """final_score for every combination of the dims not in ``fixed``."""
+        rr_scaled = scoring.score_batch(rr_score, base, exponent, total_population,
+                                        100, 100, 100, 100, 100, 100, 100, 100, 100)["rr_scaled"]
+        idx = self.index(**fixed)
+        total = self.total_factor[idx[:-1]]
+        h = np.asarray(self.header["values"]["hospitalization_factor"], dtype=np.float64)[idx[-1]]
+        if np.ndim(h):
+            total = total[..., np.newaxis]
+        return np.minimum(np.float64(rr_scaled) * total, 100) * h
+
+    def risk_levels(self, rr_score, base, exponent, total_population, **fixed):
+        """Risk level codes (see scoring.RISK_LEVELS) for every combination."""
+        return scoring.risk_level_index(self.final_scores(rr_score, base, exponent, total_population, **fixed))
+
+    def level_shares(self, levels):
+        """Share of combinations at each entry of RISK_LEVELS."""
+        counts = np.bincount(np.ravel(levels), minlength=len(RISK_LEVELS))
+        return dict(zip(RISK_LEVELS, (counts / counts.sum()).tolist()))
+
+    def configurations(self, mask, scores=None, limit=None, **fixed):
+        """Labels of the combinations selected by ``mask`` (a boolean array over
+        the free dims), lowest final score first when ``scores`` is given."""
+        free = [d for d in DIMS if fixed.get(d) is None]
+        positions = np.argwhere(mask)
+        if scores is not None:
+            positions = positions[np.argsort(scores[mask], kind="stable")]
+        if limit is not None:
+            positions = positions[:limit]
+        rows = []
+        for pos in positions:
+            row = {d: self.labels[d][i] for d, i in zip(free, pos)}
+            row.update({d: v for d, v in fixed.items() if v is not None})
+            rows.append(row)
+        return rows
+
+
+def load(path=DEFAULT_PATH):
+    """Open the table, building it first if it is missing or stale."""
+    try:
+        return ContributionTable(path)
+    except (OSError, ValueError):
+        build(path)
+        return ContributionTable(path)
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH
+    start = time.perf_counter()
+    build(target)
+    print(f"Built {target} in {time.perf_counter() - start:.2f}s", file=sys.stderr)
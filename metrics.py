@@ -0,0 +1,282 @@
+"""Stage timers and process-wide metrics in Prometheus text format.
+
+``with stage("scoring", timings):`` times a block: the duration goes into the
+``holirisk_stage_seconds`` histogram (shared by every session of the process)
+and, when a dict is given, into ``timings[name]`` for the debug panel.
+
+The registry is rendered in the Prometheus text exposition format and can be
+exported in two ways, both off unless configured:
+
+- ``HOLIRISK_METRICS_PORT``: serve ``/metrics`` over HTTP from a daemon thread;
+- ``HOLIRISK_METRICS_FILE``: rewrite the file every ``HOLIRISK_METRICS_INTERVAL``
+  seconds (default 15), e.g. for node_exporter's textfile collector.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency buckets
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _number(value):
+    value = float(value)
+    if value.is_integer():
+        return str(int(value))
+    return {float("inf"): "+Inf", float("-inf"): "-Inf"}.get(value, repr(value))
+
+
+# ---------------- METRIC TYPES ----------------
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels[n] for n in self.labelnames), 0)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(self.name, _labels(self.labelnames, key), value) for key, value in items]
+
+
+class Gauge:
+    """Value read from ``fn`` at render time."""
+    kind = "gauge"
+
+    def __init__(self, name, help, fn):
+        self.name = name
+        self.help = help
+        self.fn = fn
+
+    def samples(self):
+        try:
+            return [(self.name, "", self.fn())]
+        except Exception:
+            return []
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            i = 0
+            while i < len(self.buckets) and value > self.buckets[i]:
+                i += 1
+            series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def snapshot(self):
+        """{label values: {"counts", "sum", "count"}} (per-bucket, not cumulative)."""
+        with self._lock:
+            return {key: {"counts": list(s["counts"]), "sum": s["sum"], "count": s["count"]}
+                    for key, s in self._series.items()}
+
+    def quantile(self, q, **labels):
+        """Estimate of the ``q`` quantile by linear interpolation inside a bucket."""
+        series = self.snapshot().get(tuple(labels[n] for n in self.labelnames))
+        if not series or not series["count"]:
+            return None
+        rank = q * series["count"]
+        seen = 0
+        for i, count in enumerate(series["counts"]):
+            if count and seen + count >= rank:
+                low = self.buckets[i - 1] if i > 0 else 0.0
+                if i == len(self.buckets):
+                    return low
+                return low + (self.buckets[i] - low) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def samples(self):
+        out = []
+        for key, series in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series["counts"]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                out.append((f"{self.name}_bucket", _labels(self.labelnames, key, [("le", le)]), cumulative))
+            out.append((f"{self.name}_sum", _labels(self.labelnames, key), series["sum"]))
+            out.append((f"{self.name}_count", _labels(self.labelnames, key), series["count"]))
+        return out
+
+
+# ---------------- REGISTRY ----------------
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name, help, fn):
+        return self._add(Gauge(name, help, fn))
+
+    def histogram(self, name, help, labelnames=(), buckets=BUCKETS):
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name}{labels} {_number(value)}" for name, labels, value in metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Atomically replace ``path`` with render()."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.render())
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+def rss_bytes():
+    """Resident memory of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def deep_sizeof(obj, _seen=None):
+    """Approximate memory held by ``obj`` and everything it references."""
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    nbytes = getattr(obj, "nbytes", None)
+    size = nbytes if isinstance(nbytes, int) else sys.getsizeof(obj, 0)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, _seen) + deep_sizeof(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(v, _seen) for v in obj)
+    return size
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "holirisk_stage_seconds", "Wall time of each stage of the HoliRisk script.", ("stage",))
+EVENTS = REGISTRY.counter(
+    "holirisk_events_total", "Script reruns, reports, submissions and Sheets flushes.", ("event",))
+REGISTRY.gauge("holirisk_process_resident_memory_bytes", "Resident memory of the process.", rss_bytes)
+
+
+@contextmanager
+def stage(name, timings=None):
+    """Time the block as stage ``name`` (see module docstring)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        if timings is not None:
+            timings[name] = elapsed
+
+
+# ---------------- EXPORT ----------------
+def serve(port, host="0.0.0.0", registry=REGISTRY):
+    """Serve ``/metrics`` on ``port`` from a daemon thread; returns the server."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="holirisk-metrics-http", daemon=True).start()
+    return server
+
+
+def write_periodically(path, interval=15.0, registry=REGISTRY):
+    """Rewrite ``path`` every ``interval`` seconds from a daemon thread."""
+    def run():
+        while True:
+            try:
+                registry.write(path)
+            except OSError:
+                pass
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="holirisk-metrics-file", daemon=True)
+    thread.start()
+    return thread
+
+
+def start_exporters():
+    """Start the exporters configured through the environment (see module docstring)."""
+    started = []
+    port = os.environ.get("HOLIRISK_METRICS_PORT")
+    if port:
+        started.append(serve(int(port)))
+    path = os.environ.get("HOLIRISK_METRICS_FILE")
+    if path:
+        started.append(write_periodically(path, float(os.environ.get("HOLIRISK_METRICS_INTERVAL", 15))))
+    return started
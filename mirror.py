@@ -0,0 +1,287 @@
+"""Incremental columnar mirror of the submission log.
+
+Copies the "HoliRisk Data Logger" sheet into a local Parquet dataset so the
+analytics page never pulls the whole sheet through gspread. The sheet is
+append-only, so each sync asks the source only for the rows after the last
+one mirrored (re-reading that row as an anchor), appends them as one more
+Parquet part file and advances the watermark (row number and last synced
+timestamp); parts are compacted once there are too many. If the anchor row
+no longer matches (rows deleted or reordered in the sheet) the mirror is
+rebuilt from scratch.
+
+Sources implement ``rows_from(start)``, returning the sheet rows from 1-based
+row ``start`` on:
+
+- GoogleSheetsSource: the live sheet (one ranged ``get`` per sync);
+- CsvSheetSource: a CSV with the same columns, e.g. the bundled fixture
+  ``data/fixtures/submissions.csv`` or the file FakeSheetsSink writes.
+
+    python mirror.py sync --fixture data/fixtures/submissions.csv
+    python mirror.py sync               # live sheet, credentials from .streamlit/secrets.toml
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from submissions import SHEET_COLUMNS, SPREADSHEET_NAME, open_worksheet
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_PATH = os.path.join(HERE, "data", "fixtures", "submissions.csv")
+
+NUMERIC_COLUMNS = ("rr_score", "base", "exponent", "total_population",
+                   "illness_factor", "final_score", "years_experience")
+SCHEMA = pa.schema([(c, pa.float64() if c in NUMERIC_COLUMNS else pa.string()) for c in SHEET_COLUMNS])
+
+# Part files kept before they are merged into one
+MAX_PARTS = 32
+
+
+def default_mirror_dir():
+    return os.environ.get("HOLIRISK_MIRROR_DIR") or os.path.join(os.path.expanduser("~"), ".holirisk", "mirror")
+
+
+# ---------------- SOURCES ----------------
+class GoogleSheetsSource:
+    def __init__(self, service_account_info, spreadsheet=SPREADSHEET_NAME):
+        self.service_account_info = dict(service_account_info)
+        self.spreadsheet = spreadsheet
+        self._sheet = None
+
+    def rows_from(self, start):
+        if self._sheet is None:
+            self._sheet = open_worksheet(self.service_account_info, self.spreadsheet)
+        last_column = chr(ord("A") + len(SHEET_COLUMNS) - 1)
+        return self._sheet.get(f"A{start}:{last_column}")
+
+
+class CsvSheetSource:
+    """A CSV laid out like the sheet (no header, or a header starting with 'timestamp')."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def rows_from(self, start):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, newline="", encoding="utf-8") as f:
+            return [row for i, row in enumerate(csv.reader(f), start=1) if i >= start]
+
+
+def default_source(secrets=None):
+    """CSV source when ``HOLIRISK_MIRROR_FIXTURE`` is set or the fake sink is in
+    use, otherwise the live sheet with ``secrets["google_service_account"]``."""
+    fixture = os.environ.get("HOLIRISK_MIRROR_FIXTURE")
+    if fixture:
+        return CsvSheetSource(fixture)
+    if os.environ.get("HOLIRISK_SHEETS_SINK") == "fake":
+        return CsvSheetSource(os.environ.get("HOLIRISK_FAKE_SHEET_PATH") or FIXTURE_PATH)
+    if secrets is None:
+        raise RuntimeError("No credentials for the live sheet; set HOLIRISK_MIRROR_FIXTURE for offline use")
+    return GoogleSheetsSource(secrets["google_service_account"])
+
+
+# ---------------- MIRROR ----------------
+def _is_data_row(row):
+    # Skips the header and blank rows: data rows start with an ISO timestamp
+    return bool(row) and len(row[0]) >= 10 and row[0][:4].isdigit() and row[0][4] == "-"
+
+
+def to_table(rows):
+    """Arrow table (SCHEMA) from raw sheet rows; numbers are parsed leniently."""
+    columns = {c: [] for c in SHEET_COLUMNS}
+    for row in rows:
+        row = list(row) + [""] * (len(SHEET_COLUMNS) - len(row))
+        for column, value in zip(SHEET_COLUMNS, row):
+            columns[column].append(value)
+    arrays = []
+    for column in SHEET_COLUMNS:
+        values = columns[column]
+        if column in NUMERIC_COLUMNS:
+            values = [_number(v) for v in values]
+        arrays.append(pa.array(values, type=SCHEMA.field(column).type))
+    return pa.Table.from_arrays(arrays, schema=SCHEMA)
+
+
+def _number(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        # USER_ENTERED values may come back with a decimal comma
+        return float(str(value).strip().replace(",", "."))
+    except ValueError:
+        return None
+
+
+class Mirror:
+    """Parquet part files plus ``state.json`` under ``directory``."""
+
+    def __init__(self, directory=None):
+        self.directory = directory or default_mirror_dir()
+        os.makedirs(self.directory, exist_ok=True)
+        self.state_path = os.path.join(self.directory, "state.json")
+
+    def state(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"next_row": 1, "anchor": None, "last_timestamp": "", "rows": 0, "version": 0}
+
+    def _save_state(self, state):
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_path)
+
+    def parts(self):
+        return sorted(glob.glob(os.path.join(self.directory, "part-*.parquet")))
+
+    def reset(self):
+        for path in self.parts():
+            os.remove(path)
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+    def sync(self, source):
+        """Append the rows added to ``source`` since the last sync; returns their number."""
+        state = self.state()
+        anchor_row = state["next_row"] - 1
+        fetched = source.rows_from(max(anchor_row, 1))
+        if state["anchor"] is not None:
+            anchor = fetched[0] if fetched else None
+            if anchor is None or anchor[:2] != state["anchor"]:
+                # The sheet changed behind our back: rebuild the mirror
+                self.reset()
+                return self.sync(source)
+            fetched = fetched[1:]
+
+        consumed = len(fetched)
+        rows = [row for row in fetched if _is_data_row(row)]
+        if rows:
+            table = to_table(rows)
+            state["version"] += 1
+            pq.write_table(table, os.path.join(self.directory, f"part-{state['version']:08d}.parquet"))
+            state["rows"] += table.num_rows
+            state["last_timestamp"] = max(state["last_timestamp"], max(row[0] for row in rows))
+        if consumed:
+            state["next_row"] += consumed
+            last = fetched[-1]
+            state["anchor"] = list(last[:2])
+        self._save_state(state)
+        if len(self.parts()) > MAX_PARTS:
+            self.compact()
+        return len(rows)
+
+    def compact(self):
+        """Merge every part file into one."""
+        parts = self.parts()
+        if len(parts) <= 1:
+            return
+        table = self.read()
+        merged = os.path.join(self.directory, f"part-{self.state()['version']:08d}-c.parquet")
+        pq.write_table(table, merged + ".tmp")
+        os.replace(merged + ".tmp", merged)
+        for path in parts:
+            if path != merged:
+                os.remove(path)
+
+    def read(self, columns=None):
+        """The mirrored rows as one Arrow table."""
+        parts = self.parts()
+        if not parts:
+            return SCHEMA.empty_table().select(columns) if columns else SCHEMA.empty_table()
+        return pa.concat_tables(pq.read_table(path, columns=columns, schema=SCHEMA) for path in parts)
+
+
+# ---------------- AGGREGATES ----------------
+INSTITUTION_TYPES = (
+    ("University / research", ("univ", "università", "universita", "research", "institute", "istituto", "school", "college")),
+    ("Government / agency", ("agency", "agenzia", "ministry", "ministero", "government", "authority", "asl", "efsa", "izs", "regione")),
+    ("Company", ("company", "azienda", "srl", "s.r.l", "spa", "s.p.a", "ltd", "inc", "gmbh", "industry", "food")),
+)
+
+EXPERIENCE_BINS = (0, 3, 6, 11, 21)
+EXPERIENCE_LABELS = ("0-2 years", "3-5 years", "6-10 years", "11-20 years", "21+ years")
+
+
+def institution_types(institutions):
+    """Institution type of each free-text institution (first matching rule wins)."""
+    text = pc.utf8_lower(pc.utf8_trim_whitespace(pc.fill_null(institutions, "")))
+    types = pc.if_else(pc.equal(text, ""), "Not given", "Other")
+    for label, keywords in reversed(INSTITUTION_TYPES):
+        match = pc.match_substring(text, keywords[0])
+        for keyword in keywords[1:]:
+            match = pc.or_(match, pc.match_substring(text, keyword))
+        types = pc.if_else(match, label, types)
+    return types
+
+
+def experience_bins(years):
+    """Experience bin label of each ``years_experience`` value."""
+    values = pc.fill_null(years, -1).to_numpy(zero_copy_only=False)
+    labels = np.asarray(EXPERIENCE_LABELS + ("Not given",))
+    index = np.where(values >= 0, np.digitize(values, EXPERIENCE_BINS) - 1, len(EXPERIENCE_LABELS))
+    return pa.array(labels[index], pa.string())
+
+
+def with_groups(table):
+    """``table`` plus ``role``, ``institution_type`` and ``experience`` group columns."""
+    roles = pc.utf8_capitalize(pc.utf8_trim_whitespace(pc.utf8_lower(pc.fill_null(table["job_role"], ""))))
+    roles = pc.if_else(pc.equal(roles, ""), "Not given", roles)
+    return (table.append_column("role", roles)
+                 .append_column("institution_type", institution_types(table["institution"]))
+                 .append_column("experience", experience_bins(table["years_experience"])))
+
+
+def score_by(table, column):
+    """final_score count / mean / approximate median / min / max per ``column``."""
+    stats = table.group_by(column).aggregate([
+        ("final_score", "count"), ("final_score", "mean"), ("final_score", "approximate_median"),
+        ("final_score", "min"), ("final_score", "max"),
+    ])
+    return stats.sort_by([("final_score_count", "descending")])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mirror the HoliRisk submission sheet into local Parquet files.")
+    parser.add_argument("command", choices=["sync", "rebuild", "stats"])
+    parser.add_argument("--dir", help="mirror directory (default HOLIRISK_MIRROR_DIR or ~/.holirisk/mirror)")
+    parser.add_argument("--fixture", help="CSV laid out like the sheet, instead of the live sheet")
+    args = parser.parse_args(argv)
+
+    mirror = Mirror(args.dir)
+    if args.command == "stats":
+        table = with_groups(mirror.read())
+        print(f"{table.num_rows} rows mirrored")
+        for column in ("role", "institution_type", "experience"):
+            print(score_by(table, column).to_pandas().to_string(index=False))
+        return 0
+
+    if args.fixture:
+        source = CsvSheetSource(args.fixture)
+    else:
+        secrets = None
+        secrets_path = os.path.join(HERE, ".streamlit", "secrets.toml")
+        if os.path.exists(secrets_path):
+            import tomllib
+
+            with open(secrets_path, "rb") as f:
+                secrets = tomllib.load(f)
+        source = default_source(secrets)
+    if args.command == "rebuild":
+        mirror.reset()
+    added = mirror.sync(source)
+    print(f"{added} new rows, {mirror.state()['rows']} mirrored", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
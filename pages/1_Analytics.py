@@ -0,0 +1,97 @@
+import plotly.graph_objects as go
+import pyarrow.compute as pc
+import streamlit as st
+
+from mirror import Mirror, default_source, score_by, with_groups
+from scoring import RISK_LEVELS
+
+st.set_page_config(page_title="HoliRisk – Analytics", layout="wide")
+
+
+@st.cache_resource
+def submission_mirror():
+    # Parquet mirror of the "HoliRisk Data Logger" sheet (see mirror.py)
+    return Mirror()
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def sync_mirror():
+    # Pulls only the rows added since the last sync, at most every 5 minutes
+    return submission_mirror().sync(default_source(st.secrets))
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def mirrored_table(version):
+    return with_groups(submission_mirror().read())
+
+
+GROUPS = {
+    "Job role": "role",
+    "Institution type": "institution_type",
+    "Years of experience": "experience",
+}
+# Groups shown in the charts (largest first)
+MAX_GROUPS = 12
+
+st.title("📈 Submission Analytics")
+
+col_sync, col_info = st.columns([1, 3])
+with col_sync:
+    if st.button("🔄 Sync now"):
+        sync_mirror.clear()
+try:
+    with st.spinner("Syncing new submissions..."):
+        sync_mirror()
+except Exception as e:
+    st.warning(f"⚠️ Could not reach the submission sheet, showing the last synced data. ({e})")
+
+state = submission_mirror().state()
+table = mirrored_table(state["version"])
+with col_info:
+    st.caption(f"{table.num_rows:,} submissions mirrored · last one from {state['last_timestamp'] or '–'}")
+
+if table.num_rows == 0:
+    st.info("No submissions yet.")
+    st.stop()
+
+group_label = st.radio("Group by", list(GROUPS), horizontal=True)
+column = GROUPS[group_label]
+
+stats = score_by(table, column)
+top = stats[column].to_pylist()[:MAX_GROUPS]
+
+st.subheader(f"📊 Final score by {group_label.lower()}")
+st.dataframe(
+    stats.to_pandas().rename(columns={
+        column: group_label,
+        "final_score_count": "Submissions",
+        "final_score_mean": "Mean score",
+        "final_score_approximate_median": "Median score",
+        "final_score_min": "Min",
+        "final_score_max": "Max",
+    }).round(2),
+    hide_index=True,
+)
+
+groups = table[column]
+scores = table["final_score"]
+box = go.Figure([
+    go.Box(y=pc.filter(scores, pc.equal(groups, name)).to_numpy(zero_copy_only=False), name=name, boxpoints="outliers")
+    for name in top
+])
+box.update_layout(template="plotly_white", height=450, showlegend=False, yaxis_title="Final score",
+                  margin=dict(l=10, r=10, t=30, b=10))
+st.plotly_chart(box)
+
+st.subheader(f"🚦 Risk levels by {group_label.lower()}")
+counts = table.group_by([column, "risk_level"]).aggregate([("final_score", "count")])
+counts = {(g, level): n for g, level, n in zip(counts[column].to_pylist(), counts["risk_level"].to_pylist(),
+                                                counts["final_score_count"].to_pylist())}
+totals = {name: sum(n for (g, _), n in counts.items() if g == name) for name in top}
+bars = go.Figure([
+    go.Bar(x=top, y=[counts.get((name, level), 0) / totals[name] for name in top], name=level)
+    for level in RISK_LEVELS
+])
+bars.update_layout(template="plotly_white", barmode="stack", height=450, yaxis=dict(tickformat=".0%"),
+                   legend=dict(orientation="h", y=-0.25), margin=dict(l=10, r=10, t=30, b=10))
+st.plotly_chart(bars)
@@ -0,0 +1,131 @@
+import pandas as pd
+import streamlit as st
+
+from charts import comparison_bars
+from compare import DOMAIN_NAMES, compare, comparison_context, custom_row, preset_row, scenario_frame
+from presets import default_sources, open_store
+from report_jobs import Busy, comparison_pdf, default_jobs, request_key
+from scoring import LEVELS
+
+st.set_page_config(page_title="HoliRisk – Compare scenarios", layout="wide")
+
+
+@st.cache_resource
+def preset_store():
+    return open_store()
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def sync_presets():
+    return preset_store().sync(default_sources())
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_comparison(df):
+    # One vectorized scoring call for every scenario of the table
+    return compare(df)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def cached_chart(names, contributions, final_scores):
+    return comparison_bars(names, dict(contributions), final_scores)
+
+
+DEFAULT_PRESETS = ["RTE Salad – Standard", "RTE Salad – Simulation 1", "RTE Salad – Simulation 2"]
+PRESET_PAGE = 200
+REPORT_POLL_SECONDS = 0.5
+
+st.title("⚖️ Compare scenarios")
+sync_presets()
+store = preset_store()
+
+# ---------------- SCENARIOS ----------------
+prefix = st.text_input("🔍 Search presets", placeholder="Start of a name, e.g. RTE Chicken")
+selected = st.session_state.setdefault("compare_presets", [n for n in DEFAULT_PRESETS if n in store])
+options = list(dict.fromkeys(selected + store.names(prefix.strip(), limit=PRESET_PAGE)))
+chosen = st.multiselect("Presets to compare", options, key="compare_presets")
+custom_rows = st.number_input("➕ Custom scenarios", min_value=0, max_value=50, value=0, step=1)
+
+rows = [preset_row(name, store.get(name)) for name in chosen if name in store]
+rows += [custom_row(f"Custom {i + 1}") for i in range(int(custom_rows))]
+if not rows:
+    st.info("Pick at least one preset or add a custom scenario.")
+    st.stop()
+
+level_columns = {
+    column: st.column_config.SelectboxColumn(column, options=list(LEVELS[column]), required=True)
+    for column in LEVELS
+}
+st.caption("Edit any cell to adjust a scenario; rows can be added or removed.")
+edited = st.data_editor(
+    scenario_frame(rows),
+    key=f"compare_editor_{hash((tuple(chosen), int(custom_rows)))}",
+    num_rows="dynamic",
+    hide_index=True,
+    column_config={
+        "scenario": st.column_config.TextColumn("Scenario", required=True),
+        "rr_score": st.column_config.NumberColumn("Risk Ranger", min_value=0, max_value=100),
+        "base": st.column_config.NumberColumn("Base", min_value=1.0, max_value=9.99),
+        "exponent": st.column_config.NumberColumn("Exponent", min_value=0, max_value=30, step=1),
+        "total_population": st.column_config.NumberColumn("Population", min_value=1, format="%d"),
+        **level_columns,
+    },
+)
+
+# ---------------- RESULTS ----------------
+results, skipped = cached_comparison(pd.DataFrame(edited))
+if skipped:
+    st.warning(f"⚠️ Left out (incomplete or unknown levels): {', '.join(skipped)}")
+if results.empty:
+    st.stop()
+
+names = tuple(results["scenario"])
+contributions = tuple((label, tuple(results[f"contrib_{d}"])) for d, label in DOMAIN_NAMES.items())
+st.plotly_chart(cached_chart(names, contributions, tuple(results["final_score"])))
+
+st.dataframe(
+    results[["scenario", "final_score", "risk_level", "illness_factor", "category",
+             *(f"contrib_{d}" for d in DOMAIN_NAMES)]].rename(columns={
+        "scenario": "Scenario", "final_score": "Final score", "risk_level": "Risk level",
+        "illness_factor": "Illness factor (%)", "category": "Illness category",
+        **{f"contrib_{d}": label for d, label in DOMAIN_NAMES.items()},
+    }).round(2),
+    hide_index=True,
+)
+
+# ---------------- COMPARISON PDF ----------------
+# Built on the server-wide report pool (see report_jobs.py), like the single reports
+
+
+@st.fragment(run_every=REPORT_POLL_SECONDS)
+def report_progress(job_id):
+    job = default_jobs().get(job_id)
+    if job is None or not job.active:
+        st.rerun()
+    st.progress(job.progress, text=f"⏳ {job.message}")
+
+
+ctx = comparison_context(results)
+key = request_key(ctx, build=comparison_pdf)
+report = st.session_state.get("compare_job")
+job = default_jobs().get(report[0]) if report and report[1] == key else None
+
+if st.button("📄 Generate comparison report (PDF)", disabled=job is not None and job.active):
+    try:
+        job = default_jobs().submit(ctx, build=comparison_pdf)
+        st.session_state["compare_job"] = (job.id, key)
+    except Busy:
+        st.warning("⏳ The server is busy building other reports. Please try again in a few seconds.")
+
+if job is not None:
+    if job.active:
+        report_progress(job.id)
+    elif job.state == "done":
+        st.download_button(
+            label="📥 Download comparison report (PDF)",
+            data=job.result,
+            file_name="HoliRisk_Scenario_Comparison.pdf",
+            mime="application/pdf",
+        )
+    else:
+        st.error(f"❌ The comparison report could not be generated: {job.error}")
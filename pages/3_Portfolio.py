@@ -0,0 +1,132 @@
+import io
+import os
+import time
+
+import pandas as pd
+import streamlit as st
+
+from portfolio import Portfolio, store_presets
+from presets import default_sources, open_store
+from scoring import LEVELS, RISK_LEVELS, risk_level_index
+
+st.set_page_config(page_title="HoliRisk – Portfolio", layout="wide")
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "fixtures", "portfolio.csv")
+TOP_MAX = 100
+PAIR_PAGE = 200
+LEVEL_LABELS = {
+    "economic": "💸 Economic Impact", "political": "📢 Political/Media Sensitivity",
+    "trust": "🛒 Consumer Trust Loss", "market": "🔗 Market Disruption",
+    "w_health": "⚕️ Health Weight", "w_econ": "💸 Economic Weight", "w_pol": "📢 Political Weight",
+    "w_trust": "🛒 Consumer Trust Weight", "w_market": "🔗 Market Weight",
+    "hospitalization_factor": "🏥 Impact on National Sanitary System",
+}
+
+
+@st.cache_resource
+def preset_store():
+    return open_store()
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def sync_presets():
+    return preset_store().sync(default_sources())
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def read_table(name, data):
+    if name.lower().endswith((".parquet", ".pq")):
+        return pd.read_parquet(io.BytesIO(data))
+    return pd.read_csv(io.BytesIO(data))
+
+
+st.title("🗂️ Portfolio")
+st.caption("Every product–hazard pair scored at once, ranked and rolled up. Editing one pair re-scores only that pair.")
+
+# ---------------- SOURCE ----------------
+source = st.radio("Portfolio", ["Example portfolio", "Preset catalogue", "Upload a file"], horizontal=True)
+if source == "Upload a file":
+    upload = st.file_uploader("CSV or Parquet with pair, product, hazard[, site] and the scoring inputs",
+                              type=["csv", "parquet"])
+    if upload is None:
+        st.stop()
+    key = ("upload", upload.name, upload.size)
+elif source == "Preset catalogue":
+    sync_presets()
+    key = ("presets", preset_store().count())
+else:
+    key = ("fixture", os.path.getmtime(FIXTURE))
+
+# The portfolio is per session: updates change it in place
+if st.session_state.get("portfolio_key") != key:
+    try:
+        with st.spinner("Scoring the portfolio..."):
+            if source == "Upload a file":
+                portfolio = Portfolio(read_table(upload.name, upload.getvalue()), k=TOP_MAX)
+            elif source == "Preset catalogue":
+                portfolio = Portfolio.from_presets(store_presets(preset_store()), k=TOP_MAX)
+            else:
+                portfolio = Portfolio.load(FIXTURE, k=TOP_MAX)
+    except (ValueError, KeyError) as e:
+        st.error(f"❌ The portfolio could not be scored: {e}")
+        st.stop()
+    st.session_state["portfolio"] = portfolio
+    st.session_state["portfolio_key"] = key
+portfolio = st.session_state["portfolio"]
+
+# ---------------- OVERVIEW ----------------
+totals = portfolio.totals
+col1, col2, col3 = st.columns(3)
+col1.metric("Pairs", f"{totals['pairs']:,}")
+col2.metric("Mean final score", f"{totals['score'] / max(totals['pairs'], 1):.2f}")
+col3.metric("High societal risk", f"{totals['levels'][-1]:,}")
+
+k = st.number_input("Top pairs", min_value=1, max_value=TOP_MAX, value=20)
+st.dataframe(portfolio.top(int(k)).round(2), hide_index=True)
+
+tabs = st.tabs(["By product", "By hazard", "By domain"])
+with tabs[0]:
+    st.dataframe(portfolio.rollup("product").round(2))
+with tabs[1]:
+    st.dataframe(portfolio.rollup("hazard").round(2))
+with tabs[2]:
+    st.dataframe(portfolio.domains().round(3))
+
+st.download_button("📥 Download every pair's scores (CSV)", portfolio.frame().to_csv(index=False).encode("utf-8"),
+                   file_name="HoliRisk_portfolio.csv", mime="text/csv")
+
+# ---------------- UPDATE A PAIR ----------------
+st.header("✏️ Update a pair")
+prefix = st.text_input("🔍 Search pairs", placeholder="Start of a pair name").strip().casefold()
+names = [name for name in portfolio.pairs if name.casefold().startswith(prefix)][:PAIR_PAGE]
+if not names:
+    st.info("No pair starts with that name.")
+    st.stop()
+pair = st.selectbox("Pair", names)
+current = portfolio.values(pair)
+
+with st.form("portfolio_update"):
+    changes = {
+        "rr_score": st.slider("Risk Ranger Score (0–100)", 0, 100, int(round(current["rr_score"]))),
+        "base": st.number_input("Estimated Illness (Base)", min_value=0.0, value=float(current["base"])),
+        "exponent": st.number_input("Exponent", min_value=0, max_value=30, value=int(current["exponent"])),
+        "total_population": st.number_input("Total Population at Risk", min_value=1,
+                                            value=int(current["total_population"])),
+    }
+    for name, label in LEVEL_LABELS.items():
+        options = list(LEVELS[name])
+        index = list(LEVELS[name].values()).index(current[name]) if current[name] in LEVELS[name].values() else 0
+        changes[name] = st.selectbox(label, options, index=index)
+    submitted = st.form_submit_button("Re-score this pair")
+
+if submitted:
+    start = time.perf_counter()
+    score = portfolio.update(pair, **changes)
+    elapsed = time.perf_counter() - start
+    st.session_state["portfolio_updated"] = (pair, score, elapsed)
+    st.rerun()
+
+if "portfolio_updated" in st.session_state:
+    pair, score, elapsed = st.session_state["portfolio_updated"]
+    level = RISK_LEVELS[risk_level_index(score)]
+    st.success(f"✅ {pair}: final score {score:.2f} – {level} (re-scored in {elapsed * 1e3:.1f} ms)")
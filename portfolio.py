@@ -0,0 +1,290 @@
+"""Portfolio scoring: every product–hazard pair at once.
+
+A portfolio is a table with one row per pair: a unique ``pair`` name, its
+``product``, ``hazard`` and (optional) ``site``, and the scoring.INPUTS
+columns, level inputs as labels or values (``hospitalization`` is accepted
+for ``hospitalization_factor``). Portfolio scores it in batches of
+score_batch() calls and, while doing so, keeps the ``k`` highest final
+scores in a min-heap, so the ranking never needs a full sort.
+
+Alongside the scores it keeps running sums per product and per hazard
+(pairs, score, domain contributions in score points, pairs at each risk
+level) and for the whole portfolio. update() re-scores a single pair and
+applies the difference to those sums and to the heap, instead of scoring the
+portfolio again; only when a pair drops out of the top ``k`` is the heap
+refilled, from the stored scores.
+
+    python portfolio.py data/fixtures/portfolio.csv --top 10 --by hazard
+    python portfolio.py --presets --top 5
+"""
+import argparse
+import heapq
+import sys
+
+import numpy as np
+import pandas as pd
+
+from batch_score import iter_chunks
+from compare import DOMAIN_NAMES
+from presets import IMPACT_FIELDS, WEIGHT_INPUTS, facets, open_store
+from scoring import DOMAINS, INPUTS, LEVELS, RISK_LEVELS, hospitalization_options, score_batch, to_numeric
+
+GROUPS = ("product", "hazard")
+BATCH = 100_000
+
+
+class Portfolio:
+    """Scores, top-``k`` heap and per-group running sums of a pair table."""
+
+    def __init__(self, df, k=20, batch=BATCH):
+        df = df.rename(columns={"hospitalization": "hospitalization_factor"})
+        missing = [c for c in ("pair", "product", "hazard", *INPUTS) if c not in df.columns
+                   and c != "hospitalization_factor"]
+        if missing:
+            raise ValueError(f"Missing portfolio column(s): {', '.join(missing)}")
+        df = df.reset_index(drop=True)
+        self.pairs = df["pair"].astype(str).to_numpy(dtype=object)
+        if pd.Series(self.pairs).duplicated().any():
+            dupes = pd.Series(self.pairs)[pd.Series(self.pairs).duplicated()].unique()[:5]
+            raise ValueError(f"Duplicate pair names: {list(dupes)}")
+        self.site = (df["site"].fillna("").astype(str) if "site" in df.columns
+                     else pd.Series("", index=df.index)).to_numpy(dtype=object)
+        # Own, writable copies: update() changes them in place
+        self.inputs = {c: np.array(to_numeric(df[c], c), dtype=float) for c in INPUTS if c in df.columns}
+        self.inputs.setdefault("hospitalization_factor", np.ones(len(df)))
+        self._position = {pair: i for i, pair in enumerate(self.pairs)}
+        self.codes = {}
+        self.groups = {}
+        for column in GROUPS:
+            codes, names = pd.factorize(df[column].fillna("").astype(str))
+            self.codes[column], self.groups[column] = codes, names.to_numpy(dtype=object)
+
+        self.k = k
+        n = len(df)
+        self.final_score = np.empty(n)
+        self.contributions = np.empty((n, len(DOMAINS)))
+        self.level = np.empty(n, dtype=np.intp)
+        self._heap = []
+        for start in range(0, n, batch):
+            self._score_rows(slice(start, min(start + batch, n)))
+        self._top = {i for _, i in self._heap}
+        self._sums()
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def __contains__(self, pair):
+        return pair in self._position
+
+    def values(self, pair):
+        """Current scoring.INPUTS values of ``pair``."""
+        i = self._position[pair]
+        return {name: float(values[i]) for name, values in self.inputs.items()}
+
+    # ---------------- SCORING ----------------
+    def _score_rows(self, rows):
+        out = score_batch(**{c: v[rows] for c, v in self.inputs.items()})
+        scores = out["final_score"]
+        self.final_score[rows] = scores
+        self.contributions[rows] = np.column_stack([out[f"norm_{d}"] / 100 * scores for d in DOMAINS])
+        self.level[rows] = out["risk_level"]
+        # Streaming top-k: only the batch's own k best can enter the heap
+        candidates = np.argpartition(-scores, self.k - 1)[:self.k] if len(scores) > self.k else range(len(scores))
+        for j in candidates:
+            self._offer(float(scores[j]), rows.start + int(j))
+
+    def _offer(self, score, i):
+        """Put pair ``i`` in the heap if it is among the k best; returns the
+        pair it pushed out (None if none, ``i`` itself if it did not enter)."""
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, (score, i))
+            return None
+        if (score, i) > self._heap[0]:
+            return heapq.heapreplace(self._heap, (score, i))[1]
+        return i
+
+    def _sums(self):
+        levels = len(RISK_LEVELS)
+        self.totals = {"pairs": len(self), "score": self.final_score.sum(), "contributions": self.contributions.sum(0),
+                       "levels": np.bincount(self.level, minlength=levels)}
+        self._group_sums = {}
+        for column in GROUPS:
+            codes, size = self.codes[column], len(self.groups[column])
+            self._group_sums[column] = {
+                "pairs": np.bincount(codes, minlength=size),
+                "score": np.bincount(codes, self.final_score, minlength=size),
+                "contributions": np.column_stack([np.bincount(codes, self.contributions[:, d], minlength=size)
+                                                  for d in range(len(DOMAINS))]),
+                "levels": np.bincount(codes * levels + self.level, minlength=size * levels).reshape(size, levels),
+            }
+
+    def _refill(self):
+        # A pair left the top k: take the new k best from the stored scores
+        n = min(self.k, len(self))
+        best = np.argpartition(-self.final_score, n - 1)[:n] if len(self) > n else np.arange(n)
+        self._heap = [(float(self.final_score[i]), int(i)) for i in best]
+        heapq.heapify(self._heap)
+        self._top = {i for _, i in self._heap}
+
+    # ---------------- UPDATES ----------------
+    def update(self, pair, **inputs):
+        """Change some scoring.INPUTS of ``pair`` (labels or values) and re-score
+        that pair only. Returns its new final score."""
+        i = self._position[pair]
+        unknown = [name for name in inputs if name not in self.inputs]
+        if unknown:
+            raise ValueError(f"Not a scoring input: {', '.join(unknown)}")
+        values = {name: _value(name, value) for name, value in inputs.items()}
+        for name, value in values.items():
+            self.inputs[name][i] = value
+        old_score, old_contributions, old_level = self.final_score[i], self.contributions[i].copy(), self.level[i]
+
+        out = score_batch(**{c: v[i:i + 1] for c, v in self.inputs.items()})
+        score = float(out["final_score"][0])
+        self.final_score[i] = score
+        self.contributions[i] = [out[f"norm_{d}"][0] / 100 * score for d in DOMAINS]
+        self.level[i] = out["risk_level"][0]
+
+        # Running sums: remove the pair's old values, add the new ones
+        delta_score = score - old_score
+        delta_contributions = self.contributions[i] - old_contributions
+        self.totals["score"] += delta_score
+        self.totals["contributions"] += delta_contributions
+        self.totals["levels"][old_level] -= 1
+        self.totals["levels"][self.level[i]] += 1
+        for column in GROUPS:
+            g, sums = self.codes[column][i], self._group_sums[column]
+            sums["score"][g] += delta_score
+            sums["contributions"][g] += delta_contributions
+            sums["levels"][g, old_level] -= 1
+            sums["levels"][g, self.level[i]] += 1
+
+        # Ranking
+        if i in self._top:
+            if score >= self._heap[0][0] or len(self) <= self.k:
+                self._heap = [(score, i) if j == i else (s, j) for s, j in self._heap]
+                heapq.heapify(self._heap)
+            else:
+                self._refill()
+        else:
+            evicted = self._offer(score, i)
+            if evicted != i:
+                self._top.add(i)
+                self._top.discard(evicted)
+        return score
+
+    # ---------------- RESULTS ----------------
+    def top(self, k=None):
+        """The ``k`` (at most the portfolio's ``k``) highest-scoring pairs, best first."""
+        ranked = sorted(self._heap, reverse=True)[:k]
+        rows = np.fromiter((i for _, i in ranked), dtype=np.intp, count=len(ranked))
+        return self.frame(rows)
+
+    def frame(self, rows=slice(None)):
+        """Pairs (all, or ``rows``) with their scores and domain contributions."""
+        return pd.DataFrame({
+            "pair": self.pairs[rows],
+            "product": self.groups["product"][self.codes["product"][rows]],
+            "hazard": self.groups["hazard"][self.codes["hazard"][rows]],
+            "site": self.site[rows],
+            "final_score": self.final_score[rows],
+            "risk_level": pd.Categorical.from_codes(self.level[rows], RISK_LEVELS),
+            **{f"contrib_{d}": self.contributions[rows, j] for j, d in enumerate(DOMAINS)},
+        })
+
+    def rollup(self, by="product"):
+        """Per-``by`` (product or hazard) pairs, mean final score, pairs at each
+        risk level and mean domain contributions (score points)."""
+        if by not in GROUPS:
+            raise ValueError(f"by must be one of {GROUPS}")
+        sums = self._group_sums[by]
+        pairs = sums["pairs"]
+        keep = pairs > 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out = pd.DataFrame({
+                "pairs": pairs,
+                "mean_score": sums["score"] / pairs,
+                **{level: sums["levels"][:, j] for j, level in enumerate(RISK_LEVELS)},
+                **{DOMAIN_NAMES[d]: sums["contributions"][:, j] / pairs for j, d in enumerate(DOMAINS)},
+            }, index=pd.Index(self.groups[by], name=by))
+        return out[keep].sort_values("mean_score", ascending=False)
+
+    def domains(self):
+        """Portfolio-wide mean contribution of each domain (score points) and
+        its share of the mean final score."""
+        mean = self.totals["contributions"] / max(self.totals["pairs"], 1)
+        total = mean.sum()
+        return pd.DataFrame({
+            "mean_points": mean,
+            "share": mean / total if total > 0 else np.zeros_like(mean),
+        }, index=pd.Index([DOMAIN_NAMES[d] for d in DOMAINS], name="domain"))
+
+    # ---------------- SOURCES ----------------
+    @classmethod
+    def load(cls, path, k=20):
+        return cls(pd.concat(iter_chunks(path, 1_000_000), ignore_index=True), k=k)
+
+    @classmethod
+    def from_presets(cls, presets, k=20):
+        """Portfolio of ``presets`` ({name: preset}), with product, hazard and
+        variant (as the site) from presets.facets()."""
+        rows = []
+        for name, preset in presets.items():
+            product, hazard, variant = facets(name, preset)
+            row = {"pair": name, "product": product, "hazard": hazard or "(unspecified)", "site": variant,
+                   "rr_score": preset["rr_score"], "base": preset["illness_base"],
+                   "exponent": preset["illness_exponent"], "total_population": preset["population"],
+                   "hospitalization_factor": preset.get("hospitalization") or next(iter(hospitalization_options))}
+            for field in IMPACT_FIELDS:
+                row[field] = preset[field]
+            for key, column in WEIGHT_INPUTS.items():
+                row[column] = preset["weights"][key]
+            rows.append(row)
+        return cls(pd.DataFrame(rows), k=k)
+
+
+def _value(name, value):
+    """Model value of one input given as a level label or a number."""
+    try:
+        return float(LEVELS[name].get(value, value) if name in LEVELS else value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Unknown {name} level: {value!r}") from None
+
+
+def store_presets(store, limit=None):
+    """{name: preset} of every preset indexed by a PresetStore."""
+    return {name: store.get(name) for name in store.names(limit=limit or store.count())}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score and rank a portfolio of product–hazard pairs.")
+    parser.add_argument("portfolio", nargs="?", help="CSV or Parquet pair table")
+    parser.add_argument("--presets", action="store_true", help="use the preset catalogue as the portfolio")
+    parser.add_argument("--top", type=int, default=20, help="number of pairs to rank")
+    parser.add_argument("--by", choices=GROUPS, default="product", help="roll-up level")
+    parser.add_argument("--out", help="write every pair's scores to this CSV/Parquet")
+    args = parser.parse_args(argv)
+    if not args.portfolio and not args.presets:
+        parser.error("give a portfolio file or --presets")
+
+    portfolio = (Portfolio.from_presets(store_presets(open_store()), k=args.top) if args.presets
+                 else Portfolio.load(args.portfolio, k=args.top))
+    with pd.option_context("display.width", 200, "display.max_columns", 20):
+        print(f"Top {args.top} of {len(portfolio)} pairs:")
+        print(portfolio.top()[["pair", "final_score", "risk_level"]].round(2).to_string(index=False))
+        print(f"\nBy {args.by}:")
+        print(portfolio.rollup(args.by).round(2).to_string())
+        print("\nDomains:")
+        print(portfolio.domains().round(3).to_string())
+    if args.out:
+        frame = portfolio.frame()
+        if args.out.lower().endswith((".parquet", ".pq")):
+            frame.to_parquet(args.out, index=False)
+        else:
+            frame.to_csv(args.out, index=False)
+        print(f"Wrote {len(frame)} pairs to {args.out}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,331 @@
+"""Scenario preset store.
+
+Presets are data: JSON (or YAML, with PyYAML installed) files holding either
+``{name: preset}`` or a list of presets with a ``name`` field. The built-in
+ones live in ``data/presets/builtin.json``; further directories are listed in
+``HOLIRISK_PRESET_DIRS`` (``os.pathsep``-separated).
+
+PresetStore indexes them in SQLite (``HOLIRISK_PRESET_DB``) by product,
+hazard and simulation variant and by lower-cased name for prefix search.
+sync() only re-reads files whose size or mtime changed, and the sidebar only
+ever queries a page of names, so startup and reruns don't grow with the
+catalogue. A preset's payload is loaded when it is selected.
+
+Every preset is validated on import (see validate()): unknown level labels,
+missing fields or numbers the sidebar widgets cannot show reject that
+preset, not the whole file; whole-number floats (``"illness_exponent": 3.0``)
+are stored as the int the widgets expect.
+
+    python presets.py validate data/presets/client.json
+    python presets.py list --product "RTE Salad"
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+
+from scoring import LEVELS, hospitalization_options
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BUILTIN_PATH = os.path.join(HERE, "data", "presets", "builtin.json")
+FILE_EXTENSIONS = (".json", ".yaml", ".yml")
+
+# Preset weight key -> model input
+WEIGHT_INPUTS = {"health": "w_health", "economic": "w_econ", "political": "w_pol", "trust": "w_trust", "market": "w_market"}
+
+# Numeric field -> (type, min, max) of the sidebar widget that shows it
+NUMERIC_FIELDS = {
+    "rr_score": (int, 0, 100),
+    "illness_base": (float, 0.0, None),
+    "illness_exponent": (int, 0, 30),
+    "population": (int, 1, None),
+}
+IMPACT_FIELDS = ("economic", "political", "trust", "market")
+
+# Names are "<product> – <variant>" unless the preset says otherwise
+NAME_SEPARATOR = " – "
+
+# Bumped when import rules change, so indexed files are imported again
+SCHEMA_VERSION = 2
+
+
+class PresetError(ValueError):
+    pass
+
+
+# ---------------- VALIDATION ----------------
+def validate(preset):
+    """List of problems with ``preset`` (empty when it can be used)."""
+    if not isinstance(preset, dict):
+        return ["not an object"]
+    problems = []
+    for field, (kind, low, high) in NUMERIC_FIELDS.items():
+        value = preset.get(field)
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value:
+            problems.append(f"{field} must be a number")
+        elif kind is int and value != int(value):
+            problems.append(f"{field} must be a whole number")
+        elif value < low or (high is not None and value > high):
+            problems.append(f"{field} must be between {low} and {high}" if high is not None
+                            else f"{field} must be at least {low}")
+    for field in IMPACT_FIELDS:
+        if preset.get(field) not in LEVELS[field]:
+            problems.append(f"unknown {field} level {preset.get(field)!r}")
+    weights = preset.get("weights")
+    if not isinstance(weights, dict):
+        problems.append("weights must be an object")
+    else:
+        for key, name in WEIGHT_INPUTS.items():
+            if weights.get(key) not in LEVELS[name]:
+                problems.append(f"unknown {key} weight level {weights.get(key)!r}")
+    if "hospitalization" in preset and preset["hospitalization"] not in hospitalization_options:
+        problems.append(f"unknown hospitalization level {preset['hospitalization']!r}")
+    return problems
+
+
+def normalize(preset):
+    """Copy of a valid ``preset`` with its numeric fields of the type their
+    widget takes (st.number_input rejects an int value with float bounds)."""
+    preset = dict(preset)
+    for field, (kind, _, _) in NUMERIC_FIELDS.items():
+        preset[field] = kind(preset[field])
+    return preset
+
+
+def facets(name, preset):
+    """(product, hazard, variant) of a preset, from its fields or its name."""
+    product, _, variant = name.partition(NAME_SEPARATOR)
+    return (
+        str(preset.get("product") or product).strip(),
+        str(preset.get("hazard") or "").strip(),
+        str(preset.get("variant") or variant).strip(),
+    )
+
+
+# ---------------- FILES ----------------
+def load_file(path):
+    """{name: preset} from a JSON/YAML preset file."""
+    with open(path, encoding="utf-8") as f:
+        if path.lower().endswith((".yaml", ".yml")):
+            import yaml
+
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    if isinstance(data, list):
+        presets = {}
+        for item in data:
+            if not isinstance(item, dict) or "name" not in item:
+                raise PresetError(f"{path}: list entries need a 'name'")
+            presets[str(item["name"])] = {k: v for k, v in item.items() if k != "name"}
+        return presets
+    if isinstance(data, dict):
+        return {str(name): preset for name, preset in data.items()}
+    raise PresetError(f"{path}: expected an object or a list of presets")
+
+
+def preset_files(directories):
+    for directory in directories:
+        if os.path.isfile(directory):
+            yield os.path.abspath(directory)
+            continue
+        for root, _, files in os.walk(directory):
+            for file_name in sorted(files):
+                if file_name.lower().endswith(FILE_EXTENSIONS):
+                    yield os.path.abspath(os.path.join(root, file_name))
+
+
+def default_sources():
+    extra = os.environ.get("HOLIRISK_PRESET_DIRS", "")
+    return [BUILTIN_PATH] + [d for d in extra.split(os.pathsep) if d]
+
+
+def default_db_path():
+    return os.environ.get("HOLIRISK_PRESET_DB") or os.path.join(os.path.expanduser("~"), ".holirisk", "presets.sqlite3")
+
+
+# ---------------- STORE ----------------
+class PresetStore:
+    """SQLite index over preset files."""
+
+    def __init__(self, path):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self.errors = []
+        with self._lock:
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                self._conn.executescript("DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS presets;"
+                                         f"PRAGMA user_version = {SCHEMA_VERSION};")
+            self._conn.executescript(
+                "CREATE TABLE IF NOT EXISTS files ("
+                " path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, errors TEXT NOT NULL);"
+                "CREATE TABLE IF NOT EXISTS presets ("
+                " name TEXT PRIMARY KEY, search TEXT NOT NULL, product TEXT NOT NULL, hazard TEXT NOT NULL,"
+                " variant TEXT NOT NULL, path TEXT NOT NULL, payload TEXT NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS presets_search ON presets (search);"
+                "CREATE INDEX IF NOT EXISTS presets_product ON presets (product, search);"
+                "CREATE INDEX IF NOT EXISTS presets_hazard ON presets (hazard, search);"
+                "CREATE INDEX IF NOT EXISTS presets_variant ON presets (variant, search);"
+                "CREATE INDEX IF NOT EXISTS presets_path ON presets (path);"
+            )
+
+    def sync(self, sources):
+        """Bring the index up to date with the preset files under ``sources``.
+
+        Unchanged files are skipped; files that disappeared are dropped.
+        Returns the number of files (re)imported; problems are in ``errors``.
+        """
+        seen = set()
+        imported = 0
+        with self._lock:
+            known = {path: (size, mtime) for path, size, mtime in
+                     self._conn.execute("SELECT path, size, mtime_ns FROM files")}
+        for path in preset_files(sources):
+            seen.add(path)
+            st = os.stat(path)
+            if known.get(path) != (st.st_size, st.st_mtime_ns):
+                self._import(path, st)
+                imported += 1
+        with self._lock:
+            self._conn.execute("BEGIN")
+            for path in set(known) - seen:
+                self._conn.execute("DELETE FROM presets WHERE path = ?", (path,))
+                self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+            self._conn.execute("COMMIT")
+            self.errors = [f"{path}: {error}" for path, errors in
+                           self._conn.execute("SELECT path, errors FROM files WHERE errors != '[]' ORDER BY path")
+                           for error in json.loads(errors)]
+        return imported
+
+    def _import(self, path, st):
+        errors = []
+        rows = []
+        try:
+            presets = load_file(path)
+        except (OSError, ValueError, ImportError) as e:
+            presets = {}
+            errors.append(str(e))
+        for name, preset in presets.items():
+            problems = validate(preset)
+            if problems:
+                errors.append(f"{name}: {'; '.join(problems)}")
+                continue
+            rows.append((name, name.casefold(), *facets(name, preset), path,
+                         json.dumps(normalize(preset), ensure_ascii=False)))
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.execute("DELETE FROM presets WHERE path = ?", (path,))
+            self._conn.executemany("INSERT OR REPLACE INTO presets VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                               (path, st.st_size, st.st_mtime_ns, json.dumps(errors, ensure_ascii=False)))
+            self._conn.execute("COMMIT")
+
+    def _where(self, prefix, product, hazard, variant):
+        clauses, params = [], []
+        for column, value in (("product", product), ("hazard", hazard), ("variant", variant)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if prefix:
+            key = prefix.casefold()
+            clauses.append("search >= ? AND search < ?")
+            params += [key, key + "\U0010ffff"]
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def names(self, prefix="", product=None, hazard=None, variant=None, limit=200):
+        """Preset names matching the filters, in name order (at most ``limit``)."""
+        where, params = self._where(prefix, product, hazard, variant)
+        with self._lock:
+            rows = self._conn.execute(f"SELECT name FROM presets{where} ORDER BY search LIMIT ?", (*params, limit))
+            return [name for name, in rows]
+
+    def count(self, prefix="", product=None, hazard=None, variant=None):
+        where, params = self._where(prefix, product, hazard, variant)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM presets{where}", params).fetchone()[0]
+
+    def values(self, column):
+        """Distinct non-empty values of ``product``, ``hazard`` or ``variant``."""
+        if column not in ("product", "hazard", "variant"):
+            raise ValueError(f"Not an indexed column: {column}")
+        with self._lock:
+            rows = self._conn.execute(f"SELECT DISTINCT {column} FROM presets WHERE {column} != '' ORDER BY {column}")
+            return [value for value, in rows]
+
+    def get(self, name):
+        """The preset called ``name``; KeyError if there is none."""
+        with self._lock:
+            row = self._conn.execute("SELECT payload FROM presets WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return json.loads(row[0])
+
+    def __contains__(self, name):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM presets WHERE name = ?", (name,)).fetchone() is not None
+
+
+def open_store(path=None, sources=None):
+    """PresetStore at ``path`` (default HOLIRISK_PRESET_DB), synced with ``sources``."""
+    store = PresetStore(path or default_db_path())
+    store.sync(default_sources() if sources is None else sources)
+    return store
+
+
+def builtin_presets():
+    """The presets shipped with HoliRisk, by name."""
+    return load_file(BUILTIN_PATH)
+
+
+def preset_inputs(preset, hospitalization_choice=None):
+    """Numeric scoring.INPUTS values of a preset, as the sidebar would set them
+    (without a ``hospitalization`` level the first one is the default)."""
+    if hospitalization_choice is None:
+        hospitalization_choice = preset.get("hospitalization") or next(iter(hospitalization_options))
+    inputs = {
+        "rr_score": preset["rr_score"],
+        "base": preset["illness_base"],
+        "exponent": preset["illness_exponent"],
+        "total_population": preset["population"],
+    }
+    for name in IMPACT_FIELDS:
+        inputs[name] = LEVELS[name][preset[name]]
+    for key, name in WEIGHT_INPUTS.items():
+        inputs[name] = LEVELS[name][preset["weights"][key]]
+    inputs["hospitalization_factor"] = hospitalization_options[hospitalization_choice]
+    return inputs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate and query HoliRisk preset files.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    check = sub.add_parser("validate", help="check preset files or directories")
+    check.add_argument("paths", nargs="+")
+    listing = sub.add_parser("list", help="list indexed presets")
+    listing.add_argument("prefix", nargs="?", default="")
+    for column in ("product", "hazard", "variant"):
+        listing.add_argument(f"--{column}")
+    listing.add_argument("--limit", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    if args.command == "validate":
+        store = PresetStore(":memory:")
+        store.sync(args.paths)
+        for error in store.errors:
+            print(error, file=sys.stderr)
+        print(f"{store.count()} valid presets, {len(store.errors)} problems", file=sys.stderr)
+        return 1 if store.errors else 0
+
+    store = open_store()
+    for name in store.names(args.prefix, args.product, args.hazard, args.variant, args.limit):
+        print(name)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+"""Personal-information check of the free-text submission fields.
+
+The survey asks for a job role, an institution and anonymous feedback, and
+the data must stay anonymous: find() flags contact details and identity cues
+in Italian and English so the page can ask the user to remove them before
+anything is saved.
+
+Two kinds of evidence, each found in one left-to-right pass over the text:
+
+- cue phrases ("mi chiamo", "contact me", "il mio numero", ...) through an
+  Aho–Corasick automaton, compiled once into a transition table; case and
+  whitespace variants are folded into the table, so the text is not copied
+  or lowercased, and matches must start and end on word boundaries ("tel"
+  does not fire inside "hotel"),
+- structured identifiers through one compiled regular expression: email
+  addresses, Italian, international and North American phone numbers,
+  IBANs (mod-97 checked), Italian tax codes and card numbers (Luhn checked).
+  Every alternative has bounded repetition and rejects matches that start
+  inside a longer word or number, so the scan stays linear on long pasted
+  texts. A phone number needs a leading ``+``/``00``, an Italian mobile
+  operator prefix or the separators of a written number ("06 1234 5678",
+  "312-555-0199"); a bare digit run such as
+  "0123456" or "312 455 7890" is only reported within CUE_WINDOW characters
+  of a phone cue ("telefono", "call me"), so lot numbers, VAT numbers and
+  sample counts pass.
+
+default_detector() is built once per process and shared.
+
+    >>> [f.kind for f in default_detector().find("Scrivimi a mario.rossi@example.it")]
+    ['cue', 'email']
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+Finding = namedtuple("Finding", "kind start end text")
+
+# Identity and contact cues; matched case-insensitively on word boundaries
+CUE_PHRASES = (
+    # Italian
+    "mi chiamo", "il mio nome", "il mio cognome", "sono nato", "sono nata", "nato il", "nata il",
+    "contattami", "contattatemi", "scrivimi", "scrivetemi", "chiamami", "chiamatemi",
+    "il mio numero", "il mio cellulare", "il mio telefono", "il mio indirizzo", "la mia email",
+    "la mia mail", "la mia e-mail", "cellulare", "telefono", "tel.", "cell.", "whatsapp",
+    "abito in", "abito a", "vivo a", "residente a", "residente in", "via mail", "indirizzo email",
+    "codice fiscale", "carta di credito", "carta d'identità", "chiocciola",
+    # English
+    "my name is", "my surname is", "i was born", "born on", "date of birth",
+    "contact me", "email me", "e-mail me", "mail me", "write to me", "call me", "text me", "reach me",
+    "my number", "my phone", "my mobile", "my address", "my email", "my e-mail",
+    "phone number", "mobile number", "telephone", "i live in", "i live at",
+    "social security", "passport number", "credit card", "linkedin.com/in",
+)
+
+# Cue phrases that make a nearby bare digit run a phone number
+PHONE_CUES = frozenset((
+    "contattami", "contattatemi", "chiamami", "chiamatemi", "il mio numero", "il mio cellulare",
+    "il mio telefono", "cellulare", "telefono", "tel.", "cell.", "whatsapp",
+    "contact me", "call me", "text me", "reach me", "my number", "my phone", "my mobile",
+    "phone number", "mobile number", "telephone",
+))
+CUE_WINDOW = 40
+
+KIND_LABELS = {
+    "cue": "contact or identity details",
+    "email": "an email address",
+    "phone": "a phone number",
+    "iban": "a bank account (IBAN)",
+    "tax_code": "a tax code",
+    "card": "a card number",
+}
+
+# Separators of local numbers; not "/", which is how dates and references are written
+_SEP = r"[ .\-]?"
+# Rest of a date after its first digit (0[1-9] days and months: 05-2023,
+# 01.01.2020, 02-2024-0001), so landlines don't fire on dates and lot numbers
+_DATE_TAIL = r"\d[.\-](?:\d{1,2}[.\-])?(?:19|20)?\d{2}(?!\d)"
+_INTL = r"[1-9](?:[ .\-/()]{0,2}\d){6,13}(?!\d)"
+# Start of a local number: not inside a word, number, decimal or reference
+_LOCAL_START = r"(?<![\w+.,/\-]0)(?!" + _DATE_TAIL + ")"
+# Every alternative starts with a character class and checks the character
+# before it with a fixed-width lookbehind, so the engine can skip ahead to
+# candidate characters; emails are anchored on "@" (or "[at]") and their
+# local part is found by _local_start().
+PATTERNS = {
+    "email": r"@(?:[A-Za-z0-9\-]++\.)++[A-Za-z]{2,}|[\[(](?i:at|chiocciola)[\])] ?[A-Za-z0-9\-]++",
+    "phone": (
+        # +39 333 1234567, 0044 20 7946 0958
+        rf"\+(?<![\w+]\+){_INTL}|0(?<![\w+]0)0{_INTL}"
+        # Italian mobiles (operator prefix 32x-39x + 7 digits)
+        rf"|3(?<![\w+.,]3)(?:[2-4]\d|5[01]|6[0-8]|7[0-37]|8[0-389]|9[0-37])(?:{_SEP}\d){{7}}(?!\d)"
+        # Landlines / UK numbers: 0 + 5-10 digits, area code and separated groups
+        rf"|0{_LOCAL_START}(?=[1-9](?:{_SEP}\d){{4,9}}(?![\d.,]\d|\d))[1-9]\d{{0,3}}(?:[ .\-]\d{{2,8}}){{1,3}}"
+        r"(?![\d.,]\d|\d)"
+        # North American (312) 555-0199, 312-555-0199, 312.555.0199
+        r"|\((?<![\w+.,(]\()[2-9][0-8]\d\) ?[2-9]\d{2}[ .\-]\d{4}(?!\d)"
+        r"|[2-9](?<![\w+.,(][2-9])[0-8]\d(?:-[2-9]\d{2}-|\.[2-9]\d{2}\.)\d{4}(?!\d)"
+    ),
+    # Digit runs shaped like a phone number without its separators: phones
+    # only near a phone cue (see CUED_KINDS)
+    "bare_phone": (
+        rf"0{_LOCAL_START}[1-9]\d{{4,9}}(?![\d.,]\d|\d)"
+        r"|[2-9](?<![\w+.,(\-][2-9])[0-8]\d ?[2-9]\d{2} ?\d{4}(?![\d.,]\d|\d)"
+    ),
+    "iban": r"[A-Z](?<![A-Za-z0-9][A-Z])[A-Z]\d{2}(?: ?[A-Z0-9]){11,30}(?![A-Za-z0-9])",
+    "tax_code": (r"[A-Za-z](?<![A-Za-z0-9][A-Za-z])[A-Za-z]{5}\d{2}[ABCDEHLMPRSTabcdehlmprst]"
+                 r"\d{2}[A-Za-z]\d{3}[A-Za-z](?![A-Za-z0-9])"),
+    "card": r"\d(?<![\d\w]\d)(?:[ \-]?\d){12,18}(?!\d)",
+}
+
+_LOCAL = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_.%+-")
+
+# Characters that match a space of a cue phrase
+_SPACES = " \t\n\r\xa0"
+
+
+_DOUBLED = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+
+
+def _luhn(digits):
+    total = sum(map(int, digits[-1::-2])) + sum(_DOUBLED[int(d)] for d in digits[-2::-2])
+    return total % 10 == 0
+
+
+def _iban(value):
+    """Length of the longest mod-97 valid IBAN at the start of ``value``
+    (spaces removed), or 0."""
+    for length in range(min(len(value), 34), 14, -1):
+        candidate = value[:length]
+        digits = "".join(str(int(c, 36)) for c in candidate[4:] + candidate[:4])
+        if int(digits) % 97 == 1:
+            return length
+    return 0
+
+
+def _near(start, end, cues):
+    """Whether a cue ends up to CUE_WINDOW characters before ``start`` or
+    begins up to CUE_WINDOW characters after ``end``."""
+    return any(0 <= start - f.end <= CUE_WINDOW or 0 <= f.start - end <= CUE_WINDOW for f in cues)
+
+
+def _local_start(text, at):
+    """Start of the email local part ending at ``at`` (the "@" or "[at]");
+    ``at`` itself when there is none."""
+    start = at - 1 if at and text[at] != "@" and text[at - 1] == " " else at
+    while start and text[start - 1] in _LOCAL:
+        start -= 1
+    return start if start < at and text[start] != " " else at
+
+
+# Kinds only reported within CUE_WINDOW characters of a PHONE_CUES cue, as the mapped kind
+CUED_KINDS = {"bare_phone": "phone"}
+
+VALIDATORS = {
+    "iban": lambda text: _iban(text.replace(" ", "")) > 0,
+    "card": lambda text: _luhn(text.replace(" ", "").replace("-", "")),
+}
+
+
+class PiiDetector:
+    """Aho–Corasick automaton of cue phrases plus the compiled identifier patterns."""
+
+    def __init__(self, phrases=CUE_PHRASES, patterns=PATTERNS):
+        self.phrases = tuple(dict.fromkeys(p.strip().lower() for p in phrases if p.strip()))
+        self._delta, self._lengths = self._build(self.phrases)
+        # Checksummed kinds first; when a checksum fails, the other kinds get
+        # their chance at the same position (an Amex number looks like a mobile)
+        kinds = sorted(patterns, key=lambda kind: kind not in VALIDATORS)
+        self._pattern = self._compile({kind: patterns[kind] for kind in kinds})
+        self._unchecked = self._compile({kind: patterns[kind] for kind in kinds if kind not in VALIDATORS})
+
+    @staticmethod
+    def _compile(patterns):
+        return re.compile("|".join(f"(?P<{kind}>{p})" for kind, p in patterns.items()))
+
+    @staticmethod
+    def _build(phrases):
+        # Trie
+        goto = [{}]
+        lengths = [()]
+        for phrase in phrases:
+            state = 0
+            for ch in phrase:
+                if ch not in goto[state]:
+                    goto.append({})
+                    lengths.append(())
+                    goto[state][ch] = len(goto) - 1
+                state = goto[state][ch]
+            lengths[state] += (len(phrase),)
+
+        # Failure links, breadth first; complete every state's transitions
+        # (the DFA form) so the scan never follows a failure link
+        fail = [0] * len(goto)
+        delta = [dict(edges) for edges in goto]
+        queue = list(goto[0].values())
+        for state in queue:
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f][ch] if state and ch in goto[f] else 0
+                lengths[nxt] += lengths[fail[nxt]]
+            for ch, nxt in delta[fail[state]].items():
+                delta[state].setdefault(ch, nxt)
+
+        # Case and whitespace variants share the transitions of their key
+        for edges in delta:
+            for ch, nxt in list(edges.items()):
+                variants = _SPACES if ch == " " else {ch.upper(), ch.title()}
+                for variant in variants:
+                    if len(variant) == 1:
+                        edges.setdefault(variant, nxt)
+        return delta, lengths
+
+    def _cues(self, text):
+        delta, lengths = self._delta, self._lengths
+        found = []
+        state = 0
+        for end, ch in enumerate(text, 1):
+            state = delta[state].get(ch, 0)
+            if lengths[state]:
+                for length in lengths[state]:
+                    start = end - length
+                    if ((start == 0 or not text[start - 1].isalnum())
+                            and (end == len(text) or not text[end].isalnum() or not text[end - 1].isalnum())):
+                        found.append(Finding("cue", start, end, text[start:end]))
+        return found
+
+    def find(self, text):
+        """Findings in ``text``, in order of position."""
+        if not text:
+            return []
+        found = self._cues(text)
+        phone_cues = [f for f in found if " ".join(f.text.lower().split()) in PHONE_CUES]
+        for m in self._pattern.finditer(text):
+            kind = m.lastgroup
+            if kind in VALIDATORS and not VALIDATORS[kind](m.group()):
+                m = self._unchecked.match(text, m.start())
+                if m is None:
+                    continue
+                kind = m.lastgroup
+            start = m.start()
+            if kind in CUED_KINDS:
+                if not _near(start, m.end(), phone_cues):
+                    continue
+                kind = CUED_KINDS[kind]
+            if kind == "email":
+                start = _local_start(text, start)
+                if start == m.start():
+                    continue
+            found.append(Finding(kind, start, m.end(), text[start:m.end()]))
+        found.sort(key=lambda f: (f.start, f.end))
+        return found
+
+    def scan(self, fields):
+        """{field: findings} of the fields of ``fields`` ({name: text}) with any."""
+        out = {}
+        for name, text in fields.items():
+            found = self.find(text or "")
+            if found:
+                out[name] = found
+        return out
+
+
+@lru_cache(maxsize=1)
+def default_detector():
+    """The process-wide detector (built once, shared by every session)."""
+    return PiiDetector()
+
+
+def describe(findings):
+    """Readable list of what ``findings`` contain, e.g. "an email address, a phone number"."""
+    kinds = dict.fromkeys(f.kind for f in findings)
+    return ", ".join(KIND_LABELS[k] for k in kinds)
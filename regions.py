@@ -0,0 +1,192 @@
+"""Region-stratified scoring.
+
+``total_population`` is one number, so the illness factor and the logistic
+multiplier normally describe a whole country. RegionTable loads a region
+population table (CSV or Parquet) once and scores a scenario in every region
+in one vectorized pass: each region gets its own population and its share of
+the scenario's estimated cases, and scoring.rescore_cases() evaluates all of
+them against the scenario's domain terms, which are computed once.
+
+The table needs a ``region`` code (e.g. a NUTS-3 id) and a ``population``
+column; ``name`` and ``case_share`` (relative weight of each region in the
+case allocation) are optional. Cases are allocated
+
+- ``"population"``: in proportion to population (every region then has the
+  national illness factor; useful as a baseline),
+- ``"share"``: in proportion to ``case_share``,
+- explicitly, by passing ``cases`` as {region code: cases} (regions not
+  listed get none), e.g. from surveillance counts.
+
+Codes are kept sorted, so a prefix (``"IT"``, ``"ITC4"``) selects a contiguous
+slice without scanning the table, and rollup() aggregates regions to a
+shorter code prefix (NUTS-3 to NUTS-2, ...) and re-scores the aggregates.
+
+    python regions.py regions.csv --preset "RTE Salad – Standard" --allocation share --out by_region.csv
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from batch_score import iter_chunks
+from presets import builtin_presets, preset_inputs
+from scoring import CATEGORIES, RISK_LEVELS, domain_terms, rescore_cases
+
+ALLOCATIONS = ("population", "share")
+CONTEXT_INPUTS = ("economic", "political", "trust", "market", "w_health", "w_econ", "w_pol", "w_trust", "w_market")
+
+
+class RegionTable:
+    """Region codes, names, populations and case shares, sorted by code."""
+
+    def __init__(self, df):
+        missing = [c for c in ("region", "population") if c not in df.columns]
+        if missing:
+            raise ValueError(f"Region table needs column(s): {', '.join(missing)}")
+        df = df.assign(region=df["region"].astype(str).str.strip()).sort_values("region", kind="stable")
+        if df["region"].duplicated().any():
+            dupes = df.loc[df["region"].duplicated(), "region"].unique()[:5]
+            raise ValueError(f"Duplicate region codes: {list(dupes)}")
+        self.codes = df["region"].to_numpy(dtype=object)
+        self.names = df["name"].fillna("").astype(str).to_numpy(dtype=object) if "name" in df.columns else self.codes
+        self.population = pd.to_numeric(df["population"], errors="coerce").to_numpy(dtype=float)
+        if np.any(~(self.population > 0)):
+            bad = self.codes[~(self.population > 0)][:5]
+            raise ValueError(f"Populations must be positive numbers: {list(bad)}")
+        self.case_share = (pd.to_numeric(df["case_share"], errors="coerce").fillna(0).to_numpy(dtype=float)
+                           if "case_share" in df.columns else None)
+        self._position = {code: i for i, code in enumerate(self.codes)}
+        # String columns of the result, converted once rather than on every score()
+        self._labels = pd.DataFrame({"region": self.codes, "name": self.names})
+
+    def __len__(self):
+        return len(self.codes)
+
+    @classmethod
+    def load(cls, path):
+        return cls(pd.concat(iter_chunks(path, 1_000_000), ignore_index=True))
+
+    def select(self, prefix=""):
+        """Row slice of the regions whose code starts with ``prefix``."""
+        if not prefix:
+            return slice(0, len(self.codes))
+        lo = np.searchsorted(self.codes, prefix, side="left")
+        hi = np.searchsorted(self.codes, prefix + "\U0010ffff", side="left")
+        return slice(int(lo), int(hi))
+
+    def allocate(self, total_cases, allocation="population", cases=None, rows=slice(None)):
+        """Cases of each region in ``rows``: ``total_cases`` split by
+        ``allocation``, or the explicit {code: cases} of ``cases``."""
+        if cases is not None:
+            out = np.zeros(len(self.codes))
+            for code, value in cases.items():
+                if code in self._position:
+                    out[self._position[code]] = value
+            return out[rows]
+        if allocation == "population":
+            weights = self.population[rows]
+        elif allocation == "share":
+            if self.case_share is None:
+                raise ValueError("allocation='share' needs a case_share column")
+            weights = self.case_share[rows]
+        else:
+            raise ValueError(f"allocation must be one of {ALLOCATIONS}")
+        total = weights.sum()
+        return total_cases * weights / total if total > 0 else np.zeros_like(weights)
+
+    def score(self, inputs, allocation="population", cases=None, prefix=""):
+        """Per-region scores of a scenario (scoring.INPUTS values) as a DataFrame:
+        region, name, population, cases, illness_factor, final_score,
+        risk_level and category. The scenario's estimated cases are allocated
+        over the selected regions; its ``total_population`` is not used."""
+        rows = self.select(prefix)
+        population = self.population[rows]
+        region_cases = self.allocate(inputs["base"] * 10.0 ** inputs["exponent"], allocation, cases, rows)
+        out = _score(inputs, region_cases, population)
+        results = self._labels.iloc[rows].reset_index(drop=True)
+        results["population"] = population
+        results["cases"] = region_cases
+        for column, values in out.items():
+            results[column] = values
+        return results
+
+
+def _score(inputs, cases, population):
+    terms = domain_terms(*(inputs[c] for c in CONTEXT_INPUTS))
+    out = rescore_cases(terms, inputs["rr_score"], cases, 0, population, inputs.get("hospitalization_factor", 1.0))
+    shape = np.shape(cases)
+    # Categoricals: label lookups without materialising one string per region
+    return {
+        "illness_factor": out["illness_factor"],
+        "final_score": np.broadcast_to(out["final_score"], shape),
+        "risk_level": pd.Categorical.from_codes(np.broadcast_to(out["risk_level"], shape), RISK_LEVELS),
+        "category": pd.Categorical.from_codes(np.broadcast_to(out["category"], shape), CATEGORIES),
+    }
+
+
+def rollup(results, inputs, length):
+    """Aggregate score() results to region codes cut to ``length`` characters
+    (e.g. 4 for NUTS-2 from NUTS-3) and re-score the aggregated cases and
+    populations; same columns as score(), ``name`` left empty."""
+    grouped = (results.assign(region=results["region"].str[:length])
+                      .groupby("region", sort=True)[["population", "cases"]].sum())
+    out = _score(inputs, grouped["cases"].to_numpy(), grouped["population"].to_numpy())
+    return pd.DataFrame({
+        "region": grouped.index.to_numpy(),
+        "name": "",
+        "population": grouped["population"].to_numpy(),
+        "cases": grouped["cases"].to_numpy(),
+        **out,
+    })
+
+
+def level_counts(results):
+    """Regions and population at each risk level."""
+    counts = results.groupby("risk_level")["population"].agg(["count", "sum"])
+    counts = counts.reindex(list(RISK_LEVELS), fill_value=0)
+    return counts.rename(columns={"count": "regions", "sum": "population"})
+
+
+def default_regions_path():
+    return os.environ.get("HOLIRISK_REGIONS") or None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a HoliRisk scenario in every region of a population table.")
+    parser.add_argument("regions", help="CSV or Parquet region table (region, population[, name, case_share])")
+    parser.add_argument("--preset", required=True, help="built-in preset to score")
+    parser.add_argument("--cases", type=float, help="estimated cases (default: the preset's)")
+    parser.add_argument("--allocation", choices=ALLOCATIONS, default="population")
+    parser.add_argument("--cases-file", help="CSV with region and cases columns, instead of an allocation")
+    parser.add_argument("--prefix", default="", help="only regions whose code starts with this")
+    parser.add_argument("--rollup", type=int, help="aggregate to codes of this length")
+    parser.add_argument("--out", help="CSV/Parquet output (default: print the risk level counts)")
+    args = parser.parse_args(argv)
+
+    table = RegionTable.load(args.regions)
+    inputs = preset_inputs(builtin_presets()[args.preset])
+    if args.cases is not None:
+        inputs["base"], inputs["exponent"] = args.cases, 0
+    cases = None
+    if args.cases_file:
+        counts = pd.read_csv(args.cases_file, dtype={"region": str})
+        cases = dict(zip(counts["region"].str.strip(), counts["cases"].astype(float)))
+    results = table.score(inputs, args.allocation, cases, args.prefix)
+    if args.rollup:
+        results = rollup(results, inputs, args.rollup)
+
+    if args.out:
+        if args.out.lower().endswith((".parquet", ".pq")):
+            results.to_parquet(args.out, index=False)
+        else:
+            results.to_csv(args.out, index=False)
+        print(f"Wrote {len(results)} regions to {args.out}", file=sys.stderr)
+    else:
+        print(level_counts(results).to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
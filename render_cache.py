@@ -0,0 +1,141 @@
+"""Content-addressed cache for Plotly → PNG renders.
+
+Kaleido starts a headless browser for every export, so rendered images are
+cached by a hash of the figure's data and layout (plus the export size). The
+in-memory tier is a thread-safe LRU shared by every Streamlit session of the
+process; an optional on-disk tier (``HOLIRISK_RENDER_CACHE_DIR``) survives
+restarts. Images are returned as PNG bytes and never written to the working
+directory.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def figure_key(fig, width, height, fmt="png"):
+    """Stable hash of a figure's labels/values/layout and the export settings."""
+    # Key order of to_json() depends on how the figure was built, so canonicalise it
+    canonical = json.dumps(json.loads(fig.to_json()), sort_keys=True, separators=(",", ":"))
+    h = hashlib.sha256(canonical.encode("utf-8"))
+    h.update(f"|{width}x{height}.{fmt}".encode("ascii"))
+    return h.hexdigest()
+
+
+class RenderCache:
+    """LRU cache of rendered images, keyed by figure_key()."""
+
+    def __init__(self, max_entries=64, max_bytes=64 * 1024 * 1024, disk_dir=None, max_disk_entries=1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_entries = max_disk_entries
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self._items)
+
+    # ---------------- MEMORY TIER ----------------
+    def get(self, key):
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return data
+        data = self._disk_get(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._put_locked(key, data)
+        return data
+
+    def put(self, key, data):
+        with self._lock:
+            self._put_locked(key, data)
+        self._disk_put(key, data)
+
+    def _put_locked(self, key, data):
+        old = self._items.pop(key, None)
+        if old is not None:
+            self._bytes -= len(old)
+        self._items[key] = data
+        self._bytes += len(data)
+        while self._items and (len(self._items) > self.max_entries or self._bytes > self.max_bytes):
+            _, evicted = self._items.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    # ---------------- DISK TIER ----------------
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + ".png")
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except OSError:
+            return None
+
+    def _disk_put(self, key, data):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file in the cache dir, then rename atomically
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self._disk_evict()
+
+    def _disk_evict(self):
+        entries = []
+        for root, _, files in os.walk(self.disk_dir):
+            entries += [os.path.join(root, name) for name in files if name.endswith(".png")]
+        if len(entries) <= self.max_disk_entries:
+            return
+        entries.sort(key=lambda p: os.stat(p).st_mtime)
+        for path in entries[:len(entries) - self.max_disk_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    # ---------------- RENDER ----------------
+    def render_png(self, fig, width=800, height=800):
+        """PNG bytes for ``fig``, rendering through Kaleido only on a cache miss."""
+        key = figure_key(fig, width, height)
+        data = self.get(key)
+        if data is None:
+            data = fig.to_image(format="png", width=width, height=height, engine="kaleido")
+            self.put(key, data)
+        return data
+
+
+# Process-wide cache shared by all sessions
+default_cache = RenderCache(disk_dir=os.environ.get("HOLIRISK_RENDER_CACHE_DIR") or None)
+
+
+def render_png(fig, width=800, height=800):
+    """Render ``fig`` to PNG bytes through the process-wide cache."""
+    return default_cache.render_png(fig, width, height)
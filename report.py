@@ -0,0 +1,280 @@
+"""PDF report builder.
+
+build_report() lays out the HoliRisk risk assessment report from a context
+dict (the same values the Streamlit page shows) and returns the PDF bytes; it
+is shared by the "Generate Risk Report" button and ``bulk_reports.py``.
+build_comparison_report() does the same for a side-by-side comparison of
+many scenarios (see ``compare.py``).
+
+The contextual risk breakdown pie is drawn straight onto the ReportLab canvas
+as vector graphics, so building a report needs neither Kaleido nor Chromium.
+Set ``HOLIRISK_PIE_RENDERER=kaleido`` to embed the Plotly PNG instead.
+"""
+import math
+import os
+from io import BytesIO
+
+from reportlab.graphics import renderPDF
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfgen import canvas
+
+# Plotly's default colorway, so the PDF matches the on-screen chart
+PIE_COLORS = ["#636efa", "#EF553B", "#00cc96", "#ab63fa", "#FFA15A",
+              "#19d3f3", "#FF6692", "#B6E880", "#FF97FF", "#FECB52"]
+
+
+def pie_renderer():
+    """'vector' (default) or 'kaleido', from HOLIRISK_PIE_RENDERER."""
+    return os.environ.get("HOLIRISK_PIE_RENDERER", "vector").strip().lower()
+
+
+def pdf_text(text):
+    """Drop characters the standard PDF fonts cannot show (e.g. emoji)."""
+    return text.encode("latin-1", "ignore").decode("latin-1").strip()
+
+
+def pie_drawing(labels, values, size=300):
+    """ReportLab Drawing of a labelled pie (label + percent, like the Plotly chart)."""
+    total = float(sum(values)) or 1.0
+    drawing = Drawing(size, size)
+
+    pie = Pie()
+    pie.x = size * 0.2
+    pie.y = size * 0.2
+    pie.width = pie.height = size * 0.6
+    pie.data = [float(v) for v in values]
+    pie.labels = [f"{pdf_text(label)} {value / total:.1%}" for label, value in zip(labels, values)]
+    pie.startAngle = 90
+    pie.direction = "clockwise"
+    pie.sideLabels = True
+    pie.slices.strokeColor = colors.white
+    pie.slices.strokeWidth = 1
+    pie.slices.fontName = "Helvetica"
+    pie.slices.fontSize = 8
+    for i in range(len(pie.data)):
+        pie.slices[i].fillColor = colors.HexColor(PIE_COLORS[i % len(PIE_COLORS)])
+
+    drawing.add(pie)
+    return drawing
+
+
+def draw_pie(c, x, y, size, labels, values):
+    """Draw the pie as vector graphics with its lower-left corner at (x, y)."""
+    renderPDF.draw(pie_drawing(labels, values, size), c, x, y)
+
+
+# ---------------- REPORT LAYOUT ----------------
+CONTEXT_LABELS = ["⚕️ Health", "💸 Economic", "📢 Political", "🛒 Trust", "🔗 Market"]
+
+# (section header, line templates, gap after the last line); built once and
+# reused by every report
+REPORT_SECTIONS = [
+    ("🧮 Microbiological Inputs:", [
+        "Risk Ranger Score: {rr_score}",
+        "Estimated Illness Base: {base}",
+        "Exponent: {exponent}",
+        "Total Population at Risk: {total_population}",
+    ], 25),
+    ("🌍 Contextual Impact Selections:", [
+        "Economic Impact: {economic_choice}",
+        "Political Sensitivity: {political_choice}",
+        "Consumer Trust Loss: {trust_choice}",
+        "Market Disruption: {market_choice}",
+    ], 25),
+    ("⚖️ Importance Weights:", [
+        "Health Weight: {health_weight_choice}",
+        "Economic Weight: {econ_weight_choice}",
+        "Political Weight: {pol_weight_choice}",
+        "Trust Weight: {trust_weight_choice}",
+        "Market Weight: {market_weight_choice}",
+    ], 25),
+    ("📊 Final Results:", [
+        "Composite Risk Score: {final_score:.2f} / 100 – {risk_level}",
+    ], 15),
+    ("🔹 Factors contributions:", [
+        "⚕️ Health: {norm_health:.1f}%",
+        "💸 Economic: {norm_econ:.1f}%",
+        "📢 Political: {norm_pol:.1f}%",
+        "🛒 Trust: {norm_trust:.1f}%",
+        "🔗 Market: {norm_market:.1f}%",
+    ], 25),
+]
+
+
+def context_slices(norm_values):
+    """Pie labels/values for the non-zero normalized domain contributions."""
+    labels, values = [], []
+    for label, value in zip(CONTEXT_LABELS, norm_values):
+        if value is not None and not math.isnan(value) and value > 0:
+            labels.append(label)
+            values.append(value)
+    return labels, values
+
+
+def warm_up():
+    """Load font metrics once per process (used as the bulk pool initializer)."""
+    for name in ("Helvetica", "Helvetica-Bold", "Helvetica-Oblique"):
+        pdfmetrics.getFont(name)
+
+
+def build_report(ctx, pie_image=None):
+    """Build the risk assessment report and return the PDF bytes.
+
+    ``ctx`` holds the fields used by REPORT_SECTIONS plus ``selected_preset``,
+    ``pie_labels``/``pie_values`` and an optional ``user_feedback``.
+    ``pie_image`` (an ImageReader) replaces the vector pie when given.
+    """
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    y = height - 40
+
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(50, y, "📄 HoliRisk – Risk Assessment Report")
+    y -= 30
+
+    c.setFont("Helvetica", 11)
+    c.drawString(50, y, f"Selected Scenario: {ctx['selected_preset']}")
+    y -= 20
+
+    for header, lines, gap in REPORT_SECTIONS:
+        c.drawString(50, y, header)
+        y -= 15
+        for i, line in enumerate(lines):
+            c.drawString(70, y, line.format(**ctx))
+            y -= gap if i == len(lines) - 1 else 15
+
+    if ctx["pie_values"]:
+        if y > 350:
+            c.drawString(50, y, "🥧 Contextual Risk Pie Chart:")
+        else:
+            c.showPage()
+            y = height - 40
+            c.drawString(50, y, "🥧 Contextual Risk Pie Chart (continued):")
+        y -= 10
+        if pie_image is not None:
+            c.drawImage(pie_image, x=105, y=y - 300, width=300, height=300)
+        else:
+            draw_pie(c, 105, y - 300, 300, ctx["pie_labels"], ctx["pie_values"])
+        y -= 320
+
+    user_feedback = ctx.get("user_feedback")
+    if user_feedback:
+        if y < 100:
+            c.showPage()
+            y = height - 40
+        c.drawString(50, y, "✍️ User Feedback:")
+        y -= 20
+        text = c.beginText(70, y)
+        text.setFont("Helvetica-Oblique", 10)
+        for line in user_feedback.splitlines():
+            text.textLine(line)
+            y -= 14
+        c.drawText(text)
+
+    c.save()
+    return buffer.getvalue()
+
+
+# ---------------- COMPARISON REPORT ----------------
+# Scenarios per bar chart page; the table lists every scenario
+COMPARISON_CHART_PAGE = 8
+
+
+def comparison_drawing(names, domains, contributions, final_scores, width=500, height=300):
+    """ReportLab Drawing of grouped bars: one group per scenario, one bar per
+    domain contribution plus the final score (score points)."""
+    drawing = Drawing(width, height)
+    chart = VerticalBarChart()
+    chart.x, chart.y = 40, 70
+    chart.width, chart.height = width - 60, height - 110
+    chart.data = [[float(v) for v in values] for values in contributions] + [[float(v) for v in final_scores]]
+    chart.valueAxis.valueMin = 0
+    chart.valueAxis.valueMax = max(100.0, max(final_scores, default=0) * 1.05)
+    chart.valueAxis.labels.fontName = "Helvetica"
+    chart.valueAxis.labels.fontSize = 7
+    chart.categoryAxis.categoryNames = [pdf_text(name)[:18] for name in names]
+    chart.categoryAxis.labels.fontName = "Helvetica"
+    chart.categoryAxis.labels.fontSize = 7
+    chart.categoryAxis.labels.angle = 30
+    chart.categoryAxis.labels.boxAnchor = "ne"
+    chart.groupSpacing = 8
+    series_colors = [colors.HexColor(c) for c in PIE_COLORS[:len(contributions)]] + [colors.black]
+    for i, color in enumerate(series_colors):
+        chart.bars[i].fillColor = color
+        chart.bars[i].strokeColor = None
+    drawing.add(chart)
+
+    legend = Legend()
+    legend.x, legend.y = 40, height - 10
+    legend.alignment = "right"
+    legend.columnMaximum = 1
+    legend.fontName = "Helvetica"
+    legend.fontSize = 7
+    legend.colorNamePairs = list(zip(series_colors, [pdf_text(d) for d in domains] + ["Final score"]))
+    drawing.add(legend)
+    return drawing
+
+
+def build_comparison_report(ctx):
+    """Build a scenario comparison report and return the PDF bytes.
+
+    ``ctx`` has a ``title``, the ``domains`` names and ``scenarios``: dicts
+    with ``name``, ``final_score``, ``risk_level``, ``illness_factor`` and
+    ``contributions`` (score points, one per domain), as returned by
+    compare.comparison_context().
+    """
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    scenarios = ctx["scenarios"]
+    domains = ctx["domains"]
+
+    def page_title(text):
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(50, height - 40, pdf_text(text))
+        c.setFont("Helvetica", 11)
+
+    for start in range(0, len(scenarios), COMPARISON_CHART_PAGE):
+        page = scenarios[start:start + COMPARISON_CHART_PAGE]
+        page_title(f"HoliRisk – {ctx['title']}" + (f" ({start + 1}-{start + len(page)} of {len(scenarios)})"
+                                                   if len(scenarios) > COMPARISON_CHART_PAGE else ""))
+        drawing = comparison_drawing(
+            [s["name"] for s in page], domains,
+            [[s["contributions"][i] for s in page] for i in range(len(domains))],
+            [s["final_score"] for s in page],
+        )
+        renderPDF.draw(drawing, c, 50, height - 380)
+        c.showPage()
+
+    # Table: one line per scenario, continued over as many pages as needed
+    columns = [("Scenario", 50), ("Score", 215), ("Risk level", 255), ("Illness %", 380)]
+    columns += [(pdf_text(d)[:5], 430 + 28 * i) for i, d in enumerate(domains)]
+
+    def table_header(y):
+        c.setFont("Helvetica-Bold", 9)
+        for label, x in columns:
+            c.drawString(x, y, label)
+        c.setFont("Helvetica", 9)
+        return y - 14
+
+    page_title(f"HoliRisk – {ctx['title']}: scores")
+    y = table_header(height - 70)
+    for s in scenarios:
+        if y < 50:
+            c.showPage()
+            y = table_header(height - 40)
+        values = [pdf_text(s["name"])[:30], f"{s['final_score']:.2f}", pdf_text(s["risk_level"]),
+                  f"{s['illness_factor']:.4g}"] + [f"{v:.1f}" for v in s["contributions"]]
+        for (_, x), value in zip(columns, values):
+            c.drawString(x, y, value)
+        y -= 13
+
+    c.save()
+    return buffer.getvalue()
@@ -0,0 +1,191 @@
+"""Background PDF report builds.
+
+Building a report (the Kaleido render of the pie, when enabled, then the
+ReportLab layout) used to run inside the Streamlit script and block the
+session until the PDF was ready. ReportJobs runs the builds on a small pool
+shared by every session of the process: submit() returns a Job at once, the
+page polls its progress and shows the download button when it is done.
+
+Concurrency is capped server-wide: at most ``workers`` reports are built at
+a time (``HOLIRISK_REPORT_WORKERS``, default 2) and at most ``max_queued``
+more wait for a worker (``HOLIRISK_REPORT_QUEUE``, default 8). Past that,
+submit() raises Busy instead of queueing. Identical requests share one job,
+and finished jobs (with their PDF bytes) are kept for ``ttl`` seconds so the
+download survives reruns.
+
+The pool builds single-scenario reports (report_pdf()) and scenario
+comparisons (comparison_pdf()); default_jobs() is the one pool of the
+process, shared by every page.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from metrics import EVENTS, REGISTRY, stage
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class Busy(RuntimeError):
+    """Raised by submit() when every worker and queue slot is taken."""
+
+
+class Job:
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.state = QUEUED
+        self.progress = 0.0
+        self.message = "Waiting for a free worker..."
+        self.result = None
+        self.error = None
+        self.submitted = time.monotonic()
+        self.finished = None
+
+    @property
+    def active(self):
+        return self.state in (QUEUED, RUNNING)
+
+    def update(self, progress, message):
+        self.progress = progress
+        self.message = message
+
+
+def report_pdf(ctx, figure=None, job=None, timings=None):
+    """PDF bytes of the report for ``ctx`` (see report.build_report()).
+
+    ``figure`` is the Plotly pie to embed as a PNG; without it the pie is drawn
+    as vector graphics. Progress goes to ``job`` and stage times to ``timings``.
+    """
+    from report import build_report
+
+    progress = job.update if job is not None else (lambda *args: None)
+    pie_image = None
+    if figure is not None:
+        from reportlab.lib.utils import ImageReader
+
+        from render_cache import render_png
+
+        progress(0.1, "Rendering the pie chart...")
+        with stage("pdf_image", timings):
+            pie_image = ImageReader(BytesIO(render_png(figure, width=800, height=800)))
+    progress(0.6, "Laying out the PDF...")
+    with stage("pdf_build", timings):
+        pdf = build_report(ctx, pie_image=pie_image)
+    progress(1.0, "Done")
+    return pdf
+
+
+def comparison_pdf(ctx, figure=None, job=None, timings=None):
+    """PDF bytes of a scenario comparison (see report.build_comparison_report());
+    the bar chart is always drawn as vector graphics, so ``figure`` is unused."""
+    from report import build_comparison_report
+
+    progress = job.update if job is not None else (lambda *args: None)
+    progress(0.2, f"Laying out {len(ctx['scenarios'])} scenarios...")
+    with stage("pdf_compare", timings):
+        pdf = build_comparison_report(ctx)
+    progress(1.0, "Done")
+    return pdf
+
+
+def request_key(ctx, figure=None, build=report_pdf):
+    """Hash of everything that goes into a report."""
+    h = hashlib.sha256(build.__name__.encode("ascii"))
+    h.update(json.dumps(ctx, sort_keys=True, default=str).encode("utf-8"))
+    if figure is not None:
+        h.update(figure.to_json().encode("utf-8"))
+    return h.hexdigest()
+
+
+class ReportJobs:
+    """Bounded pool of report builds shared by every session."""
+
+    def __init__(self, workers=2, max_queued=8, ttl=600.0):
+        self.workers = workers
+        self.max_queued = max_queued
+        self.ttl = ttl
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="holirisk-report")
+        self._jobs = {}
+        self._by_key = {}
+        self._lock = threading.Lock()
+        REGISTRY.gauge("holirisk_report_jobs_running", "Reports being built.", lambda: self.count(RUNNING))
+        REGISTRY.gauge("holirisk_report_jobs_queued", "Reports waiting for a worker.", lambda: self.count(QUEUED))
+
+    def count(self, state):
+        with self._lock:
+            return sum(job.state == state for job in self._jobs.values())
+
+    def submit(self, ctx, figure=None, timings=None, build=report_pdf):
+        """Job running ``build`` (report_pdf() or comparison_pdf()) for ``ctx``;
+        raises Busy when the pool is full."""
+        key = request_key(ctx, figure, build)
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(self._by_key.get(key))
+            if job is not None and job.state != FAILED:
+                return job
+            if sum(job.active for job in self._jobs.values()) >= self.workers + self.max_queued:
+                EVENTS.inc(event="pdf_report_rejected")
+                raise Busy("Too many reports are being built right now")
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._by_key[key] = job.id
+        self._pool.submit(self._run, job, build, ctx, figure, timings)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def position(self, job):
+        """Reports queued ahead of ``job``."""
+        with self._lock:
+            return sum(other.state == QUEUED and other.submitted < job.submitted for other in self._jobs.values())
+
+    def _run(self, job, build, ctx, figure, timings):
+        job.state = RUNNING
+        job.update(0.05, "Starting...")
+        try:
+            job.result = build(ctx, figure, job, timings)
+            job.state = DONE
+            EVENTS.inc(event="pdf_report")
+        except Exception as e:
+            job.error = e
+            job.state = FAILED
+            EVENTS.inc(event="pdf_report_error")
+        finally:
+            job.finished = time.monotonic()
+
+    def _expire(self):
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished is not None and now - job.finished > self.ttl:
+                del self._jobs[job_id]
+                if self._by_key.get(job.key) == job_id:
+                    del self._by_key[job.key]
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_jobs():
+    """The process-wide ReportJobs, sized from HOLIRISK_REPORT_WORKERS /
+    HOLIRISK_REPORT_QUEUE."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ReportJobs(
+                workers=max(int(os.environ.get("HOLIRISK_REPORT_WORKERS", "2")), 1),
+                max_queued=max(int(os.environ.get("HOLIRISK_REPORT_QUEUE", "8")), 0),
+            )
+        return _default
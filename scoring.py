@@ -0,0 +1,315 @@
+"""HoliRisk scoring model.
+
+Vectorized version of the scoring math used by ``app.py``: every function
+accepts scalars or NumPy arrays (broadcast against each other) and scores all
+scenarios in a single pass, so the same code serves the Streamlit page and the
+nightly batch runs (see ``batch_score.py``).
+
+The model constants below and the hospitalization multipliers can be replaced
+by a calibrated parameter set (see ``calibrate.py``): point
+``HOLIRISK_PARAMS`` at its JSON file and every entry point (app, service,
+batch tools) loads it on import.
+"""
+import json
+import os
+
+import numpy as np
+
+# ---------------- MODEL CONSTANTS ----------------
+# Logistic multiplier between 0 and 1
+L = 1.0
+x0 = 0.2
+k = 5
+
+# Power applied to weights (alpha) and impact levels (beta)
+alpha = 1.5
+beta = 1.5
+
+# Names of the constants a parameter set replaces (with the hospitalization multipliers)
+PARAM_NAMES = ("L", "x0", "k", "alpha", "beta")
+# Version of the parameter set in use
+PARAMS_VERSION = "builtin"
+
+# ---------------- LEVELS ----------------
+hospitalization_options = {
+    "None or Minimal hospitalization, 1-5% of hospitalized cases ": 1.0,
+    "Moderate hospitalization, 5-20% of hospitalized cases": 1.25,
+    "Severe hospitalization, 20 to 40% of hospitalized cases": 1.5,
+    "Critical public health emergency, >40% of hospitalized cases": 2.0
+}
+
+economic_levels = {
+    "Insignificant – No cost or loss (e.g., no recall)": 25,
+    "Limited – Local supplier loss (e.g., bakery batch recall)": 50,
+    "Moderate – National product withdrawal (e.g., cheese recall)": 75,
+    "Severe – EU-wide recall or legal sanctions": 100
+}
+political_levels = {
+    "Insignificant – Not publicly visible": 25,
+    "Low – Local media coverage": 50,
+    "Medium – National media attention (e.g., press release)": 75,
+    "High – EU-wide attention, parliamentary debate": 100
+}
+trust_levels = {
+    "Insignificant – No public awareness": 25,
+    "Low – Minor social media concern": 50,
+    "Moderate – Notable drop in trust or loyalty": 75,
+    "High – Public backlash, boycott, lawsuits": 100
+}
+market_levels = {
+    "Insignificant – No disruption to market access": 25,
+    "Mild – Removal from single shop or site": 50,
+    "Moderate – Withdrawal from major retailers": 75,
+    "Severe – Multi-country recall, trade barriers": 100
+}
+
+health_weight_levels = {
+    "Not relevant – No impact on public health decision": 0,
+    "Monitor but not critical": 25,
+    "Significant to public health": 50,
+    "Top priority for decision-makers": 100
+}
+econ_weight_levels = {
+    "Negligible cost concern": 0,
+    "Minor business impact": 25,
+    "Budgetary consideration": 50,
+    "Major economic consequence": 100
+}
+pol_weight_levels = {
+    "Politically neutral": 0,
+    "Local political interest only": 25,
+    "National political/media relevance": 50,
+    "Politically sensitive or explosive": 100
+}
+trust_weight_levels = {
+    "Trust unaffected": 0,
+    "Slight brand concern": 25,
+    "Could impact perception or loyalty": 50,
+    "Trust is key to public reaction": 100
+}
+market_weight_levels = {
+    "Market not affected": 0,
+    "Local distribution only": 25,
+    "Regional disruption possible": 50,
+    "Trade-wide or international effect": 100
+}
+
+# Numeric model input -> label dict used to translate selectbox choices
+LEVELS = {
+    "economic": economic_levels,
+    "political": political_levels,
+    "trust": trust_levels,
+    "market": market_levels,
+    "w_health": health_weight_levels,
+    "w_econ": econ_weight_levels,
+    "w_pol": pol_weight_levels,
+    "w_trust": trust_weight_levels,
+    "w_market": market_weight_levels,
+    "hospitalization_factor": hospitalization_options,
+}
+
+# Order of the model inputs, as accepted by score_batch()
+INPUTS = (
+    "rr_score", "base", "exponent", "total_population",
+    "economic", "political", "trust", "market",
+    "w_health", "w_econ", "w_pol", "w_trust", "w_market",
+    "hospitalization_factor",
+)
+
+DOMAINS = ("health", "econ", "pol", "trust", "market")
+
+# ---------------- THRESHOLDS ----------------
+CATEGORY_THRESHOLDS = (0.01, 0.1, 0.5)
+CATEGORIES = ("🟢 Minimal Risk", "🟡 Low Risk", "🟠 Moderate Risk", "🔴 High Risk")
+
+RISK_THRESHOLDS = (25, 50, 75)
+RISK_LEVELS = (
+    "🟢 Low Societal Risk",
+    "🟡 Moderate Societal Risk",
+    "🟠 Significant Societal Risk",
+    "🔴 High Societal Risk",
+)
+
+
+def risk_level_index(final_score):
+    """Index into RISK_LEVELS for each final score (75 counts as High)."""
+    return np.searchsorted(RISK_THRESHOLDS, final_score, side="right")
+
+
+def category_index(illness_factor):
+    """Index into CATEGORIES for each illness factor (% of population)."""
+    return np.searchsorted(CATEGORY_THRESHOLDS, illness_factor, side="right")
+
+
+def domain_terms(economic, political, trust, market,
+                 w_health, w_econ, w_pol, w_trust, w_market, dtype=np.float64, params=None):
+    """``(w ** alpha, impact ** beta)`` of each domain in DOMAINS (impact is
+    None for health). They don't depend on the Risk Ranger score or the case
+    count, so they can be computed once per scenario and reused (see
+    rescore_cases())."""
+    def arr(x):
+        return np.asarray(x, dtype=dtype)
+
+    p = model_params() if params is None else params
+    weights = [(arr(w) / 100) ** p["alpha"] for w in (w_health, w_econ, w_pol, w_trust, w_market)]
+    impacts = [None] + [(arr(v) / 100) ** p["beta"] for v in (economic, political, trust, market)]
+    return list(zip(weights, impacts))
+
+
+def rescore_cases(terms, rr_score, base, exponent, total_population,
+                  hospitalization_factor=1.0, dtype=np.float64, params=None):
+    """score_batch() from precomputed domain_terms(): only the terms that
+    depend on the Risk Ranger score and the case count are evaluated."""
+    def arr(x):
+        return np.asarray(x, dtype=dtype)
+
+    p = model_params() if params is None else params
+    rr_score = arr(rr_score)
+    estimated_cases = arr(base) * np.power(arr(10.0), arr(exponent))
+    illness_factor = (estimated_cases / arr(total_population)) * 100
+
+    with np.errstate(over="ignore"):
+        multiplier = p["L"] / (1 + np.exp(-p["k"] * (illness_factor - p["x0"])))
+    rr_scaled = rr_score * multiplier
+
+    out = {
+        "estimated_cases": estimated_cases,
+        "illness_factor": illness_factor,
+        "multiplier": multiplier,
+        "rr_scaled": rr_scaled,
+    }
+    total_contrib = 0
+    for name, (weight, impact) in zip(DOMAINS, terms):
+        contrib = rr_scaled * weight
+        if impact is not None:
+            contrib = contrib * impact
+        out[f"{name}_contrib"] = contrib
+        total_contrib = total_contrib + contrib
+    out["total_contrib"] = total_contrib
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for name in DOMAINS:
+            norm = out[f"{name}_contrib"] / total_contrib * 100
+            out[f"norm_{name}"] = np.where(total_contrib > 0, norm, 0).astype(dtype)
+
+    final_score = np.minimum(total_contrib, 100) * arr(hospitalization_factor)
+    out["final_score"] = final_score
+    out["risk_level"] = risk_level_index(final_score)
+    out["category"] = category_index(illness_factor)
+    return out
+
+
+def score_batch(rr_score, base, exponent, total_population,
+                economic, political, trust, market,
+                w_health, w_econ, w_pol, w_trust, w_market,
+                hospitalization_factor=1.0, dtype=np.float64, params=None):
+    """Score any number of scenarios in one vectorized pass.
+
+    Impact levels and weights are the numeric values of the level dicts
+    (e.g. ``economic_levels[choice]``). Returns a dict of arrays with the
+    intermediate terms, the normalized domain contributions (``norm_*``, 0 when
+    every contribution is zero), ``final_score`` and the integer ``risk_level``
+    / ``category`` codes (see RISK_LEVELS / CATEGORIES). ``params`` overrides
+    the model constants (a dict keyed by PARAM_NAMES, see model_params()).
+    """
+    terms = domain_terms(economic, political, trust, market,
+                         w_health, w_econ, w_pol, w_trust, w_market, dtype, params)
+    return rescore_cases(terms, rr_score, base, exponent, total_population, hospitalization_factor, dtype, params)
+
+
+def score_scenario(rr_score, base, exponent, total_population,
+                   economic, political, trust, market,
+                   w_health, w_econ, w_pol, w_trust, w_market,
+                   hospitalization_factor=1.0):
+    """Score a single scenario; same keys as score_batch() with Python scalars
+    and the ``risk_level`` / ``category`` codes replaced by their labels."""
+    out = score_batch(rr_score, base, exponent, total_population,
+                      economic, political, trust, market,
+                      w_health, w_econ, w_pol, w_trust, w_market,
+                      hospitalization_factor)
+    result = {name: float(value) for name, value in out.items()}
+    result["risk_level"] = RISK_LEVELS[int(out["risk_level"])]
+    result["category"] = CATEGORIES[int(out["category"])]
+    return result
+
+
+def to_numeric(column, name):
+    """Translate a Series of level labels to model values (numbers pass through)."""
+    import pandas as pd
+
+    levels = LEVELS.get(name)
+    if levels is None or pd.api.types.is_numeric_dtype(column):
+        return column.to_numpy(dtype=float)
+    # Translate each distinct label once, then gather
+    codes, labels = pd.factorize(column)
+    mapped = pd.to_numeric(pd.Series(labels, dtype=object).map(lambda v: levels.get(v, v)),
+                           errors="coerce").to_numpy(dtype=float)
+    values = np.where(codes >= 0, mapped[codes], np.nan) if len(mapped) else np.full(len(codes), np.nan)
+    if np.isnan(values).any():
+        bad = sorted(set(column[np.isnan(values)].astype(str)))
+        raise ValueError(f"Unknown {name} level(s): {bad[:5]}")
+    return values
+
+
+def score_frame(df, dtype=np.float64):
+    """Score every row of a DataFrame with one column per name in INPUTS.
+
+    Level columns may hold either the numeric value or the selectbox label.
+    ``hospitalization_factor`` is optional (defaults to 1.0). Returns a new
+    DataFrame with ``final_score``, ``risk_level``, ``category``,
+    ``illness_factor`` and the ``norm_*`` domain contributions.
+    """
+    import pandas as pd
+
+    missing = [c for c in INPUTS if c not in df.columns and c != "hospitalization_factor"]
+    if missing:
+        raise ValueError(f"Missing input column(s): {', '.join(missing)}")
+
+    args = {c: to_numeric(df[c], c) for c in INPUTS if c in df.columns}
+    out = score_batch(**args, dtype=dtype)
+    return pd.DataFrame({
+        "illness_factor": out["illness_factor"],
+        "final_score": out["final_score"],
+        "risk_level": np.asarray(RISK_LEVELS)[out["risk_level"]],
+        "category": np.asarray(CATEGORIES)[out["category"]],
+        **{f"norm_{name}": out[f"norm_{name}"] for name in DOMAINS},
+    }, index=df.index)
+
+
+# ---------------- PARAMETER SETS ----------------
+def model_params():
+    """The model constants in use, keyed by PARAM_NAMES."""
+    return {"L": L, "x0": x0, "k": k, "alpha": alpha, "beta": beta}
+
+
+def load_params(path):
+    """Read and check a parameter set written by ``calibrate.py``."""
+    with open(path, encoding="utf-8") as f:
+        params = json.load(f)
+    model = params.get("model", {})
+    missing = [name for name in PARAM_NAMES if not isinstance(model.get(name), (int, float))]
+    if missing:
+        raise ValueError(f"{path}: missing model constant(s) {', '.join(missing)}")
+    hospitalization = params.get("hospitalization", {})
+    if set(hospitalization) != set(hospitalization_options):
+        raise ValueError(f"{path}: hospitalization multipliers must cover exactly the levels {list(hospitalization_options)}")
+    if not all(isinstance(v, (int, float)) and v > 0 for v in hospitalization.values()):
+        raise ValueError(f"{path}: hospitalization multipliers must be positive numbers")
+    return params
+
+
+def use_params(params):
+    """Switch the model to a parameter set (see load_params()).
+
+    The hospitalization multipliers are updated in place, so the label dicts
+    already imported elsewhere (LEVELS, the app's selectbox) follow.
+    """
+    global L, x0, k, alpha, beta, PARAMS_VERSION
+    model = params["model"]
+    L, x0, k, alpha, beta = (float(model[name]) for name in PARAM_NAMES)
+    hospitalization_options.update({label: float(v) for label, v in params["hospitalization"].items()})
+    PARAMS_VERSION = str(params.get("version", "custom"))
+
+
+if os.environ.get("HOLIRISK_PARAMS"):
+    use_params(load_params(os.environ["HOLIRISK_PARAMS"]))
@@ -0,0 +1,193 @@
+"""Headless HTTP scoring service.
+
+Serves the same model as ``app.py`` (scoring.py) to other systems:
+
+- ``GET  /health``       liveness probe;
+- ``POST /score``        one scenario as a JSON object, answered with the
+                         score_scenario() result;
+- ``POST /score/batch``  many scenarios, as JSON lines
+                         (``Content-Type: application/x-ndjson``) or an Arrow IPC
+                         stream (``application/vnd.apache.arrow.stream``), scored
+                         in one vectorized pass and answered in the same format,
+                         one result row per input row.
+
+Fields are the names in scoring.INPUTS; level inputs take either the selectbox
+label or its numeric value, ``hospitalization_factor`` is optional.
+
+    python scoring_service.py --port 8600 --workers 4
+
+The front end is Starlette on uvicorn: an asyncio server with HTTP/1.1
+keep-alive, so clients can reuse one connection for many requests. Batch
+scoring runs in a thread so large requests don't stall the event loop.
+"""
+import argparse
+import json
+import os
+
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from scoring import INPUTS, LEVELS, score_frame, score_scenario
+
+JSON_LINES = "application/x-ndjson"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+# Requests larger than this are refused with 413
+MAX_BODY_BYTES = int(os.environ.get("HOLIRISK_MAX_BODY_BYTES", 64 * 1024 * 1024))
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _level_value(name, value):
+    levels = LEVELS.get(name)
+    if levels is not None and isinstance(value, str):
+        if value not in levels:
+            raise BadRequest(f"Unknown {name} level: {value!r}")
+        return levels[value]
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise BadRequest(f"{name} must be a number" + (" or a level label" if levels else ""))
+    return value
+
+
+def scenario_args(obj):
+    """score_scenario() keyword arguments from a request object."""
+    if not isinstance(obj, dict):
+        raise BadRequest("Expected a JSON object")
+    missing = [name for name in INPUTS if name not in obj and name != "hospitalization_factor"]
+    if missing:
+        raise BadRequest(f"Missing input(s): {', '.join(missing)}")
+    return {name: _level_value(name, obj[name]) for name in INPUTS if name in obj}
+
+
+def read_batch(body, content_type):
+    """DataFrame of scenarios from a JSON lines or Arrow request body."""
+    if content_type == ARROW_STREAM:
+        import pyarrow as pa
+
+        return pa.ipc.open_stream(body).read_pandas()
+    if content_type in (JSON_LINES, "application/jsonl", "application/json"):
+        rows = [json.loads(line) for line in body.splitlines() if line.strip()]
+        for number, row in enumerate(rows, 1):
+            if not isinstance(row, dict):
+                raise BadRequest(f"Row {number}: expected a JSON object")
+        return pd.DataFrame.from_records(rows)
+    raise BadRequest(f"Unsupported content type {content_type!r}; use {JSON_LINES} or {ARROW_STREAM}")
+
+
+def write_batch(df, content_type):
+    if content_type == ARROW_STREAM:
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    return df.to_json(orient="records", lines=True, force_ascii=False).encode("utf-8")
+
+
+def score_body(body, content_type):
+    """Score a batch request body; returns (response bytes, content type)."""
+    try:
+        df = read_batch(body, content_type)
+        scored = score_frame(df)
+    except (KeyError, ValueError) as e:
+        raise BadRequest(str(e)) from e
+    out_type = ARROW_STREAM if content_type == ARROW_STREAM else JSON_LINES
+    return write_batch(scored, out_type), out_type
+
+
+# ---------------- ENDPOINTS ----------------
+async def _body(request):
+    """Request body, or None when it is too large; BadRequest on a malformed Content-Length."""
+    length = request.headers.get("content-length")
+    try:
+        length = None if length is None else int(length)
+    except ValueError:
+        raise BadRequest(f"Invalid Content-Length header: {length!r}") from None
+    if length is not None and length > MAX_BODY_BYTES:
+        return None
+    body = await request.body()
+    return body if len(body) <= MAX_BODY_BYTES else None
+
+
+def _error(message, status=400):
+    return JSONResponse({"error": message}, status_code=status)
+
+
+async def health(request):
+    return JSONResponse({"status": "ok"})
+
+
+async def score(request):
+    try:
+        body = await _body(request)
+    except BadRequest as e:
+        return _error(str(e))
+    if body is None:
+        return _error("Request body too large", 413)
+    try:
+        result = score_scenario(**scenario_args(json.loads(body)))
+    except json.JSONDecodeError as e:
+        return _error(f"Invalid JSON: {e}")
+    except BadRequest as e:
+        return _error(str(e))
+    try:
+        return JSONResponse(result)
+    except ValueError:
+        # NaN/inf scores (e.g. a zero population) are not valid JSON
+        return _error("Scenario does not produce a finite score")
+
+
+async def score_batch(request):
+    try:
+        body = await _body(request)
+    except BadRequest as e:
+        return _error(str(e))
+    if body is None:
+        return _error("Request body too large", 413)
+    content_type = request.headers.get("content-type", JSON_LINES).split(";")[0].strip()
+    try:
+        payload, out_type = await run_in_threadpool(score_body, body, content_type)
+    except json.JSONDecodeError as e:
+        return _error(f"Invalid JSON line: {e}")
+    except BadRequest as e:
+        return _error(str(e))
+    return Response(payload, media_type=out_type)
+
+
+app = Starlette(routes=[
+    Route("/health", health, methods=["GET"]),
+    Route("/score", score, methods=["POST"]),
+    Route("/score/batch", score_batch, methods=["POST"]),
+])
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the HoliRisk scoring model over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--keep-alive", type=int, default=30, help="idle keep-alive timeout (s)")
+    args = parser.parse_args(argv)
+
+    uvicorn.run(
+        "scoring_service:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_keep_alive=args.keep_alive,
+        app_dir=os.path.dirname(os.path.abspath(__file__)),
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Global sensitivity analysis of the HoliRisk score.
+
+Which input drives ``final_score``? Two methods over the scoring model:
+
+- sobol(): first-order and total Sobol indices (Saltelli sampling, Saltelli
+  2010 first-order and Jansen total-effect estimators);
+- morris(): cheap elementary-effects screening (mu*, sigma).
+
+Factors are described by dicts, either continuous ``{"name", "low", "high"}``
+or discrete ``{"name", "levels"}``. Names are scoring.INPUTS entries, plus
+``log10_cases`` for the estimated number of cases. Inputs without a factor
+stay at their value in ``fixed``. Sample matrices are evaluated in chunks with
+scoring.score_batch(), so memory does not grow with the sample size.
+"""
+import math
+
+import numpy as np
+
+from scoring import LEVELS, score_batch
+
+FACTOR_LABELS = {
+    "rr_score": "Risk Ranger Score",
+    "log10_cases": "Estimated cases (log10)",
+    "economic": "Economic impact",
+    "political": "Political sensitivity",
+    "trust": "Consumer trust loss",
+    "market": "Market disruption",
+    "w_health": "Health weight",
+    "w_econ": "Economic weight",
+    "w_pol": "Political weight",
+    "w_trust": "Trust weight",
+    "w_market": "Market weight",
+}
+
+
+def scenario_factors(inputs, rr_span=20, cases_decades=1.0):
+    """Default factors around a scenario: Risk Ranger score ± ``rr_span``,
+    estimated cases ± ``cases_decades`` orders of magnitude, and every level of
+    the four impacts and five weights."""
+    cases = max(inputs["base"] * 10 ** inputs["exponent"], 1e-12)
+    factors = [
+        {"name": "rr_score", "low": max(inputs["rr_score"] - rr_span, 0), "high": min(inputs["rr_score"] + rr_span, 100)},
+        {"name": "log10_cases", "low": math.log10(cases) - cases_decades, "high": math.log10(cases) + cases_decades},
+    ]
+    for name in ("economic", "political", "trust", "market", "w_health", "w_econ", "w_pol", "w_trust", "w_market"):
+        factors.append({"name": name, "levels": sorted(LEVELS[name].values())})
+    return factors
+
+
+def evaluate(unit, factors, fixed):
+    """final_score for each row of ``unit`` (points in [0, 1)^d)."""
+    args = dict(fixed)
+    for j, factor in enumerate(factors):
+        u = unit[:, j]
+        if "levels" in factor:
+            levels = np.asarray(factor["levels"], dtype=float)
+            value = levels[np.minimum((u * len(levels)).astype(int), len(levels) - 1)]
+        else:
+            value = factor["low"] + u * (factor["high"] - factor["low"])
+        if factor["name"] == "log10_cases":
+            args["base"], args["exponent"] = 10 ** value, 0
+        else:
+            args[factor["name"]] = value
+    return np.broadcast_to(score_batch(**args)["final_score"], len(unit))
+
+
+def sobol(factors, fixed, n_samples=10_000, chunk_size=20_000, seed=0):
+    """First-order (``S1``) and total (``ST``) Sobol indices of final_score.
+
+    Costs ``n_samples * (d + 2)`` model evaluations for ``d`` factors.
+    """
+    d = len(factors)
+    rng = np.random.default_rng(seed)
+    n = s_a = s_b = ss = 0.0
+    first = np.zeros(d)
+    total = np.zeros(d)
+
+    for start in range(0, n_samples, chunk_size):
+        size = min(chunk_size, n_samples - start)
+        a = rng.random((size, d))
+        b = rng.random((size, d))
+        f_a = evaluate(a, factors, fixed)
+        f_b = evaluate(b, factors, fixed)
+        for i in range(d):
+            ab = a.copy()
+            ab[:, i] = b[:, i]
+            f_ab = evaluate(ab, factors, fixed)
+            first[i] += np.sum(f_b * (f_ab - f_a))
+            total[i] += np.sum((f_a - f_ab) ** 2)
+        n += size
+        s_a += f_a.sum()
+        s_b += f_b.sum()
+        ss += np.sum(f_a ** 2) + np.sum(f_b ** 2)
+
+    mean = (s_a + s_b) / (2 * n)
+    variance = ss / (2 * n) - mean ** 2
+    if variance <= 0:
+        s1 = st = np.zeros(d)
+    else:
+        s1 = first / n / variance
+        st = total / (2 * n) / variance
+    return {
+        "names": [f["name"] for f in factors],
+        "S1": s1,
+        "ST": st,
+        "variance": variance,
+        "evaluations": int(n * (d + 2)),
+    }
+
+
+def morris(factors, fixed, n_trajectories=200, n_levels=4, chunk_size=2_000, seed=0):
+    """Morris elementary-effects screening: ``mu_star`` (mean |EE|) and ``sigma``.
+
+    Costs ``n_trajectories * (d + 1)`` model evaluations for ``d`` factors.
+    """
+    d = len(factors)
+    rng = np.random.default_rng(seed)
+    delta = n_levels / (2 * (n_levels - 1))
+    grid = np.arange(n_levels // 2) / (n_levels - 1)
+    sum_abs = np.zeros(d)
+    sum_ee = np.zeros(d)
+    sum_sq = np.zeros(d)
+
+    for start in range(0, n_trajectories, chunk_size):
+        r = min(chunk_size, n_trajectories - start)
+        # Each trajectory moves one factor at a time, in random order and direction
+        base = rng.choice(grid, size=(r, d))
+        order = np.argsort(rng.random((r, d)), axis=1)
+        sign = rng.choice([-1.0, 1.0], size=(r, d))
+        start_pt = np.where(sign > 0, base, base + delta)
+        points = np.empty((r, d + 1, d))
+        points[:, 0] = start_pt
+        for step in range(d):
+            points[:, step + 1] = points[:, step]
+            j = order[:, step]
+            points[np.arange(r), step + 1, j] += sign[np.arange(r), j] * delta
+
+        f = evaluate(np.clip(points.reshape(-1, d), 0, 1 - 1e-12), factors, fixed).reshape(r, d + 1)
+        ee = np.empty((r, d))
+        rows = np.arange(r)
+        for step in range(d):
+            j = order[:, step]
+            ee[rows, j] = (f[:, step + 1] - f[:, step]) / (sign[rows, j] * delta)
+        sum_abs += np.abs(ee).sum(axis=0)
+        sum_ee += ee.sum(axis=0)
+        sum_sq += (ee ** 2).sum(axis=0)
+
+    mu = sum_ee / n_trajectories
+    return {
+        "names": [f["name"] for f in factors],
+        "mu_star": sum_abs / n_trajectories,
+        "mu": mu,
+        "sigma": np.sqrt(np.maximum(sum_sq / n_trajectories - mu ** 2, 0)),
+        "evaluations": int(n_trajectories * (d + 1)),
+    }
@@ -0,0 +1,289 @@
+"""Write-behind submission pipeline for the anonymized data log.
+
+Rows submitted from the Streamlit page go into a local durable spool (SQLite)
+and return immediately; a background flusher thread sends them to a sink in
+batches with exponential backoff. Each row carries an idempotency key built
+from the session id, so a row is spooled once and sent once even if a batch
+is retried after an ambiguous failure. Sent rows are kept for
+``retention`` seconds (a week by default) and then pruned, so the spool
+does not grow for the life of the deployment.
+
+Sinks implement ``append_rows(rows, keys)``:
+
+- GoogleSheetsSink: the "HoliRisk Data Logger" sheet, with a single
+  authorized gspread client reused for every batch;
+- FakeSheetsSink: in-memory (optionally CSV-backed) stand-in for offline
+  testing, which can also be told to fail.
+"""
+import csv
+import datetime
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from metrics import EVENTS, REGISTRY, stage
+
+SHEETS_SCOPE = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive"
+]
+SPREADSHEET_NAME = "HoliRisk Data Logger"
+
+# How long sent rows stay in the spool, and how often they are pruned (seconds)
+RETENTION = 7 * 24 * 3600.0
+PRUNE_INTERVAL = 3600.0
+
+# Column of the sheet holding the session id (the idempotency key)
+KEY_COLUMN = 2
+
+# Scenario fields logged after the timestamp and session id, in sheet order
+SCENARIO_COLUMNS = (
+    "selected_preset", "rr_score", "base", "exponent", "total_population",
+    "economic_choice", "political_choice", "trust_choice", "market_choice",
+    "health_weight_choice", "econ_weight_choice", "pol_weight_choice", "trust_weight_choice", "market_weight_choice",
+    "illness_factor", "risk_level", "final_score",
+)
+
+# Full header of the sheet, in column order
+SHEET_COLUMNS = ("timestamp", "session_id", *SCENARIO_COLUMNS,
+                 "job_role", "institution", "years_experience", "user_feedback")
+
+
+def open_worksheet(service_account_info, spreadsheet=SPREADSHEET_NAME):
+    """First worksheet of ``spreadsheet``, through an authorized gspread client."""
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+
+    creds = ServiceAccountCredentials.from_json_keyfile_dict(dict(service_account_info), SHEETS_SCOPE)
+    return gspread.authorize(creds).open(spreadsheet).sheet1
+
+
+def submission_row(scenario, session_id, job_role, institution, years_experience, user_feedback, timestamp=None):
+    """Sheet row for a scored scenario of the page plus the respondent's answers."""
+    if timestamp is None:
+        timestamp = datetime.datetime.now().isoformat()
+    return [timestamp, session_id, *(scenario[c] for c in SCENARIO_COLUMNS),
+            job_role, institution, years_experience, user_feedback]
+
+
+# ---------------- SINKS ----------------
+class Sink(ABC):
+    """Destination of spooled rows."""
+
+    @abstractmethod
+    def append_rows(self, rows, keys):
+        """Append ``rows``; ``keys`` are their idempotency keys (same order)."""
+
+
+class GoogleSheetsSink(Sink):
+    """Appends rows to the first worksheet of a Google spreadsheet."""
+
+    def __init__(self, service_account_info, spreadsheet=SPREADSHEET_NAME):
+        self.service_account_info = dict(service_account_info)
+        self.spreadsheet = spreadsheet
+        self._sheet = None
+        self._uncertain = False
+        self._lock = threading.Lock()
+
+    def _worksheet(self):
+        if self._sheet is None:
+            self._sheet = open_worksheet(self.service_account_info, self.spreadsheet)
+        return self._sheet
+
+    def append_rows(self, rows, keys):
+        with self._lock:
+            sheet = self._worksheet()
+            if self._uncertain:
+                # The last batch may have landed before the error: skip rows already there
+                existing = set(sheet.col_values(KEY_COLUMN))
+                rows = [row for row, key in zip(rows, keys) if key not in existing]
+            if not rows:
+                self._uncertain = False
+                return
+            try:
+                sheet.append_rows(rows, value_input_option="USER_ENTERED")
+            except Exception:
+                self._uncertain = True
+                self._sheet = None
+                raise
+            self._uncertain = False
+
+
+class FakeSheetsSink(Sink):
+    """Local stand-in for the Sheets API; rows are kept in ``self.rows``.
+
+    With ``path`` the rows are also appended to a CSV file. ``fail_next`` makes
+    the next N calls raise, to exercise retries.
+    """
+
+    def __init__(self, path=None, fail_next=0):
+        self.path = path
+        self.fail_next = fail_next
+        self.rows = []
+        self.keys = set()
+        self.calls = 0
+
+    def append_rows(self, rows, keys):
+        self.calls += 1
+        if self.fail_next:
+            self.fail_next -= 1
+            raise ConnectionError("FakeSheetsSink: simulated API failure")
+        new = [(row, key) for row, key in zip(rows, keys) if key not in self.keys]
+        self.rows.extend(row for row, _ in new)
+        self.keys.update(key for _, key in new)
+        if self.path:
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                csv.writer(f).writerows(row for row, _ in new)
+
+
+# ---------------- SPOOL ----------------
+class Spool:
+    """Durable queue of rows waiting to be sent, keyed by idempotency key."""
+
+    def __init__(self, path):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            # Only takes effect on a new file; lets prune() return freed pages
+            self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS spool ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " key TEXT UNIQUE NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " created REAL NOT NULL,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " sent REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS spool_pending ON spool (sent, id)")
+
+    def put(self, key, row):
+        """Spool ``row``; returns False if ``key`` was already spooled."""
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO spool (key, payload, created) VALUES (?, ?, ?)",
+                (key, json.dumps(row, default=str), time.time()),
+            )
+        return cur.rowcount == 1
+
+    def pending(self, limit):
+        """Oldest unsent rows as a list of (id, key, row)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, key, payload FROM spool WHERE sent IS NULL ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        return [(id_, key, json.loads(payload)) for id_, key, payload in rows]
+
+    def mark_sent(self, ids):
+        self._update("UPDATE spool SET sent = ?, attempts = attempts + 1 WHERE id = ?", [(time.time(), i) for i in ids])
+
+    def mark_failed(self, ids):
+        self._update("UPDATE spool SET attempts = attempts + 1 WHERE id = ?", [(i,) for i in ids])
+
+    def _update(self, sql, params):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(sql, params)
+            self._conn.execute("COMMIT")
+
+    def prune(self, older_than):
+        """Delete rows sent before ``older_than`` (a time.time() value); returns
+        the number of rows deleted. Their keys are forgotten, so a row spooled
+        again after this is sent again."""
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM spool WHERE sent < ?", (older_than,))
+            if cur.rowcount:
+                self._conn.execute("PRAGMA incremental_vacuum")
+        return cur.rowcount
+
+    def backlog(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM spool WHERE sent IS NULL").fetchone()[0]
+
+
+# ---------------- PIPELINE ----------------
+class SubmissionPipeline:
+    """Spool rows immediately and flush them to ``sink`` in the background."""
+
+    def __init__(self, sink, spool_path, batch_size=100, interval=2.0, max_backoff=300.0, retention=RETENTION):
+        self.sink = sink
+        self.spool = Spool(spool_path)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.retention = retention
+        self._next_prune = 0.0
+        self.last_error = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        REGISTRY.gauge("holirisk_spool_backlog", "Submitted rows not yet sent to the sink.", self.spool.backlog)
+        self._thread = threading.Thread(target=self._run, name="holirisk-sheets-flusher", daemon=True)
+        self._thread.start()
+
+    def submit(self, key, row):
+        """Queue ``row`` under idempotency ``key``; returns False for a duplicate."""
+        # No wake-up here: rows arriving within one interval go out as one batch
+        return self.spool.put(key, row)
+
+    def flush(self):
+        """Send every pending row now; returns the number of rows sent."""
+        sent = 0
+        while True:
+            batch = self.spool.pending(self.batch_size)
+            if not batch:
+                return sent
+            ids, keys, rows = zip(*batch)
+            try:
+                with stage("sheets_append"):
+                    self.sink.append_rows(list(rows), list(keys))
+            except Exception as e:
+                self.last_error = e
+                self.spool.mark_failed(ids)
+                EVENTS.inc(event="sheets_error")
+                raise
+            self.spool.mark_sent(ids)
+            EVENTS.inc(len(ids), event="sheets_row_sent")
+            self.last_error = None
+            sent += len(ids)
+
+    def _run(self):
+        backoff = self.interval
+        while not self._stop.is_set():
+            self._wake.wait(backoff)
+            self._wake.clear()
+            try:
+                self.flush()
+                backoff = self.interval
+            except Exception:
+                # Exponential backoff with jitter, so retries don't hammer the quota;
+                # the cap comes last, so max_backoff is never exceeded
+                backoff = min(max(backoff, self.interval) * 2 * random.uniform(0.8, 1.2), self.max_backoff)
+            if time.time() >= self._next_prune:
+                self._next_prune = time.time() + PRUNE_INTERVAL
+                try:
+                    self.spool.prune(time.time() - self.retention)
+                except sqlite3.Error:
+                    pass
+
+    def close(self, timeout=10.0):
+        """Stop the flusher after a final flush attempt."""
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        try:
+            self.flush()
+        except Exception:
+            pass
+
+
+def default_spool_path():
+    return os.environ.get("HOLIRISK_SPOOL_PATH") or os.path.join(os.path.expanduser("~"), ".holirisk", "spool.sqlite3")
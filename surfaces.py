@@ -0,0 +1,87 @@
+"""Risk surfaces: ``final_score`` over a grid of two inputs.
+
+surface() evaluates the whole grid in one broadcast call to
+scoring.score_batch() (x along the columns, y along the rows) with every
+other input fixed. downsample() then shrinks it for the browser without a
+uniform stride: grid lines are kept where the score changes the most (around
+the risk level boundaries) and thinned out where it is flat or capped, so a
+high-resolution surface keeps its shape in a small payload.
+
+Axes are ``rr_score`` (0-100), ``estimated_cases`` (log-spaced, 1 case up to
+the population) and the five weights (0-100, continuous).
+"""
+import math
+
+import numpy as np
+
+from scoring import score_batch
+
+AXIS_LABELS = {
+    "rr_score": "Risk Ranger Score",
+    "estimated_cases": "Estimated cases",
+    "w_health": "Health weight",
+    "w_econ": "Economic weight",
+    "w_pol": "Political weight",
+    "w_trust": "Trust weight",
+    "w_market": "Market weight",
+}
+WEIGHT_AXES = ("w_health", "w_econ", "w_pol", "w_trust", "w_market")
+
+# Share of the output grid lines spread uniformly; the rest follow the variation
+UNIFORM_SHARE = 0.3
+
+
+def axis_values(name, inputs, n):
+    """``n`` grid values of axis ``name`` for a scenario."""
+    if name == "estimated_cases":
+        return np.logspace(0, max(math.log10(inputs["total_population"]), 1), n)
+    if name in AXIS_LABELS:
+        return np.linspace(0, 100, n)
+    raise ValueError(f"Unknown axis {name!r}; choose from {sorted(AXIS_LABELS)}")
+
+
+def current_value(name, inputs):
+    """The scenario's own value on axis ``name`` (for the marker)."""
+    if name == "estimated_cases":
+        return inputs["base"] * 10 ** inputs["exponent"]
+    return inputs[name]
+
+
+def surface(inputs, x, y, nx=200, ny=200):
+    """(x values, y values, final_score[ny, nx]) with all other inputs fixed."""
+    if x == y:
+        raise ValueError("x and y must be different inputs")
+    xv, yv = axis_values(x, inputs, nx), axis_values(y, inputs, ny)
+    args = dict(inputs)
+    for name, values in ((x, xv[np.newaxis, :]), (y, yv[:, np.newaxis])):
+        if name == "estimated_cases":
+            args["base"], args["exponent"] = values, 0
+        else:
+            args[name] = values
+    z = np.broadcast_to(score_batch(**args)["final_score"], (ny, nx))
+    return xv, yv, z
+
+
+def adaptive_indices(variation, n_out):
+    """``n_out`` (or fewer) indices into ``len(variation) + 1`` grid lines, denser
+    where ``variation`` (per interval) is high; both ends are always kept."""
+    m = len(variation) + 1
+    if m <= n_out:
+        return np.arange(m)
+    weight = np.asarray(variation, dtype=float)
+    total = weight.sum()
+    if total <= 0:
+        weight = np.ones(m - 1)
+    else:
+        weight = (1 - UNIFORM_SHARE) * weight / total + UNIFORM_SHARE / (m - 1)
+    cumulative = np.concatenate([[0.0], np.cumsum(weight)])
+    idx = np.searchsorted(cumulative, np.linspace(0, cumulative[-1], n_out), side="left")
+    return np.unique(np.concatenate([[0], np.clip(idx, 0, m - 1), [m - 1]]))
+
+
+def downsample(xv, yv, z, max_x=150, max_y=150):
+    """Keep at most ``max_x`` columns and ``max_y`` rows of the grid, chosen by
+    adaptive_indices() from the total variation of ``z`` across each line."""
+    ix = adaptive_indices(np.abs(np.diff(z, axis=1)).sum(axis=0), max_x)
+    iy = adaptive_indices(np.abs(np.diff(z, axis=0)).sum(axis=1), max_y)
+    return xv[ix], yv[iy], z[np.ix_(iy, ix)]
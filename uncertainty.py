@@ -0,0 +1,130 @@
+"""Monte Carlo uncertainty propagation for the HoliRisk score.
+
+Any of ``rr_score``, ``base``, ``exponent`` (or ``estimated_cases`` directly)
+can be given a distribution instead of a point value, e.g.::
+
+    simulate(inputs, {
+        "rr_score": {"dist": "triangular", "left": 50, "mode": 60, "right": 70},
+        "estimated_cases": {"dist": "lognormal", "median": 2340, "gsd": 2.0},
+    })
+
+Samples are drawn and scored chunk by chunk with scoring.score_batch(), so a
+million draws only ever hold one chunk of intermediate arrays in memory.
+"""
+import numpy as np
+
+from presets import NUMERIC_FIELDS
+from scoring import RISK_LEVELS, score_batch
+
+
+def _bounds(field):
+    _, low, high = NUMERIC_FIELDS[field]
+    return (low, np.inf if high is None else high)
+
+
+# Inputs that accept a distribution, with the range samples are clipped to
+# (the range of the page inputs, so the two cannot drift apart)
+BOUNDS = {
+    "rr_score": _bounds("rr_score"),
+    "base": _bounds("illness_base"),
+    "exponent": _bounds("illness_exponent"),
+    "estimated_cases": (0, np.inf),
+}
+
+# Parameters each distribution needs
+DISTRIBUTIONS = {
+    "uniform": ("low", "high"),
+    "normal": ("mean", "sd"),
+    "lognormal": ("median", "gsd"),
+    "triangular": ("left", "mode", "right"),
+}
+
+
+def check_spec(spec):
+    """The parameters of a distribution spec as floats; ValueError if the
+    spec is unknown, incomplete or out of its domain."""
+    kind = spec.get("dist")
+    if kind not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution '{kind}', expected one of {tuple(DISTRIBUTIONS)}")
+    missing = [key for key in DISTRIBUTIONS[kind] if key not in spec]
+    if missing:
+        raise ValueError(f"A {kind} distribution needs: {', '.join(missing)}")
+    params = {key: float(spec[key]) for key in DISTRIBUTIONS[kind]}
+    if not all(np.isfinite(value) for value in params.values()):
+        raise ValueError(f"The parameters of a {kind} distribution must be finite: {params}")
+    if kind == "normal" and params["sd"] < 0:
+        raise ValueError("A normal distribution needs sd >= 0")
+    if kind == "lognormal" and (params["median"] <= 0 or params["gsd"] < 1):
+        raise ValueError("A lognormal distribution needs median > 0 and gsd >= 1")
+    return params
+
+
+def draw(spec, size, rng, dtype=np.float64):
+    """Draw ``size`` samples from a distribution spec (see module docstring)."""
+    kind = spec["dist"]
+    spec = check_spec(spec)
+    if kind == "uniform":
+        u = rng.random(size, dtype=dtype)
+        return spec["low"] + u * (spec["high"] - spec["low"])
+    if kind == "normal":
+        return spec["mean"] + spec["sd"] * rng.standard_normal(size, dtype=dtype)
+    if kind == "lognormal":
+        # Parameterised by median and geometric standard deviation
+        z = rng.standard_normal(size, dtype=dtype)
+        return spec["median"] * np.exp(float(np.log(spec["gsd"])) * z)
+    # Triangular: inverse CDF, so float32 draws stay float32 end to end
+    a, c, b = spec["left"], spec["mode"], spec["right"]
+    if b <= a:
+        return np.full(size, c, dtype=dtype)
+    # A mode outside [left, right] would take the square root of a
+    # negative number; like a degenerate range, clamp it instead
+    c = min(max(c, a), b)
+    u = rng.random(size, dtype=dtype)
+    fc = (c - a) / (b - a)
+    return np.where(
+        u < fc,
+        a + np.sqrt(u * (b - a) * (c - a)),
+        b - np.sqrt((1 - u) * (b - a) * (b - c)),
+    ).astype(dtype)
+
+
+def simulate(inputs, distributions, n_samples=100_000, chunk_size=250_000, seed=0,
+             dtype=np.float64, percentiles=(5, 25, 50, 75, 95)):
+    """Propagate input distributions through the scoring model.
+
+    ``inputs`` holds the point values of every scoring.INPUTS name;
+    ``distributions`` maps some of ``BOUNDS`` to distribution specs. Returns a
+    dict with the ``percentiles`` of the final score, its ``mean``/``std`` and
+    ``p_risk_level`` (probability of each entry of RISK_LEVELS).
+    """
+    unknown = set(distributions) - set(BOUNDS)
+    if unknown:
+        raise ValueError(f"Cannot assign a distribution to: {', '.join(sorted(unknown))}")
+    for spec in distributions.values():
+        check_spec(spec)
+
+    rng = np.random.default_rng(seed)
+    final_scores = np.empty(n_samples, dtype=dtype)
+    level_counts = np.zeros(len(RISK_LEVELS), dtype=np.int64)
+
+    for start in range(0, n_samples, chunk_size):
+        size = min(chunk_size, n_samples - start)
+        args = dict(inputs)
+        for name, spec in distributions.items():
+            low, high = BOUNDS[name]
+            args[name] = np.clip(draw(spec, size, rng, dtype), low, high)
+        if "estimated_cases" in args:
+            args["base"] = args.pop("estimated_cases")
+            args["exponent"] = 0
+
+        out = score_batch(**args, dtype=dtype)
+        final_scores[start:start + size] = np.broadcast_to(out["final_score"], size)
+        level_counts += np.bincount(np.broadcast_to(out["risk_level"], size), minlength=len(RISK_LEVELS))
+
+    return {
+        "n_samples": n_samples,
+        "mean": float(final_scores.mean(dtype=np.float64)),
+        "std": float(final_scores.std(dtype=np.float64)),
+        "percentiles": dict(zip(percentiles, np.percentile(final_scores, percentiles).tolist())),
+        "p_risk_level": dict(zip(RISK_LEVELS, (level_counts / n_samples).tolist())),
+    }